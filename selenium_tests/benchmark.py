@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the test harness itself
+Usage:
+    python benchmark.py run                                  # micro-benchmarks
+    python benchmark.py run --macro --workers 1,4 --services local
+    python benchmark.py run --only driver.get,api.get --repeat 50 --label pooled-client
+    python benchmark.py compare                              # newest run against the one before
+    python benchmark.py compare --base main --head -1
+    python benchmark.py list
+
+Micro-benchmarks run against a local static server (harness/bench.py), so
+they measure the harness and the browser, not the application:
+
+    driver.launch   start a headless Chrome (DriverPool.acquire(fresh=True))
+    driver.reset    the teardown between tests (DriverPool.reset)
+    driver.get      driver.get of a static page
+    open_page       driver.get plus the harness's readiness waits
+    wait.ready      the readiness waits alone, on a loaded page
+    find_element    one find_element round trip
+    api.get         GET /api/trips through the pooled ApiClient
+
+--macro also times the smoke set and the full suite at each --workers
+count through run_tests.py, against the real application (started once
+with --services). Every run is appended to bench_results/history.jsonl;
+compare reports the benchmarks that got significantly slower or faster
+and exits with 1 if any got slower.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from harness.bench import (
+    DEFAULT_ALPHA,
+    DEFAULT_HISTORY_FILE,
+    DEFAULT_MIN_CHANGE_PCT,
+    BenchHistory,
+    StaticSite,
+    compare_runs,
+    describe,
+    format_comparison,
+    format_run,
+    measure,
+)
+from harness.services import MODES, ServiceError, ServiceOrchestrator
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    # python-dotenv is only installed in the venv; comparing runs works without it
+    pass
+
+MICRO = ("driver.launch", "driver.reset", "driver.get", "open_page", "wait.ready", "find_element", "api.get")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmarks of the Opalumpus test harness")
+    parser.add_argument("command", choices=("run", "compare", "list"))
+    parser.add_argument("--history-file", default=os.getenv("BENCH_HISTORY_FILE", DEFAULT_HISTORY_FILE))
+    parser.add_argument("--label", default="", help="Name of this run, to compare against later (run)")
+    parser.add_argument("--only", default="", help="Comma separated benchmarks (or prefixes) to run (run)")
+    parser.add_argument("--repeat", type=int, default=20, help="Samples per micro-benchmark (run)")
+    parser.add_argument("--warmup", type=int, default=3, help="Unmeasured calls before the samples (run)")
+    parser.add_argument("--launch-repeat", type=int, default=5, help="Samples of driver.launch (run)")
+    parser.add_argument("--macro", action="store_true", help="Also time the smoke set and the full suite (run)")
+    parser.add_argument("--macro-repeat", type=int, default=3, help="Samples per macro-benchmark (run)")
+    parser.add_argument("--workers", default="1", help="Comma separated worker counts for the full suite (run)")
+    parser.add_argument("--services", choices=MODES, default=os.getenv("SERVICES", "none"),
+                        help="Start (local, compose) or wait for (attach) the application for --macro (run)")
+    parser.add_argument("--base", default="-2", help="Run to compare against: index, label or commit (compare)")
+    parser.add_argument("--head", default="-1", help="Run to compare: index, label or commit (compare)")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="Significance level (compare)")
+    parser.add_argument("--min-change", type=float, default=DEFAULT_MIN_CHANGE_PCT,
+                        help="Smallest change of the median in percent that is reported (compare)")
+    return parser.parse_args(argv)
+
+
+def selected(name, only):
+    return not only or any(name == o or name.startswith(f"{o}.") for o in only)
+
+
+def run_micro(args, only):
+    """``{name: [seconds]}`` of the selected micro-benchmarks"""
+    # Selenium is only needed here, not to compare runs
+    from selenium.webdriver.common.by import By
+
+    from harness.api_client import ApiClient
+    from harness.driver_pool import DriverPool
+    from harness.waits import open_page, wait_until_ready
+
+    names = [name for name in MICRO if selected(name, only)]
+    results = {}
+    if not names:
+        return results
+    site = StaticSite().start()
+    pool = DriverPool()
+    launched = []
+
+    def discard_launched():
+        while launched:
+            pool.release(launched.pop(), discard=True)
+
+    def blank():
+        driver.get("about:blank")
+
+    def loaded():
+        driver.get(site.url)
+
+    benchmarks = {
+        "driver.launch": lambda: measure(lambda: launched.append(pool.acquire(fresh=True)),
+                                         args.launch_repeat, setup=discard_launched),
+        "driver.reset": lambda: measure(lambda: pool.reset(driver), args.repeat, args.warmup, setup=loaded),
+        "driver.get": lambda: measure(lambda: driver.get(site.url), args.repeat, args.warmup, setup=blank),
+        "open_page": lambda: measure(lambda: open_page(driver, site.url), args.repeat, args.warmup, setup=blank),
+        "wait.ready": lambda: measure(lambda: wait_until_ready(driver, "/"), args.repeat, args.warmup,
+                                      setup=loaded),
+        "find_element": lambda: measure(lambda: driver.find_element(By.ID, "target"), args.repeat * 5,
+                                        args.warmup),
+        "api.get": lambda: measure(lambda: client.get("/api/trips").json(), args.repeat * 5, args.warmup),
+    }
+
+    print(f"Static site at {site.url}")
+    client = ApiClient(site.url)
+    driver = None
+    try:
+        # api.get alone needs no browser
+        if any(not name.startswith("api.") for name in names):
+            driver = pool.acquire()
+            loaded()
+        for name in names:
+            print(f"  {name}...", flush=True)
+            results[name] = benchmarks[name]()
+            discard_launched()
+    finally:
+        discard_launched()
+        if driver is not None:
+            pool.release(driver, discard=True)
+        pool.close()
+        client.close()
+        site.stop()
+    return results
+
+
+def run_macro(args, only):
+    """``{name: [seconds]}`` of whole suite runs through run_tests.py"""
+    runs = {"suite.smoke": ["--workers", "1", "-m", "smoke"]}
+    for workers in args.workers.split(","):
+        runs[f"suite.full.w{workers.strip()}"] = ["--workers", workers.strip()]
+    runs = {name: run_args for name, run_args in runs.items() if selected(name, only)}
+    results = {}
+    if not runs:
+        return results
+
+    # Started once; every suite run only checks that they answer
+    orchestrator = ServiceOrchestrator(
+        args.services,
+        base_url=os.getenv("BASE_URL", "http://localhost:5173"),
+        api_url=os.getenv("API_URL", "http://localhost:3000"),
+        mongo_uri=os.getenv("MONGO_URI"),
+    )
+    log_dir = Path(args.history_file).parent
+    log_dir.mkdir(parents=True, exist_ok=True)
+    orchestrator.start()
+    try:
+        for name, run_args in runs.items():
+            command = [sys.executable, "run_tests.py", "--services", "attach"] + run_args + ["-q"]
+            results[name] = []
+            with open(log_dir / f"{name}.log", "w", encoding="utf-8") as log:
+                for attempt in range(args.macro_repeat):
+                    print(f"  {name} ({attempt + 1}/{args.macro_repeat})...", flush=True)
+                    started = time.perf_counter()
+                    code = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT).returncode
+                    results[name].append(time.perf_counter() - started)
+                    if code not in (0, 1):
+                        print(f"  ⚠ {name} exited with {code}; see {log_dir / f'{name}.log'}")
+    finally:
+        orchestrator.stop()
+    return results
+
+
+def run(args):
+    only = [o.strip() for o in args.only.split(",") if o.strip()]
+    print("=" * 60)
+    print("Opalumpus Harness Benchmarks")
+    print("=" * 60)
+    try:
+        benchmarks = run_micro(args, only)
+        if args.macro:
+            benchmarks.update(run_macro(args, only))
+    except ServiceError as e:
+        print(f"\n✗ {e}")
+        return 1
+    if not benchmarks:
+        print(f"No benchmark matches --only {args.only}")
+        return 2
+
+    entry = BenchHistory(args.history_file).append(benchmarks, args.label)
+    print(f"\n{format_run(benchmarks)}")
+    print(f"\n📊 Run {describe(entry)} added to {args.history_file}")
+    return 0
+
+
+def compare(args):
+    history = BenchHistory(args.history_file)
+    base, head = history.find(args.base), history.find(args.head)
+    if base is None or head is None:
+        missing = args.base if base is None else args.head
+        print(f"✗ No run {missing!r} in {args.history_file} ({len(history.runs)} runs)")
+        return 2
+    rows = compare_runs(base, head, args.alpha, args.min_change)
+    print(f"Base: {describe(base)}\nHead: {describe(head)}\n")
+    print(format_comparison(rows))
+    slower = [row["name"] for row in rows if row["verdict"] == "slower"]
+    faster = [row["name"] for row in rows if row["verdict"] == "faster"]
+    print(f"\n{len(slower)} significantly slower, {len(faster)} significantly faster "
+          f"(p < {args.alpha:g}, change >= {args.min_change:g}%)")
+    if base.get("host") != head.get("host"):
+        print(f"⚠ The runs were made on different hosts ({base.get('host')}, {head.get('host')})")
+    return 1 if slower else 0
+
+
+def list_runs(args):
+    history = BenchHistory(args.history_file)
+    for index, entry in enumerate(history.runs):
+        print(f"{index:>4}  {describe(entry)}  ({len(entry['benchmarks'])} benchmarks)")
+    if not history.runs:
+        print(f"No runs in {args.history_file}")
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if args.command == "run":
+        return run(args)
+    if args.command == "compare":
+        return compare(args)
+    return list_runs(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,58 +1,479 @@
 import pytest
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 import os
-import sys
+from urllib.parse import urlparse
+from _pytest.runner import runtestprotocol
 from dotenv import load_dotenv
 
+from harness.api_client import ApiClient
+from harness.artifacts import DEFAULT_KEEP_RUNS, DEFAULT_MAX_MB, ArtifactStore, prune, sampled
+from harness.auth import (
+    LOGIN_METHODS,
+    AuthCache,
+    AuthError,
+    api_login,
+    capture_state,
+    clear_restore,
+    login_through_form,
+    restore_state,
+    ui_login,
+)
+from harness.driver_pool import DriverPool, RemoteDriverFactory, is_node_failure
+from harness.grid import (
+    DEFAULT_NODE_RETRIES,
+    DEFAULT_REMOTE_URL,
+    DEFAULT_SLOT_TIMEOUT,
+    DRIVER_BACKEND_ENV,
+    DRIVER_BACKENDS,
+    REMOTE_URL_ENV,
+    SlotScheduler,
+)
+from harness.mock_api import MockApi, install_api_redirect
+from harness.network import AssetReport, NetworkCapture, format_report, record_image_sizes
+from harness.parallel import WORKER_COUNT_ENV, current_run_id, worker_id
+from harness.perf import DEFAULT_PERF_DIR, PerfRecorder
+from harness.profiling import (
+    Profiler,
+    active as active_profiler,
+    format_summary,
+    load_traces,
+    span as profile_span,
+    summarize,
+    summary_html,
+    trace_paths,
+    write_folded,
+)
+from harness.profiles import CPU_RATES, DEVICES, NETWORKS, build_matrix, format_cells, summarize_cells
+from harness.results import DEFAULT_RESULTS_DIR, ResultStream
+from harness.selection import (
+    DEFAULT_FLAKY_THRESHOLD,
+    DEFAULT_HISTORY_FILE,
+    HistoryRecorder,
+    TestHistory,
+    api_key,
+    changed_files,
+    coverage_keys,
+    default_base,
+    is_api_path,
+    order_key,
+    select_changed,
+    split_quarantined,
+)
+from harness.seeding import (
+    BACKENDS,
+    DEFAULT_MONGO_URI,
+    DEFAULT_SEED,
+    SeededScenario,
+    create_seeder,
+    scenario_namespace,
+    seed_scenario,
+)
+from harness.services import (
+    DEFAULT_LOG_DIR,
+    MODES,
+    SERVICES_READY_ENV,
+    ServiceError,
+    ServiceOrchestrator,
+)
+from harness.visual import DEFAULT_BASELINE_DIR, DEFAULT_MAX_DIFF_PCT, DEFAULT_THRESHOLD, VISUAL_DIR, VisualDiffer
+from harness.waits import add_navigation_listener, remove_navigation_listener, set_timeout_scale
+
 # Load environment variables
 load_dotenv()
 
+def pytest_addoption(parser):
+    """Command line options for the Opalumpus harness"""
+    group = parser.getgroup("opalumpus")
+    group.addoption(
+        "--perf-dir",
+        default=os.getenv("PERF_RESULTS_DIR", DEFAULT_PERF_DIR),
+        help="Directory for per-route page timing results (default: perf_results)",
+    )
+    group.addoption(
+        "--network",
+        default=os.getenv("NETWORK_PROFILES", ""),
+        help=f"Comma separated network profiles to run every browser test under ({', '.join(NETWORKS)})",
+    )
+    group.addoption(
+        "--cpu",
+        default=os.getenv("CPU_PROFILES", ""),
+        help=f"Comma separated CPU throttling profiles ({', '.join(CPU_RATES)})",
+    )
+    group.addoption(
+        "--device",
+        default=os.getenv("DEVICE_PROFILES", ""),
+        help=f"Comma separated device profiles ({', '.join(DEVICES)})",
+    )
+    group.addoption(
+        "--driver-backend",
+        choices=DRIVER_BACKENDS,
+        default=os.getenv(DRIVER_BACKEND_ENV, "local"),
+        help="Start Chrome on this machine (local) or on a Selenium Grid / Remote WebDriver (remote)",
+    )
+    group.addoption(
+        "--remote-url",
+        default=os.getenv(REMOTE_URL_ENV, DEFAULT_REMOTE_URL),
+        help="Selenium Grid or Remote WebDriver URL for --driver-backend=remote",
+    )
+    group.addoption(
+        "--slot-timeout",
+        type=float,
+        default=float(os.getenv("GRID_SLOT_TIMEOUT", DEFAULT_SLOT_TIMEOUT)),
+        help="Seconds to wait for a free Grid slot before a browser request fails",
+    )
+    group.addoption(
+        "--node-retries",
+        type=int,
+        default=int(os.getenv("GRID_NODE_RETRIES", DEFAULT_NODE_RETRIES)),
+        help="Times a test or session is retried on another node when a Grid node fails",
+    )
+    group.addoption(
+        "--api-backend",
+        choices=("live", "mock"),
+        default=os.getenv("API_BACKEND", "live"),
+        help="Run against the real Express API (live) or an in-process stand-in (mock)",
+    )
+    group.addoption(
+        "--mock-latency",
+        type=float,
+        default=float(os.getenv("MOCK_API_LATENCY_MS", "0")),
+        help="Milliseconds the mock API waits before every response",
+    )
+    group.addoption(
+        "--mock-error-rate",
+        type=float,
+        default=float(os.getenv("MOCK_API_ERROR_RATE", "0")),
+        help="Share of mock API requests answered with HTTP 500 (0-1)",
+    )
+    group.addoption(
+        "--services",
+        choices=MODES,
+        default=os.getenv("SERVICES", "none"),
+        help="Start (local, compose) or wait for (attach) the application before testing (default: none)",
+    )
+    group.addoption(
+        "--service-logs",
+        default=DEFAULT_LOG_DIR,
+        help="Directory for the output of services started by --services",
+    )
+    group.addoption(
+        "--seed-backend",
+        choices=BACKENDS,
+        default=os.getenv("SEED_BACKEND", "api"),
+        help="Where test data is seeded: through the API or directly into MongoDB (default: api)",
+    )
+    group.addoption(
+        "--mongo-uri",
+        default=os.getenv("MONGO_URI", DEFAULT_MONGO_URI),
+        help="MongoDB connection string for --seed-backend=mongo",
+    )
+    group.addoption(
+        "--login-via",
+        choices=LOGIN_METHODS,
+        default=os.getenv("LOGIN_VIA", "api"),
+        help="How the shared admin session logs in: POST /admin-signin (api) or the sign-in form (ui)",
+    )
+    group.addoption(
+        "--no-profile",
+        action="store_true",
+        help="Do not time fixtures, WebDriver commands, waits and requests (suite profile in report.html)",
+    )
+    group.addoption(
+        "--results-dir",
+        default=os.getenv("RESULTS_DIR", DEFAULT_RESULTS_DIR),
+        help="Directory for the streamed results and the failure artifacts (default: results)",
+    )
+    group.addoption(
+        "--artifacts-sample",
+        type=float,
+        default=float(os.getenv("ARTIFACTS_SAMPLE", "0")),
+        help="Share of passing browser tests whose artifacts are kept too (0-1, default 0)",
+    )
+    group.addoption(
+        "--keep-runs",
+        type=int,
+        default=int(os.getenv("RESULTS_KEEP_RUNS", DEFAULT_KEEP_RUNS)),
+        help="Runs whose results and artifacts are kept in --results-dir",
+    )
+    group.addoption(
+        "--artifacts-max-mb",
+        type=float,
+        default=float(os.getenv("ARTIFACTS_MAX_MB", DEFAULT_MAX_MB)),
+        help="Fewer runs are kept when their artifacts take more than this",
+    )
+    group.addoption(
+        "--visual-baselines",
+        default=os.getenv("VISUAL_BASELINES_DIR", DEFAULT_BASELINE_DIR),
+        help="Directory of the approved screenshots (default: visual_baselines)",
+    )
+    group.addoption(
+        "--visual-threshold",
+        type=float,
+        default=float(os.getenv("VISUAL_THRESHOLD", DEFAULT_THRESHOLD)),
+        help="Colour distance (0-1) from which a pixel differs from its baseline",
+    )
+    group.addoption(
+        "--visual-max-diff",
+        type=float,
+        default=float(os.getenv("VISUAL_MAX_DIFF_PCT", DEFAULT_MAX_DIFF_PCT)),
+        help="Percentage of differing pixels a screenshot may have and still match",
+    )
+    group.addoption(
+        "--history-file",
+        default=os.getenv("TEST_HISTORY_FILE", DEFAULT_HISTORY_FILE),
+        help=f"Per-test durations, outcomes and covered routes of past runs (default: {DEFAULT_HISTORY_FILE})",
+    )
+    group.addoption(
+        "--reruns",
+        type=int,
+        default=int(os.getenv("TEST_RERUNS", "0")),
+        help="Times a failed test is run again in the same worker before it counts as failed",
+    )
+    group.addoption(
+        "--flaky-threshold",
+        type=float,
+        default=float(os.getenv("FLAKY_THRESHOLD", DEFAULT_FLAKY_THRESHOLD)),
+        help="Flakiness score (0-1, from the test history) from which a test is quarantined",
+    )
+    group.addoption(
+        "--quarantine",
+        choices=("run", "skip", "only"),
+        default=os.getenv("QUARANTINE", "run"),
+        help="Run quarantined (flaky) tests with the others, leave them out, or run only them",
+    )
+    group.addoption(
+        "--order",
+        choices=("history", "file"),
+        default=os.getenv("TEST_ORDER", "history"),
+        help="Run recently failed and critical tests first (history) or keep file order",
+    )
+    group.addoption(
+        "--changed-only",
+        action="store_true",
+        help="Only run tests covering the routes touched by the changes since --changed-base",
+    )
+    group.addoption(
+        "--changed-base",
+        default=default_base(),
+        help="Git ref the changes are compared against (default: origin/$CHANGE_TARGET or origin/main)",
+    )
+
+@pytest.fixture(scope="session", autouse=True)
+def services(request, base_url, api_url, api_backend):
+    """
+    Starts or attaches to MongoDB, the backend and the frontend according
+    to --services and blocks until they answer their health checks.
+    Does nothing when run_tests.py has already brought them up.
+    """
+    mode = request.config.getoption("--services")
+    if mode == "none" or os.getenv(SERVICES_READY_ENV):
+        yield None
+        return
+    
+    orchestrator = ServiceOrchestrator(
+        mode,
+        base_url,
+        api_url,
+        mongo_uri=None if api_backend else os.getenv("MONGO_URI"),
+        log_dir=request.config.getoption("--service-logs"),
+        only=("frontend",) if api_backend else None,
+    )
+    try:
+        orchestrator.start()
+    except ServiceError as e:
+        pytest.exit(str(e), returncode=3)
+    yield orchestrator
+    orchestrator.stop()
+
+@pytest.fixture(scope="session")
+def api_backend(request):
+    """
+    The in-process mock API when running with --api-backend=mock, else None.
+    """
+    if request.config.getoption("--api-backend") != "mock":
+        yield None
+        return
+    
+    mock = MockApi(
+        latency_ms=request.config.getoption("--mock-latency"),
+        error_rate=request.config.getoption("--mock-error-rate"),
+        seed=0,
+    ).start()
+    print(f"\nMock API listening on {mock.url}")
+    yield mock
+    mock.stop()
+
 @pytest.fixture(scope="function")
-def driver():
+def mock_api(api_backend):
+    """
+    The mock API for tests that inject latency or errors, restored to its
+    initial catalogue with no bookings or logged requests.
+    Skips the test when running against the live API.
+    """
+    if api_backend is None:
+        pytest.skip("Needs the mock API (--api-backend=mock)")
+    api_backend.reset()
+    yield api_backend
+    api_backend.clear_faults()
+
+@pytest.fixture(scope="session")
+def driver_pool(request, api_backend):
+    """
+    Session-wide pool of headless Chrome drivers.
+    Browsers are started once per worker and reused across tests.
+    With --driver-backend=remote they are requested from the Grid as slots
+    become free. With the mock API, every browser sends its API requests to
+    the mock.
+    """
+    hooks = []
+    if api_backend is not None:
+        hooks.append(lambda driver: install_api_redirect(driver, api_backend.url))
+    factory = scheduler = None
+    if request.config.getoption("--driver-backend") == "remote":
+        url = request.config.getoption("--remote-url")
+        scheduler = SlotScheduler(url, request.config.getoption("--slot-timeout"))
+        factory = RemoteDriverFactory(url, scheduler, request.config.getoption("--node-retries"))
+    pool = DriverPool(factory=factory, launch_hooks=hooks)
+    yield pool
+    pool.close()
+    if scheduler is not None and pool.created:
+        print(f"\nGrid: {pool.created} sessions, {scheduler.waited:.1f}s waiting for slots, "
+              f"{factory.node_failures} node failures retried")
+
+def pytest_generate_tests(metafunc):
+    """Run every browser test once per cell of the --network/--cpu/--device matrix"""
+    if "driver" not in metafunc.fixturenames:
+        return
+    config = metafunc.config
+    try:
+        matrix = build_matrix(
+            config.getoption("--network"), config.getoption("--cpu"), config.getoption("--device")
+        )
+    except ValueError as e:
+        raise pytest.UsageError(str(e))
+    if matrix:
+        metafunc.parametrize("device_profile", matrix, ids=[p.name for p in matrix], indirect=True)
+
+@pytest.fixture(scope="function")
+def device_profile(request):
+    """The emulation profile of the current matrix cell, or None"""
+    return getattr(request, "param", None)
+
+@pytest.fixture(scope="function")
+def driver(request, driver_pool, device_profile, perf_recorder):
+    """
+    Provide a clean headless Chrome WebDriver from the pool.
+    This fixture is used by all test cases. Tests marked with
+    @pytest.mark.fresh_driver get a dedicated browser that is discarded
+    afterwards instead of a pooled one. When a profile matrix is selected,
+    the driver emulates the cell's network, CPU and device.
+    """
+    fresh = request.node.get_closest_marker("fresh_driver") is not None
+    driver = driver_pool.acquire(fresh=fresh)
+    if device_profile is not None:
+        device_profile.apply(driver)
+        set_timeout_scale(device_profile.slowdown)
+        perf_recorder.current_profile = device_profile.name
+    
+    yield driver
+    
+    # Teardown - reset the browser and return it to the pool
+    set_timeout_scale(1)
+    perf_recorder.current_profile = None
+    driver_pool.release(driver, discard=fresh)
+
+@pytest.fixture(scope="session")
+def perf_recorder(request):
     """
-    Setup Chrome WebDriver with headless mode for automated testing.
-    This fixture is used by all test cases.
+    Records Navigation/Paint Timing and Web Vitals for every page opened
+    with harness.waits.open_page, grouped per route, for the whole session.
     """
-    chrome_options = Options()
+    recorder = PerfRecorder(request.config.getoption("--perf-dir"))
+    add_navigation_listener(recorder.record)
+    yield recorder
+    remove_navigation_listener(recorder.record)
+    path = recorder.write()
+    if path:
+        print(f"\nPage timings written to {path}")
+    cells = summarize_cells(recorder.samples)
+    if cells:
+        print("\nPage timings per profile (medians):")
+        print(format_cells(cells))
+
+@pytest.fixture(scope="session")
+def asset_report(request, perf_recorder):
+    """
+    Every request made by the pages of browser tests, with the per-route
+    asset-weight report (uncompressed responses, duplicate fetches,
+    oversized images) written next to the page timings.
+    """
+    report = AssetReport()
+    yield report
     
-    # Headless mode - required for Jenkins/AWS EC2 environment
-    chrome_options.add_argument("--headless=new")
+    path = report.write(
+        perf_recorder.output_dir / f"{perf_recorder.run_id}-network-w{worker_id()}.json"
+    )
+    if path:
+        print(f"\nNetwork requests written to {path}")
+        print(format_report(report.by_route()))
+
+@pytest.fixture(scope="session")
+def run_history(request):
+    """Durations, outcomes and covered routes of past runs (see harness/selection.py)"""
+    return request.config.pluginmanager.get_plugin("opalumpus-history").history
+
+@pytest.fixture(autouse=True)
+def _api_coverage(request, run_history):
+    """Remember which API routes each test calls through the API client"""
+    if "api_client" not in request.fixturenames:
+        yield
+        return
     
-    # Additional options for stability in CI/CD environments
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument("--disable-extensions")
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-    chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
+    client = request.getfixturevalue("api_client")
+    keys = set()
     
-    # Initialize the Chrome driver with proper Windows handling
-    try:
-        # Use ChromeDriverManager to get the driver path
-        driver_path = ChromeDriverManager().install()
-        
-        # Create service with explicit path
-        service = Service(executable_path=driver_path)
-        
-        # Initialize driver
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-    except Exception as e:
-        print(f"Error initializing Chrome driver: {e}")
-        print(f"Python version: {sys.version}")
-        print(f"Python executable: {sys.executable}")
-        raise
+    def on_response(route, seconds, response):
+        path = route.split(" ", 1)[1]
+        if is_api_path(path):
+            keys.add(api_key(path))
+    
+    client.add_timing_listener(on_response)
+    yield
+    client.remove_timing_listener(on_response)
+    run_history.cover(request.node.nodeid, keys)
+
+@pytest.fixture(autouse=True)
+def _network_capture(request, asset_report, run_history):
+    """Capture the network traffic of each test that uses a browser (also kept with its failure artifacts)"""
+    if "driver" not in request.fixturenames:
+        yield None
+        return
     
-    # Set implicit wait
-    driver.implicitly_wait(10)
+    driver = request.getfixturevalue("driver")
+    capture = NetworkCapture(driver)
+    images = []
     
-    yield driver
+    def on_navigation(driver, url):
+        images.extend((urlparse(url).path or "/", image) for image in record_image_sizes(driver))
     
-    # Teardown - close the browser
-    driver.quit()
+    profiler = active_profiler()
+    capture.start()
+    started = profiler.now() if profiler else None
+    add_navigation_listener(on_navigation)
+    yield capture
+    remove_navigation_listener(on_navigation)
+    
+    records = capture.stop()
+    if profiler:
+        profiler.add_requests(records, started, profiler.now())
+    asset_report.add(request.node.nodeid, records, images)
+    run_history.cover(request.node.nodeid, coverage_keys(records))
+
+@pytest.fixture(autouse=True)
+def _perf_test_context(request, perf_recorder):
+    """Tag page timing samples with the test that produced them"""
+    perf_recorder.current_test = request.node.nodeid
+    yield
+    perf_recorder.current_test = None
 
 @pytest.fixture(scope="session")
 def base_url():
@@ -63,15 +484,259 @@ def base_url():
     return os.getenv("BASE_URL", "http://localhost:5173")
 
 @pytest.fixture(scope="session")
-def api_url():
+def api_url(api_backend):
     """
     Returns the API base URL.
-    Can be configured via environment variable.
+    Can be configured via environment variable; the mock API's own URL
+    when running with --api-backend=mock.
     """
+    if api_backend is not None:
+        return api_backend.url
     return os.getenv("API_URL", "http://localhost:3000")
 
+@pytest.fixture(scope="session")
+def api_client(api_url):
+    """
+    Pooled keep-alive client for all API calls in the suite.
+    Retries connection failures with backoff and times every route.
+    """
+    client = ApiClient(api_url)
+    
+    def profile_call(route, seconds, response):
+        profiler = active_profiler()
+        if profiler:
+            end = profiler.now()
+            profiler.add("api", route, end - seconds * 1e6, end, status=response.status_code)
+    
+    client.add_timing_listener(profile_call)
+    yield client
+    client.close()
+    
+    timings = client.timings.summary()
+    if timings:
+        print("\nAPI timings:")
+        for route, stats in sorted(timings.items()):
+            line = f"  {route}: {stats['count']} calls"
+            if stats["mean_ms"] is not None:
+                line += f", mean {stats['mean_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms"
+            if stats["retried"]:
+                line += f", {stats['retried']} retried ({stats['retries']} retries, not timed)"
+            print(line)
+
+@pytest.fixture(scope="session")
+def auth_cache(request, base_url):
+    """
+    Admin login shared by every test of this worker: performed once with
+    --login-via (api or ui), then restored into each test's browser.
+    """
+    if request.config.getoption("--login-via") == "ui":
+        cache = AuthCache(ui_login(request.getfixturevalue("driver_pool"), base_url))
+    else:
+        cache = AuthCache(api_login(request.getfixturevalue("api_client"), base_url))
+    yield cache
+    if cache.logins:
+        print(f"\nAdmin sessions: {cache.logins} login(s) in {cache.login_seconds:.2f}s")
+
+@pytest.fixture(scope="function")
+def admin_session(request, driver, auth_cache, base_url):
+    """
+    Makes ``driver`` a signed-in admin from its next page load on, from the
+    worker's cached login. Tests marked @pytest.mark.clean_session sign in
+    through the form in their own browser instead. Yields the BrowserState.
+    """
+    username = os.getenv("ADMIN_USERNAME", "admin")
+    password = os.getenv("ADMIN_PASSWORD", "admin123")
+    
+    if request.node.get_closest_marker("clean_session") is not None:
+        try:
+            login_through_form(driver, base_url, username, password)
+        except AuthError as e:
+            pytest.skip(f"Admin login not possible: {e}")
+        yield capture_state(driver)
+        return
+    
+    try:
+        state = auth_cache.state(username, password)
+    except AuthError as e:
+        pytest.skip(f"Admin login not possible: {e}")
+    identifier = restore_state(driver, state)
+    yield state
+    clear_restore(driver, identifier)
+
+@pytest.fixture(scope="session")
+def seeder(request, api_client):
+    """
+    Bulk seeding backend selected with --seed-backend.
+    Writes through the API by default, or straight into MongoDB.
+    """
+    seeder = create_seeder(
+        request.config.getoption("--seed-backend"),
+        api_client=api_client,
+        mongo_uri=request.config.getoption("--mongo-uri"),
+    )
+    yield seeder
+    seeder.close()
+
+@pytest.fixture(scope="function")
+def seeded_data(request, seeder):
+    """
+    Synthetic data in a namespace of its own for the current test.
+    The amount is taken from the seed marker, e.g.
+    @pytest.mark.seed(trips=10000, bookings=50). Everything in the
+    namespace (including records the test writes with
+    ``seeded_data.tagged(...)``) is removed again afterwards, as far as
+    the seeding backend can: the API cannot delete bookings.
+    Without a marker or tagged writes the database is not touched.
+    """
+    marker = request.node.get_closest_marker("seed")
+    options = dict(marker.kwargs) if marker else {}
+    namespace = scenario_namespace(f"{request.node.nodeid}:{worker_id()}")
+    
+    if marker:
+        # Leftovers of an interrupted run would skew the counts
+        seeder.teardown(namespace)
+        scenario = seed_scenario(
+            seeder,
+            namespace,
+            seed=options.get("seed", DEFAULT_SEED),
+            trips=options.get("trips", 0),
+            bookings=options.get("bookings", 0),
+            admins=options.get("admins", 0),
+        )
+        print(f"\nSeeded {scenario.counts()} into {namespace} in {scenario.seconds:.2f}s")
+    else:
+        scenario = SeededScenario(namespace, DEFAULT_SEED)
+    
+    yield scenario
+    
+    if not marker and not scenario.tagged_writes:
+        return
+    removed = seeder.teardown(namespace)
+    if not seeder.can_remove_bookings:
+        print(f"\nRemoved {removed['trips']} seeded trips "
+              f"(bookings tagged {scenario.tag} need --seed-backend=mongo to be removed)")
+
+@pytest.fixture(scope="session")
+def visual(request):
+    """
+    Compares screenshots with the approved baselines in a process pool.
+    Screenshots, diffs and verdicts go to results/<run id>/visual/.
+    """
+    config = request.config
+    differ = VisualDiffer(
+        config.getoption("--visual-baselines"),
+        os.path.join(config.getoption("--results-dir"), current_run_id(), VISUAL_DIR),
+        threshold=config.getoption("--visual-threshold"),
+        max_diff_pct=config.getoption("--visual-max-diff"),
+    )
+    yield differ
+    differ.close()
+
+class Reruns:
+    """
+    Runs a failed test again straight away, in the same worker: it gets the
+    warm browser it just returned to the pool, and the session's services,
+    admin login and seeded data are still there.
+
+    - on a remote backend, a test whose Grid node failed under it gets up
+      to ``node_retries`` more attempts, in a new session
+    - any other failure gets up to ``reruns`` more attempts; a test that
+      passes on one is flaky (see ``TestHistory.flakiness``)
+
+    Only the reports of the last attempt are logged. They carry the number
+    of reruns, the seconds spent on them and why the earlier attempts failed.
+    """
+
+    def __init__(self, reruns, node_retries):
+        self.reruns = reruns
+        self.node_retries = node_retries
+        self.rerun_tests = 0
+        self.attempts = 0
+        self.seconds = 0.0
+        self.flaky = []
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+        discarded = []
+        node_retries = reruns = 0
+        while True:
+            reports = runtestprotocol(item, nextitem=nextitem, log=False)
+            if not any(r.failed for r in reports):
+                break
+            if any(getattr(r, "node_failure", False) for r in reports) and node_retries < self.node_retries:
+                node_retries += 1
+                print(f"\n⚠ Grid node failed during {item.nodeid}; retrying in a new session")
+            elif reruns < self.reruns:
+                reruns += 1
+                print(f"\n↻ {item.nodeid} failed; rerun {reruns} of {self.reruns}")
+            else:
+                break
+            discarded.append(reports)
+        
+        seconds = sum(r.duration for attempt in discarded for r in attempt)
+        messages = [str(r.longrepr).strip().splitlines()[-1] for attempt in discarded for r in attempt if r.failed]
+        if discarded:
+            self.rerun_tests += 1
+            self.attempts += len(discarded)
+            self.seconds += seconds
+            if not any(r.failed for r in reports):
+                self.flaky.append(item.nodeid)
+        for report in reports:
+            report.reruns = len(discarded)
+            report.rerun_seconds = seconds
+            report.rerun_messages = messages
+            item.ihook.pytest_runtest_logreport(report=report)
+        item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+        return True
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        report = outcome.get_result()
+        report.node_failure = bool(call.excinfo) and is_node_failure(call.excinfo.value)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.rerun_tests:
+            return
+        terminalreporter.write_sep("-", "reruns")
+        terminalreporter.write_line(
+            f"{self.rerun_tests} test(s) rerun {self.attempts} time(s) in this worker, "
+            f"{self.seconds:.1f}s spent on the failed attempts"
+        )
+        for nodeid in self.flaky:
+            terminalreporter.write_line(f"  flaky (passed on a rerun): {nodeid}")
+
+def capture_artifacts(store, item, since):
+    """Screenshot, DOM, console and requests of a failed (or sampled) browser test"""
+    driver = item.funcargs.get("driver")
+    if driver is None:
+        return []
+    network = item.funcargs.get("_network_capture")
+    with profile_span("artifacts", "capture"):
+        return store.capture(driver, since, network.records() if network else None)
+
 def pytest_configure(config):
-    """Configure pytest with custom markers"""
+    """Configure pytest with custom markers, the test history, the results stream and reruns"""
+    history = TestHistory(config.getoption("--history-file"))
+    config.pluginmanager.register(HistoryRecorder(history), "opalumpus-history")
+    if not config.getoption("collectonly"):
+        store = ArtifactStore(config.getoption("--results-dir"))
+        rate = config.getoption("--artifacts-sample")
+        config.pluginmanager.register(
+            ResultStream(
+                config.getoption("--results-dir"), current_run_id(), worker_id(),
+                capture=lambda item, since: capture_artifacts(store, item, since),
+                sample=lambda nodeid: sampled(current_run_id(), nodeid, rate),
+            ),
+            "opalumpus-results",
+        )
+    node_retries = config.getoption("--node-retries") if config.getoption("--driver-backend") == "remote" else 0
+    if config.getoption("--reruns") or node_retries:
+        config.pluginmanager.register(Reruns(config.getoption("--reruns"), node_retries), "opalumpus-reruns")
+    if not config.getoption("--no-profile") and not config.getoption("collectonly"):
+        Profiler(worker_id()).start()
+
     config.addinivalue_line(
         "markers", "smoke: mark test as smoke test"
     )
@@ -81,3 +746,139 @@ def pytest_configure(config):
     config.addinivalue_line(
         "markers", "critical: mark test as critical functionality"
     )
+    config.addinivalue_line(
+        "markers", "fresh_driver: run test in a dedicated browser instead of a pooled one"
+    )
+    config.addinivalue_line(
+        "markers", "performance: performance budget checks (run after all other tests)"
+    )
+    config.addinivalue_line(
+        "markers", "clean_session: sign in through the form instead of restoring the cached admin session"
+    )
+    config.addinivalue_line(
+        "markers", "seed(trips=0, bookings=0, admins=0, seed=1337): synthetic data for the seeded_data fixture"
+    )
+    config.addinivalue_line(
+        "markers", "visual: screenshot comparisons with the approved baselines"
+    )
+
+def pytest_collection_modifyitems(session, config, items):
+    """
+    With --changed-only, drop tests unrelated to the changed files, and
+    with --quarantine skip/only the flaky ones or all others. Run recently
+    failed and critical tests first (--order=history) and budget checks
+    last, once every page timing has been captured.
+    """
+    history = config.pluginmanager.get_plugin("opalumpus-history").history
+    if config.getoption("--changed-only"):
+        files = changed_files(config.getoption("--changed-base"))
+        selected, deselected = select_changed(history, items, files)
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = selected
+        print(f"\n{len(files)} changed files since {config.getoption('--changed-base')}: "
+              f"running {len(selected)} of {len(selected) + len(deselected)} tests")
+    
+    mode = config.getoption("--quarantine")
+    if mode != "run":
+        threshold = config.getoption("--flaky-threshold")
+        quarantined, other = split_quarantined(history, items, threshold)
+        selected, deselected = (quarantined, other) if mode == "only" else (other, quarantined)
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = selected
+        print(f"\n{len(quarantined)} quarantined test(s) (flakiness >= {threshold:g})"
+              + ("" if mode == "only" else ", left for the quarantine stage"))
+        # run_parallel reads the node ids from the --collect-only output
+        if not config.getoption("collectonly"):
+            for item in quarantined:
+                print(f"  {history.flakiness(item.nodeid):.2f} {item.nodeid}")
+    
+    def key(item):
+        performance = item.get_closest_marker("performance") is not None
+        if config.getoption("--order") == "file":
+            return performance
+        critical = item.get_closest_marker("critical") is not None
+        return performance, order_key(history, item.nodeid, critical)
+    
+    items.sort(key=key)
+
+
+def pytest_unconfigure(config):
+    profiler = active_profiler()
+    if profiler:
+        profiler.stop()
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    """Time every test as a whole and mark its spans with the test id"""
+    profiler = active_profiler()
+    if profiler is None:
+        yield
+        return
+    profiler.current_test = item.nodeid
+    with profiler.span("test", item.nodeid):
+        yield
+    profiler.current_test = None
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_setup(item):
+    with profile_span("phase", "setup"):
+        yield
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    with profile_span("phase", "call"):
+        yield
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item, nextitem):
+    profiler = active_profiler()
+    with profile_span("phase", "teardown"):
+        if profiler:
+            profiler.mark()
+        yield
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    with profile_span("fixture", f"{fixturedef.argname} setup"):
+        yield
+
+def pytest_fixture_post_finalizer(fixturedef, request):
+    profiler = active_profiler()
+    if profiler:
+        profiler.fixture_finished(fixturedef.argname)
+
+def pytest_sessionstart(session):
+    """Drop old runs' results and artifacts; run_tests.py does it before starting parallel workers"""
+    config = session.config
+    if config.getoption("collectonly") or os.getenv(WORKER_COUNT_ENV):
+        return
+    runs, deleted, freed = prune(config.getoption("--results-dir"), config.getoption("--keep-runs"),
+                                 config.getoption("--artifacts-max-mb"), config.getoption("--perf-dir"))
+    if runs or deleted:
+        print(f"\nPruned {runs} old run(s) and {deleted} artifact(s) ({freed / 1024 / 1024:.1f} MB)")
+
+def pytest_sessionfinish(session, exitstatus):
+    """Write this worker's trace and the folded stacks of everything traced so far"""
+    if exitstatus == pytest.ExitCode.NO_TESTS_COLLECTED and session.config.getoption("--quarantine") == "only":
+        # Nothing is quarantined; the quarantine stage has nothing to do
+        session.exitstatus = pytest.ExitCode.OK
+    profiler = active_profiler()
+    # Unit tests only: nothing worth a flame graph
+    if profiler is None or not any("driver" in getattr(item, "fixturenames", ()) for item in session.items):
+        return
+    perf_dir = session.config.getoption("--perf-dir")
+    path = profiler.write(os.path.join(perf_dir, f"{current_run_id()}-trace-w{worker_id()}.json"))
+    if path:
+        events = load_traces(trace_paths(perf_dir, current_run_id()))
+        folded = write_folded(events, os.path.join(perf_dir, f"{current_run_id()}-trace.folded"))
+        print(f"\nSuite profile written to {path} (flame graph: {folded})")
+        print(format_summary(summarize(profiler.events)))
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_summary(prefix, summary, postfix, session):
+    """Suite profile tables at the end of the report summary"""
+    traces = trace_paths(session.config.getoption("--perf-dir"), current_run_id())
+    if active_profiler() and traces:
+        postfix.append(summary_html(summarize(load_traces(traces)), [t.name for t in traces]))
@@ -0,0 +1,11 @@
+"""
+Support code for the Opalumpus Selenium test suite.
+
+The modules in this package are wired into pytest through ``conftest.py``;
+test modules should normally only need the fixtures, not these internals.
+
+``artifacts``, ``bench``, ``grid``, ``parallel``, ``profiling``,
+``results``, ``selection`` and ``services`` use only the standard library:
+``run_tests.py`` and ``benchmark.py`` import them before the virtual
+environment exists. Keep them that way.
+"""
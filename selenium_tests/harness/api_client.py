@@ -0,0 +1,228 @@
+"""
+Pooled, keep-alive HTTP client for the Opalumpus Express API.
+
+Every API call made by the suite (health checks, load tests, data seeding)
+goes through ``ApiClient`` so that
+
+- TCP connections are reused through one ``requests.Session`` with a
+  connection pool sized for the expected concurrency
+- connection failures while the backend is still starting are retried with
+  exponential backoff
+- every call is timed per route (``GET /api/trips``,
+  ``PUT /api/trips/:id``, ...) in one place, from sending the request to
+  the downloaded body; retries are counted separately so a retried call's
+  backoff does not show up as one slow sample
+- the trip and booking payloads are checked against the Mongoose schemas
+"""
+
+import re
+import statistics
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = 10
+
+# MongoDB ObjectIds in paths are folded so timings aggregate per route
+_OBJECT_ID = re.compile(r"/[0-9a-fA-F]{24}(?=/|$)")
+
+TRIP_FIELDS = {"destination": str, "duration": str, "price": (int, float), "description": str}
+BOOKING_FIELDS = {"userName": str, "userEmail": str, "numberOfPeople": (int, float)}
+
+
+class SchemaError(AssertionError):
+    """An API payload does not match the backend's schema"""
+
+
+def _check_fields(kind, payload, fields):
+    if not isinstance(payload, dict):
+        raise SchemaError(f"{kind} should be an object, got {type(payload).__name__}")
+    for name, expected in fields.items():
+        if name not in payload:
+            raise SchemaError(f"{kind} is missing '{name}': {payload}")
+        if not isinstance(payload[name], expected):
+            raise SchemaError(f"{kind} field '{name}' has unexpected type: {payload[name]!r}")
+    return payload
+
+
+def validate_trip(trip):
+    """Check a trip document returned by the API (tripModels.js)"""
+    _check_fields("Trip", trip, dict(TRIP_FIELDS, _id=str))
+    return trip
+
+
+def validate_booking(booking):
+    """Check a booking document returned by the API (userModel.js)"""
+    _check_fields("Booking", booking, dict(BOOKING_FIELDS, _id=str))
+    return booking
+
+
+def route_key(method, url):
+    """``GET http://host/api/trips/65a...`` -> ``GET /api/trips/:id``"""
+    path = re.sub(r"^[a-z]+://[^/]+", "", url).split("?")[0] or "/"
+    return f"{method.upper()} {_OBJECT_ID.sub('/:id', path)}"
+
+
+class RouteTimings:
+    """Thread-safe latency samples (seconds) and retry counts per route"""
+
+    def __init__(self):
+        self._samples = {}
+        self._retries = {}
+        self._lock = threading.Lock()
+
+    def add(self, route, seconds, retries=0):
+        """Calls that were retried only count their retries, not their time"""
+        with self._lock:
+            self._samples.setdefault(route, [])
+            self._retries.setdefault(route, [0, 0])
+            if retries:
+                self._retries[route][0] += 1
+                self._retries[route][1] += retries
+            else:
+                self._samples[route].append(seconds)
+
+    def summary(self):
+        """Count, mean and p95 (ms) of the calls sent once, and retries, per route"""
+        with self._lock:
+            samples = {route: sorted(values) for route, values in self._samples.items()}
+            retries = {route: tuple(counts) for route, counts in self._retries.items()}
+        summary = {}
+        for route, values in samples.items():
+            retried, total = retries[route]
+            summary[route] = {
+                "count": len(values) + retried,
+                "mean_ms": statistics.mean(values) * 1000 if values else None,
+                "p95_ms": values[max(0, int(round(0.95 * len(values))) - 1)] * 1000 if values else None,
+                "retried": retried,
+                "retries": total,
+            }
+        return summary
+
+
+def retry_count(response):
+    """How many times urllib3 retried the request behind ``response``"""
+    retries = getattr(response.raw, "retries", None)
+    return len(getattr(retries, "history", None) or ())
+
+
+class ApiClient:
+    """Session-backed client with pooling, retries, timing and JSON helpers"""
+
+    def __init__(self, base_url, pool_size=20, retries=3, backoff=0.5, timeout=DEFAULT_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.timings = RouteTimings()
+        self._listeners = []
+
+        # Connection errors are retried for every method (the request never
+        # reached the server); status-based retries only for idempotent ones.
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def add_timing_listener(self, listener):
+        """Call ``listener(route, seconds, response)`` for every response"""
+        self._listeners.append(listener)
+
+    def remove_timing_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _record(self, response, seconds):
+        route = route_key(response.request.method, response.request.url)
+        self.timings.add(route, seconds, retry_count(response))
+        for listener in self._listeners:
+            listener(route, seconds, response)
+
+    def request(self, method, path, **kwargs):
+        """Send a request to ``path`` (relative to the API base URL)"""
+        kwargs.setdefault("timeout", self.timeout)
+        # response.elapsed stops at the headers and spans every retry, so
+        # the whole call is timed here instead
+        started = time.perf_counter()
+        response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+        self._record(response, time.perf_counter() - started)
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    # JSON helpers for the trip, booking and admin endpoints
+
+    def health(self):
+        """True if ``GET /`` answers with the API banner"""
+        response = self.get("/")
+        return response.status_code == 200 and "API Working" in response.text
+
+    def list_trips(self):
+        response = self.get("/api/trips")
+        response.raise_for_status()
+        trips = response.json().get("trips")
+        if not isinstance(trips, list):
+            raise SchemaError(f"GET /api/trips should return a 'trips' list: {response.text[:200]}")
+        return [validate_trip(trip) for trip in trips]
+
+    def add_trip(self, destination, duration, price, description):
+        body = self.post("/api/trips/add", json={
+            "destination": destination,
+            "duration": duration,
+            "price": price,
+            "description": description,
+        }).json()
+        if not body.get("success"):
+            raise SchemaError(f"Trip was not added: {body}")
+        return validate_trip(body["trip"])
+
+    def update_trip(self, trip_id, **fields):
+        response = self.put(f"/api/trips/{trip_id}", json=fields)
+        response.raise_for_status()
+        return validate_trip(response.json())
+
+    def delete_trip(self, trip_id):
+        response = self.delete(f"/api/trips/{trip_id}")
+        response.raise_for_status()
+        return response.json()
+
+    def book(self, name, email, people, notes=""):
+        payload = {
+            "userName": name,
+            "userEmail": email,
+            "numberOfPeople": people,
+            "additionalNotes": notes,
+        }
+        body = self.post("/api/booknow", json=payload).json()
+        if not body.get("success"):
+            raise SchemaError(f"Booking was not added: {body}")
+        # The backend returns the saved document under this (misspelt) key
+        return validate_booking(body["boookingData"])
+
+    def admin_signin(self, username, password):
+        """True if the credentials are accepted"""
+        response = self.post("/admin-signin", json={"username": username, "password": password})
+        return response.status_code == 200 and response.json().get("message") == "OK"
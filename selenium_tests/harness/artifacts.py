@@ -0,0 +1,213 @@
+"""
+Failure artifacts in a content-addressed store.
+
+When a browser test fails (or passes and is picked by ``--artifacts-sample``)
+the results stream (``harness/results.py``) asks for:
+
+- a screenshot of the page
+- the DOM as it was at that moment (``page_source``)
+- the browser console since the test started
+- the requests the test's pages made so far (``NetworkCapture.records``)
+
+Every artifact is stored once under the SHA-256 of its content, at
+``results/artifacts/<2 hex>/<sha256>.<ext>``: the same screenshot or DOM of
+a page that fails the same way in many tests, workers or builds takes the
+space of one. Text artifacts are gzipped (``.gz``); screenshots are PNG,
+which is compressed already. The stream records the paths, so report.html
+links them.
+
+Nothing happens for passing tests beyond deciding whether to sample them.
+
+``prune`` keeps the results directory bounded across builds: it keeps the
+newest ``keep_runs`` runs (and fewer if their artifacts exceed ``max_mb``)
+and deletes every artifact no remaining stream refers to. Given the perf
+directory, it also keeps only the page timings and suite profiles of the
+newest ``keep_runs`` runs there; ``baseline.json`` is never touched.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+from harness.results import read_tests
+
+ARTIFACTS_DIR = "artifacts"
+
+DEFAULT_KEEP_RUNS = 20
+DEFAULT_MAX_MB = 500
+
+# Per-run files in the perf directory: page timings (<run>-w<N>.json),
+# traces (<run>-trace-w<N>.json) and folded stacks (<run>-trace.folded)
+_PERF_FILE = re.compile(r"^(?P<run>.+?)(?:-trace)?(?:-w\d+\.json|\.folded)$")
+
+# kind: (extension, gzip)
+KINDS = {
+    "screenshot": ("png", False),
+    "dom": ("html", True),
+    "console": ("log", True),
+    "network": ("json", True),
+}
+
+
+def enable_console_logging(options):
+    """Ask ChromeDriver to keep the browser console in the ``browser`` log"""
+    prefs = dict(options.capabilities.get("goog:loggingPrefs", {}), browser="ALL")
+    options.set_capability("goog:loggingPrefs", prefs)
+
+
+def sampled(run_id, nodeid, rate):
+    """Whether a passing test's artifacts are kept: about ``rate`` of the tests, different ones every run"""
+    if rate <= 0:
+        return False
+    return zlib.crc32(f"{run_id}:{nodeid}".encode("utf-8")) / 2 ** 32 < rate
+
+
+def _console_text(entries, since):
+    lines = []
+    for entry in entries:
+        if entry.get("timestamp", 0) < since * 1000:
+            continue  # logged by an earlier test in the same browser
+        stamp = datetime.fromtimestamp(entry["timestamp"] / 1000).isoformat(timespec="milliseconds")
+        lines.append(f"{stamp} {entry.get('level', ''):8} {entry.get('message', '')}\n")
+    return "".join(lines)
+
+
+class ArtifactStore:
+    """Content-addressed, compressed artifact files under ``results_dir``"""
+
+    def __init__(self, results_dir):
+        self.results_dir = Path(results_dir)
+        self.stored = 0
+        self.reused = 0
+
+    def put(self, kind, data):
+        """Store ``data`` (bytes) of ``kind``; returns its path relative to the results directory"""
+        extension, compress = KINDS[kind]
+        digest = hashlib.sha256(data).hexdigest()
+        relative = Path(ARTIFACTS_DIR, digest[:2], f"{digest}.{extension}{'.gz' if compress else ''}")
+        path = self.results_dir / relative
+        if path.exists():
+            self.reused += 1
+            return relative.as_posix()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        content = gzip.compress(data, mtime=0) if compress else data
+        # Workers may store the same object at the same time; os.replace is atomic
+        fd, temp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(temp, path)
+        self.stored += 1
+        return relative.as_posix()
+
+    def read(self, relative):
+        """Content of a stored artifact, decompressed"""
+        data = (self.results_dir / relative).read_bytes()
+        return gzip.decompress(data) if relative.endswith(".gz") else data
+
+    def capture(self, driver, since, network=None):
+        """
+        Store what ``driver`` shows, its console since ``since`` (epoch
+        seconds) and the ``network`` records; returns ``[{"kind", "path"}]``.
+        Best effort: the browser may be the reason the test failed.
+        """
+        artifacts = []
+        for kind, read in (
+            ("screenshot", driver.get_screenshot_as_png),
+            ("dom", lambda: driver.page_source.encode("utf-8")),
+            ("console", lambda: _console_text(driver.get_log("browser"), since).encode("utf-8")),
+            ("network", lambda: json.dumps(network, indent=1).encode("utf-8") if network else b""),
+        ):
+            # Any WebDriver (or connection) error only means there is nothing to keep
+            try:
+                data = read()
+            except Exception:
+                continue
+            if data:
+                artifacts.append({"kind": kind, "path": self.put(kind, data)})
+        return artifacts
+
+
+def _runs(results_dir):
+    """``{run_id: [stream paths]}``, newest run first"""
+    runs = {}
+    for path in Path(results_dir).glob("*-w*.jsonl"):
+        runs.setdefault(path.name.rsplit("-w", 1)[0], []).append(path)
+    return dict(sorted(runs.items(), key=lambda run: -max(p.stat().st_mtime for p in run[1])))
+
+
+def _perf_runs(perf_dir):
+    """``{run_id: [per-run files]}`` of the perf directory, newest run first"""
+    runs = {}
+    for path in Path(perf_dir).glob("*"):
+        match = _PERF_FILE.match(path.name)
+        if match and path.is_file():
+            runs.setdefault(match.group("run"), []).append(path)
+    return dict(sorted(runs.items(), key=lambda run: -max(p.stat().st_mtime for p in run[1])))
+
+
+def _references(paths):
+    return {artifact["path"] for event in read_tests(paths) for artifact in event.get("artifacts", [])}
+
+
+def _prune_perf(perf_dir, keep_runs):
+    """Delete the per-run files of all but the newest ``keep_runs`` runs; returns (run ids, bytes)"""
+    dropped, freed = [], 0
+    for run_id, paths in list(_perf_runs(perf_dir).items())[max(1, keep_runs):]:
+        for path in paths:
+            freed += path.stat().st_size
+            path.unlink(missing_ok=True)
+        dropped.append(run_id)
+    return dropped, freed
+
+
+def prune(results_dir, keep_runs=DEFAULT_KEEP_RUNS, max_mb=DEFAULT_MAX_MB, perf_dir=None):
+    """
+    Drop the streams of all but the newest ``keep_runs`` runs, then of the
+    oldest remaining runs while the artifacts they refer to exceed
+    ``max_mb``, and delete the artifacts nothing refers to any more. With
+    ``perf_dir``, the per-run files there are pruned to ``keep_runs`` runs.
+    Returns (runs dropped, artifacts deleted, bytes freed).
+    """
+    perf_dropped, perf_freed = _prune_perf(perf_dir, keep_runs) if perf_dir else ([], 0)
+    results_dir = Path(results_dir)
+    store = results_dir / ARTIFACTS_DIR
+    runs = _runs(results_dir)
+    if not runs:
+        return len(perf_dropped), 0, perf_freed
+    sizes = {path.relative_to(results_dir).as_posix(): path.stat().st_size
+             for path in store.glob("*/*") if path.is_file()} if store.exists() else {}
+
+    kept = list(runs)[:max(1, keep_runs)]
+    references = {run_id: _references(runs[run_id]) for run_id in kept}
+
+    def referenced_bytes():
+        paths = set().union(*references.values())
+        return sum(sizes.get(path, 0) for path in paths)
+
+    # The newest run always stays, whatever its size
+    while len(kept) > 1 and referenced_bytes() > max_mb * 1024 * 1024:
+        references.pop(kept.pop())
+
+    dropped = [run_id for run_id in runs if run_id not in kept]
+    for run_id in dropped:
+        for path in runs[run_id]:
+            path.unlink(missing_ok=True)
+        # Files a run keeps next to its streams
+        shutil.rmtree(results_dir / run_id, ignore_errors=True)
+
+    live = set().union(*references.values())
+    deleted, freed = 0, perf_freed
+    for path, size in sizes.items():
+        if path not in live:
+            (results_dir / path).unlink(missing_ok=True)
+            deleted += 1
+            freed += size
+    return len(set(dropped) | set(perf_dropped)), deleted, freed
@@ -0,0 +1,213 @@
+"""
+Shared authenticated browser state for admin tests.
+
+The admin pages (``/trip-form``) only check that the SPA's localStorage
+holds ``admin=true``, which SignIn.jsx stores after a successful
+``POST /admin-signin``. Instead of typing into the sign-in form in every
+test, ``AuthCache`` logs in once per worker and keeps a ``BrowserState``
+snapshot (cookies, localStorage, sessionStorage) that ``restore_state``
+puts into any driver without loading a page:
+
+- cookies with ``Network.setCookies``
+- web storage with a script registered through
+  ``Page.addScriptToEvaluateOnNewDocument`` that fills the storage of the
+  snapshot's origin before the app starts. It runs once per restore, so a
+  test that logs out stays logged out.
+
+Logging in:
+
+- ``api``: ``POST /admin-signin`` checks the credentials and the state is
+  what SignIn.jsx stores on success. No browser is needed.
+- ``ui``: the sign-in form is filled in a pooled browser and the browser
+  is snapshotted after the redirect to ``/trip-form``.
+"""
+
+import json
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+from selenium.common.exceptions import NoAlertPresentException
+from selenium.webdriver.support import expected_conditions as EC
+
+from harness.pages import SignInPage
+from harness.waits import wait_for, wait_until_ready
+
+LOGIN_METHODS = ("api", "ui")
+
+# What SignIn.jsx keeps after a successful login
+ADMIN_STORAGE = {"admin": "true"}
+
+_RESTORED_FLAG = "__opalumpusRestored"
+
+_RESTORE_HOOK = """
+(function (origin, token, local, session) {
+    if (window.location.origin !== origin) { return; }
+    try {
+        if (sessionStorage.getItem(%(flag)s) === token) { return; }
+        sessionStorage.setItem(%(flag)s, token);
+        Object.keys(local).forEach(function (key) { localStorage.setItem(key, local[key]); });
+        Object.keys(session).forEach(function (key) { sessionStorage.setItem(key, session[key]); });
+    } catch (e) {}
+})(%(args)s);
+"""
+
+_STORAGE_SCRIPT = """
+function copy(storage, skip) {
+    var items = {};
+    for (var i = 0; i < storage.length; i++) {
+        var key = storage.key(i);
+        if (key !== skip) { items[key] = storage.getItem(key); }
+    }
+    return items;
+}
+return {
+    origin: window.location.origin,
+    local: copy(window.localStorage),
+    session: copy(window.sessionStorage, arguments[0])
+};
+"""
+
+
+class AuthError(Exception):
+    """The credentials were rejected or the login did not complete"""
+
+
+def origin_of(url):
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+class BrowserState:
+    """What a logged-in browser holds for one origin"""
+
+    def __init__(self, origin, cookies=(), local_storage=None, session_storage=None):
+        self.origin = origin
+        self.cookies = list(cookies)
+        self.local_storage = dict(local_storage or {})
+        self.session_storage = dict(session_storage or {})
+
+    def __repr__(self):
+        return (f"BrowserState({self.origin}, {len(self.cookies)} cookies, "
+                f"localStorage={sorted(self.local_storage)})")
+
+
+def capture_state(driver):
+    """Snapshot the cookies and web storage of the page ``driver`` shows"""
+    storage = driver.execute_script(_STORAGE_SCRIPT, _RESTORED_FLAG)
+    return BrowserState(storage["origin"], driver.get_cookies(), storage["local"], storage["session"])
+
+
+def _cdp_cookie(cookie, origin):
+    converted = {
+        "name": cookie["name"],
+        "value": cookie["value"],
+        "path": cookie.get("path", "/"),
+        "secure": cookie.get("secure", False),
+        "httpOnly": cookie.get("httpOnly", False),
+    }
+    if cookie.get("domain"):
+        converted["domain"] = cookie["domain"]
+    else:
+        converted["url"] = origin
+    if cookie.get("sameSite"):
+        converted["sameSite"] = cookie["sameSite"]
+    if cookie.get("expiry"):
+        converted["expires"] = cookie["expiry"]
+    return converted
+
+
+def restore_state(driver, state):
+    """
+    Give ``driver`` the logged-in state from the next page load on.
+    Returns the identifier of the storage script for ``clear_restore``.
+    """
+    if state.cookies:
+        driver.execute_cdp_cmd("Network.setCookies", {
+            "cookies": [_cdp_cookie(cookie, state.origin) for cookie in state.cookies],
+        })
+    args = ", ".join(json.dumps(value) for value in (
+        state.origin, uuid.uuid4().hex, state.local_storage, state.session_storage,
+    ))
+    source = _RESTORE_HOOK % {"flag": json.dumps(_RESTORED_FLAG), "args": args}
+    return driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": source})["identifier"]
+
+
+def clear_restore(driver, identifier):
+    """Stop restoring the state into new documents (cookies are reset by the pool)"""
+    driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": identifier})
+
+
+def login_through_form(driver, base_url, username, password):
+    """Sign in with the /admin-signin form and wait for the admin panel"""
+    SignInPage(driver, base_url).open().submit(username, password)
+
+    wait_for(driver, EC.any_of(EC.alert_is_present(), EC.url_contains("/trip-form")),
+             message="sign-in neither redirected nor alerted")
+    try:
+        alert = driver.switch_to.alert
+        text = alert.text
+        alert.accept()
+        raise AuthError(f"Sign-in as {username!r} failed: {text}")
+    except NoAlertPresentException:
+        pass
+    wait_until_ready(driver, "/trip-form")
+
+
+def api_login(api_client, base_url):
+    """Login function checking the credentials with POST /admin-signin"""
+
+    def login(username, password):
+        if not api_client.admin_signin(username, password):
+            raise AuthError(f"POST /admin-signin rejected {username!r}")
+        return BrowserState(origin_of(base_url), local_storage=ADMIN_STORAGE)
+
+    return login
+
+
+def ui_login(driver_pool, base_url):
+    """Login function going through the sign-in form in a pooled browser"""
+
+    def login(username, password):
+        driver = driver_pool.acquire()
+        try:
+            login_through_form(driver, base_url, username, password)
+            return capture_state(driver)
+        finally:
+            driver_pool.release(driver)
+
+    return login
+
+
+class AuthCache:
+    """
+    Logs in once per user and hands out the resulting ``BrowserState``.
+    A failed login is remembered too, so it is not retried by every test.
+    """
+
+    def __init__(self, login):
+        self._login = login
+        self._states = {}
+        self._lock = threading.Lock()
+        self.logins = 0
+        self.login_seconds = 0.0
+
+    def state(self, username, password):
+        with self._lock:
+            if username not in self._states:
+                started = time.perf_counter()
+                try:
+                    self._states[username] = self._login(username, password)
+                except AuthError as e:
+                    self._states[username] = e
+                self.logins += 1
+                self.login_seconds += time.perf_counter() - started
+            state = self._states[username]
+        if isinstance(state, AuthError):
+            raise state
+        return state
+
+    def clear(self):
+        with self._lock:
+            self._states = {}
@@ -0,0 +1,298 @@
+"""
+Benchmarks of the harness itself, their history and comparisons.
+
+``benchmark.py`` times the harness's own costs: starting and resetting a
+browser, navigating and waiting for a page, a ``find_element`` round trip,
+an API call (micro-benchmarks, against ``StaticSite``, a local server with
+canned responses so that only the harness is measured), and whole suite
+runs (macro-benchmarks). Every run appends one line to the history file,
+``bench_results/history.jsonl``, with every sample in seconds::
+
+    {"time": "...", "commit": "3f2c1ab", "dirty": false, "host": "...",
+     "label": "...", "benchmarks": {"driver.get": [0.031, 0.029, ...], ...}}
+
+``compare`` tells two runs apart per benchmark with a two-sided
+Mann-Whitney U test: timings are skewed and have outliers, so the test
+ranks the samples instead of assuming a normal distribution. A change
+counts when it is significant (p below ``alpha``) and at least
+``min_change_pct`` of the old median, so a tiny but consistent difference
+is not reported as a regression.
+"""
+
+import json
+import math
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+DEFAULT_HISTORY_FILE = "bench_results/history.jsonl"
+
+DEFAULT_ALPHA = 0.05
+DEFAULT_MIN_CHANGE_PCT = 5.0
+
+# Fewer samples cannot show a significant difference at alpha 0.05
+MIN_SAMPLES = 4
+
+_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Opalumpus benchmark page</title>
+<style>body { font-family: sans-serif; } .card { display: inline-block; width: 200px; margin: 4px; }</style>
+</head><body><div id="root"><h1 id="target">Benchmark</h1>CARDS</div></body></html>
+"""
+
+_TRIPS = [
+    {"_id": f"{index:024x}", "destination": f"Destination {index}", "duration": "5 days",
+     "price": 500 + index, "description": "A trip served by the benchmark server"}
+    for index in range(20)
+]
+
+
+class _StaticHandler(BaseHTTPRequestHandler):
+    # Keep-alive, as the pooled API client expects; headers and body are
+    # separate writes, which Nagle's algorithm would hold back for 40 ms
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    routes = {}
+
+    def do_GET(self):
+        content_type, body = self.routes.get(self.path.split("?")[0], (None, None))
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StaticSite:
+    """
+    Local HTTP server with a fixed page (``/``, rendered like the SPA: a
+    ``#root`` with content) and a fixed ``/api/trips`` response.
+    """
+
+    def __init__(self, port=0):
+        cards = "".join(f'<div class="card">{trip["destination"]}</div>' for trip in _TRIPS)
+        routes = {
+            "/": ("text/html; charset=utf-8", _PAGE.replace("CARDS", cards).encode("utf-8")),
+            "/api/trips": ("application/json", json.dumps({"trips": _TRIPS}).encode("utf-8")),
+        }
+        handler = type("StaticHandler", (_StaticHandler,), {"routes": routes})
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def measure(action, repeat, warmup=0, setup=None):
+    """
+    Seconds of ``repeat`` calls of ``action`` after ``warmup`` unmeasured
+    ones; ``setup`` runs untimed before each call.
+    """
+    samples = []
+    for index in range(warmup + repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        action()
+        elapsed = time.perf_counter() - started
+        if index >= warmup:
+            samples.append(elapsed)
+    return samples
+
+
+def git_commit():
+    """(short commit, whether the tree has uncommitted changes), or (None, False) outside git"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return commit, dirty
+
+
+class BenchHistory:
+    """The runs in a history file, oldest first"""
+
+    def __init__(self, path=DEFAULT_HISTORY_FILE):
+        self.path = Path(path)
+        self.runs = []
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                self.runs = [json.loads(line) for line in f if line.strip()]
+
+    def append(self, benchmarks, label=""):
+        """Record a run's ``{name: [seconds]}``; returns the entry"""
+        commit, dirty = git_commit()
+        entry = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "commit": commit,
+            "dirty": dirty,
+            "host": socket.gethostname(),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "label": label,
+            "benchmarks": benchmarks,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        self.runs.append(entry)
+        return entry
+
+    def find(self, ref):
+        """
+        The run ``ref`` names: an index (``-1`` is the newest), a label or
+        a commit; the newest match wins. None if there is none.
+        """
+        try:
+            return self.runs[int(ref)]
+        except IndexError:
+            return None
+        except ValueError:
+            pass
+        for run in reversed(self.runs):
+            if run.get("label") == ref or (run.get("commit") or "").startswith(ref):
+                return run
+        return None
+
+
+def describe(run):
+    commit = (run.get("commit") or "no commit") + ("+" if run.get("dirty") else "")
+    label = f" {run['label']}" if run.get("label") else ""
+    return f"{run['time']} {commit}{label}"
+
+
+def _normal_sf(z):
+    """P(Z > z) of the standard normal distribution"""
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def mann_whitney(before, after):
+    """
+    Two-sided Mann-Whitney U test: returns (U of ``after``, p-value), with
+    the normal approximation, tie correction and continuity correction.
+    """
+    n1, n2 = len(before), len(after)
+    values = sorted([(value, 0) for value in before] + [(value, 1) for value in after])
+    ranks = [0.0] * len(values)
+    ties = 0.0
+    start = 0
+    while start < len(values):
+        end = start
+        while end + 1 < len(values) and values[end + 1][0] == values[start][0]:
+            end += 1
+        for index in range(start, end + 1):
+            ranks[index] = (start + end) / 2 + 1
+        count = end - start + 1
+        ties += count ** 3 - count
+        start = end + 1
+
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, values) if group == 1)
+    u = rank_sum - n2 * (n2 + 1) / 2
+    mean = n1 * n2 / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return u, 1.0
+    z = (abs(u - mean) - 0.5) / math.sqrt(variance)
+    return u, min(1.0, 2 * _normal_sf(max(z, 0.0)))
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "median": statistics.median(ordered),
+        "mean": statistics.mean(ordered),
+        "stdev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "min": ordered[0],
+        "max": ordered[-1],
+    }
+
+
+def compare_runs(base, head, alpha=DEFAULT_ALPHA, min_change_pct=DEFAULT_MIN_CHANGE_PCT):
+    """
+    One row per benchmark of either run: medians, change of the median in
+    percent, p-value and the verdict ("slower", "faster", "no change",
+    "too few samples", "new" or "gone").
+    """
+    rows = []
+    names = list(base["benchmarks"]) + [n for n in head["benchmarks"] if n not in base["benchmarks"]]
+    for name in names:
+        before, after = base["benchmarks"].get(name), head["benchmarks"].get(name)
+        row = {"name": name, "base": None, "head": None, "change_pct": None, "p": None}
+        if before:
+            row["base"] = statistics.median(before)
+        if after:
+            row["head"] = statistics.median(after)
+        if not before or not after:
+            row["verdict"] = "new" if after else "gone"
+            rows.append(row)
+            continue
+        row["change_pct"] = (row["head"] - row["base"]) / row["base"] * 100 if row["base"] else 0.0
+        if min(len(before), len(after)) < MIN_SAMPLES:
+            row["verdict"] = "too few samples"
+        else:
+            row["p"] = mann_whitney(before, after)[1]
+            if row["p"] < alpha and abs(row["change_pct"]) >= min_change_pct:
+                row["verdict"] = "slower" if row["change_pct"] > 0 else "faster"
+            else:
+                row["verdict"] = "no change"
+        rows.append(row)
+    return rows
+
+
+def _seconds(value):
+    if value is None:
+        return "-"
+    return f"{value * 1000:.1f}ms" if value < 1 else f"{value:.2f}s"
+
+
+def format_comparison(rows):
+    """Text table of ``compare_runs`` output"""
+    width = max([len(row["name"]) for row in rows] + [9])
+    lines = [f"{'Benchmark':<{width}}  {'Base':>10}  {'Head':>10}  {'Change':>8}  {'p':>6}  Verdict"]
+    for row in rows:
+        change = "-" if row["change_pct"] is None else f"{row['change_pct']:+.1f}%"
+        p = "-" if row["p"] is None else f"{row['p']:.3f}"
+        lines.append(f"{row['name']:<{width}}  {_seconds(row['base']):>10}  {_seconds(row['head']):>10}  "
+                     f"{change:>8}  {p:>6}  {row['verdict']}")
+    return "\n".join(lines)
+
+
+def format_run(benchmarks):
+    """Text table of one run's ``{name: [seconds]}``"""
+    width = max([len(name) for name in benchmarks] + [9])
+    lines = [f"{'Benchmark':<{width}}  {'n':>3}  {'Median':>10}  {'Mean':>10}  {'Stdev':>10}  {'Min':>10}"]
+    for name, samples in benchmarks.items():
+        s = summarize(samples)
+        lines.append(f"{name:<{width}}  {s['n']:>3}  {_seconds(s['median']):>10}  {_seconds(s['mean']):>10}  "
+                     f"{_seconds(s['stdev']):>10}  {_seconds(s['min']):>10}")
+    return "\n".join(lines)
@@ -0,0 +1,188 @@
+"""
+Performance budgets and baseline regression checks.
+
+Budgets are declared per route in ``budgets.ini`` (next to ``pytest.ini``).
+For every route the median of all samples captured in the current run is
+compared against
+
+- the absolute budget (e.g. ``lcp_ms = 2500``), and
+- the baseline: the median of the same metric over the previous
+  ``baseline_runs`` runs, allowing ``max_regression_pct`` of slow-down.
+  Changes smaller than the metric's unit floor (``min_regression_ms``,
+  ``min_regression_kb``, ``min_regression_cls``, ``min_regression_requests``)
+  are noise and never count as a regression.
+
+The checks themselves run as ordinary tests (``test_performance_budgets.py``)
+so their results land in report.html and results.xml like any other test.
+"""
+
+import configparser
+import json
+import statistics
+from pathlib import Path
+
+BUDGET_FILE = Path(__file__).resolve().parent.parent / "budgets.ini"
+
+# budget name -> (sample field, divisor, unit)
+METRICS = {
+    "ttfb_ms": ("ttfb", 1, "ms"),
+    "dcl_ms": ("domContentLoaded", 1, "ms"),
+    "load_ms": ("load", 1, "ms"),
+    "fcp_ms": ("fcp", 1, "ms"),
+    "lcp_ms": ("lcp", 1, "ms"),
+    "cls": ("cls", 1, ""),
+    "transfer_kb": ("transferBytes", 1024, "KB"),
+    "image_kb": ("imageBytes", 1024, "KB"),
+    "requests": ("requestCount", 1, ""),
+}
+
+# budget name -> setting with the smallest change that counts as a regression
+REGRESSION_FLOORS = {
+    "ttfb_ms": "min_regression_ms",
+    "dcl_ms": "min_regression_ms",
+    "load_ms": "min_regression_ms",
+    "fcp_ms": "min_regression_ms",
+    "lcp_ms": "min_regression_ms",
+    "cls": "min_regression_cls",
+    "transfer_kb": "min_regression_kb",
+    "image_kb": "min_regression_kb",
+    "requests": "min_regression_requests",
+}
+
+
+class BudgetConfig:
+    """Parsed ``budgets.ini``"""
+
+    def __init__(self, path=BUDGET_FILE):
+        self.path = Path(path)
+        self._parser = configparser.ConfigParser()
+        self._parser.read(self.path)
+
+    @property
+    def mode(self):
+        return self._parser.get("settings", "mode", fallback="fail")
+
+    @property
+    def max_regression_pct(self):
+        return self._parser.getfloat("settings", "max_regression_pct", fallback=20.0)
+
+    def min_regression(self, metric):
+        """Smallest increase of ``metric`` (in its unit) that counts as a regression"""
+        return self._parser.getfloat("settings", REGRESSION_FLOORS[metric], fallback=0.0)
+
+    @property
+    def baseline_file(self):
+        path = Path(self._parser.get("settings", "baseline_file", fallback="perf_results/baseline.json"))
+        return path if path.is_absolute() else self.path.parent / path
+
+    @property
+    def baseline_runs(self):
+        return self._parser.getint("settings", "baseline_runs", fallback=10)
+
+    def routes(self):
+        """Routes that have their own budget section"""
+        return [s for s in self._parser.sections() if s.startswith("/")]
+
+    def budgets_for(self, route):
+        """Effective budgets for ``route``: defaults overlaid with its own section"""
+        budgets = {}
+        for section in ("default", route):
+            if self._parser.has_section(section):
+                for name, value in self._parser.items(section):
+                    if name in METRICS:
+                        budgets[name] = float(value)
+        return budgets
+
+
+def load_run_samples(perf_dir, run_id, profile=None):
+    """
+    All samples of ``run_id`` (every worker's file), grouped by route.
+    Only samples taken under emulation ``profile`` are included; the
+    default (None) selects the unthrottled ones the budgets are set for.
+    """
+    routes = {}
+    for path in sorted(Path(perf_dir).glob(f"{run_id}-w*.json")):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        for route, samples in data.get("routes", {}).items():
+            selected = [s for s in samples if s.get("profile") == profile]
+            if selected:
+                routes.setdefault(route, []).extend(selected)
+    return routes
+
+
+def metric_medians(samples):
+    """Median of every known metric over ``samples``, in budget units"""
+    medians = {}
+    for name, (field, divisor, _) in METRICS.items():
+        values = [s[field] / divisor for s in samples if s.get(field) is not None]
+        if values:
+            medians[name] = statistics.median(values)
+    return medians
+
+
+class Baseline:
+    """Rolling per-route medians of previous runs"""
+
+    def __init__(self, path, max_runs=10):
+        self.path = Path(path)
+        self.max_runs = max_runs
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.runs = json.load(f).get("runs", [])
+        except (OSError, ValueError):
+            self.runs = []
+
+    def median(self, route, metric):
+        """Baseline value for ``route``/``metric``, or None without history"""
+        values = [
+            run["routes"][route][metric]
+            for run in self.runs
+            if metric in run.get("routes", {}).get(route, {})
+        ]
+        return statistics.median(values) if values else None
+
+    def add_run(self, run_id, route_medians):
+        """Append a run's medians, dropping the oldest beyond ``max_runs``"""
+        self.runs = [r for r in self.runs if r.get("run_id") != run_id]
+        self.runs.append({"run_id": run_id, "routes": route_medians})
+        self.runs = self.runs[-self.max_runs:]
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"runs": self.runs}, f, indent=2)
+
+
+def check_route(route, samples, config, baseline):
+    """
+    Compare a route's medians with its budgets and the baseline.
+    Returns (medians, violations) where violations is a list of messages.
+    """
+    medians = metric_medians(samples)
+    violations = []
+
+    for name, limit in config.budgets_for(route).items():
+        value = medians.get(name)
+        if value is not None and value > limit:
+            unit = METRICS[name][2]
+            violations.append(
+                f"{route} {name}: median {value:.2f}{unit} exceeds budget {limit:g}{unit}"
+            )
+
+    for name, value in medians.items():
+        previous = baseline.median(route, name)
+        if not previous:
+            continue
+        unit = METRICS[name][2]
+        change_pct = (value - previous) / previous * 100
+        if value - previous < config.min_regression(name):
+            continue
+        if change_pct > config.max_regression_pct:
+            violations.append(
+                f"{route} {name}: median {value:.2f}{unit} regressed {change_pct:.0f}% "
+                f"against baseline {previous:.2f}{unit} "
+                f"(allowed {config.max_regression_pct:g}%)"
+            )
+
+    return medians, violations
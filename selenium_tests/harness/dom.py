@@ -0,0 +1,179 @@
+"""
+Declarative DOM assertions evaluated in one round-trip.
+
+A spec maps CSS selectors to what is expected of the first element they
+match::
+
+    assert_dom(driver, {
+        "#userEmail": {"visible": True, "attrs": {"type": "email", "required": True}},
+        "#numberOfPeople": {"attrs": {"type": "number"}, "value": ""},
+        ".event-item": {"min_count": 3},
+        ".HeroText h1": {"text": re.compile(r"Explore Trips")},
+        ".error": {"present": False},
+    })
+
+Expectations:
+
+- ``present``: whether the selector matches anything (default True)
+- ``count`` / ``min_count``: number of matching elements
+- ``visible`` / ``enabled``: state of the first element
+- ``text`` / ``value``: its visible text (whitespace collapsed) or form
+  value; a string must match exactly, a compiled pattern is searched
+- ``attrs``: ``{name: expected}`` where expected is a string or pattern,
+  ``True`` (attribute present) or ``None`` (attribute absent)
+
+The script only collects what the spec asks about; the comparison happens
+in Python, so patterns use Python ``re`` syntax. The result is a list of
+``Mismatch`` diffs rather than a single boolean.
+"""
+
+import re
+
+from selenium.common.exceptions import WebDriverException
+
+_COLLECT_SCRIPT = """
+function visible(el) {
+    var style = window.getComputedStyle(el), rect = el.getBoundingClientRect();
+    return style.display !== 'none' && style.visibility !== 'hidden'
+        && rect.width > 0 && rect.height > 0;
+}
+var result = {};
+arguments[0].forEach(function (query) {
+    var matches = document.querySelectorAll(query.selector), el = matches[0];
+    var found = {count: matches.length};
+    if (el) {
+        if (query.visible) { found.visible = visible(el); }
+        if (query.enabled) { found.enabled = !el.disabled; }
+        if (query.text) { found.text = (el.innerText || el.textContent).replace(/\\s+/g, ' ').trim(); }
+        if (query.value) { found.value = 'value' in el ? el.value : null; }
+        found.attrs = {};
+        query.attrs.forEach(function (name) { found.attrs[name] = el.getAttribute(name); });
+    }
+    result[query.selector] = found;
+});
+return result;
+"""
+
+_KEYS = {"present", "count", "min_count", "visible", "enabled", "text", "value", "attrs"}
+
+
+class Mismatch:
+    """One expectation of a spec that the page does not meet"""
+
+    def __init__(self, selector, check, expected, actual):
+        self.selector = selector
+        self.check = check
+        self.expected = expected
+        self.actual = actual
+
+    def as_dict(self):
+        return {"selector": self.selector, "check": self.check,
+                "expected": _describe(self.expected), "actual": self.actual}
+
+    def __str__(self):
+        return f"{self.selector}: {self.check} expected {_describe(self.expected)}, got {self.actual!r}"
+
+    __repr__ = __str__
+
+
+class DomAssertionError(AssertionError):
+    """The page does not match a spec; ``mismatches`` lists every difference"""
+
+    def __init__(self, mismatches, message=""):
+        self.mismatches = mismatches
+        lines = [message or f"{len(mismatches)} DOM expectation(s) not met"]
+        lines.extend(f"  - {mismatch}" for mismatch in mismatches)
+        super().__init__("\n".join(lines))
+
+
+def _describe(expected):
+    if isinstance(expected, re.Pattern):
+        return f"/{expected.pattern}/"
+    return repr(expected)
+
+
+def _matches(expected, actual):
+    if isinstance(expected, re.Pattern):
+        return actual is not None and expected.search(actual) is not None
+    return actual == expected
+
+
+def _attr_matches(expected, actual):
+    if expected is True:
+        return actual is not None
+    return _matches(expected, actual)
+
+
+def _query(selector, expectations):
+    unknown = set(expectations) - _KEYS
+    if unknown:
+        raise ValueError(f"Unknown DOM expectation(s) for {selector!r}: {', '.join(sorted(unknown))}")
+    return {
+        "selector": selector,
+        "visible": "visible" in expectations,
+        "enabled": "enabled" in expectations,
+        "text": "text" in expectations,
+        "value": "value" in expectations,
+        "attrs": sorted(expectations.get("attrs", {})),
+    }
+
+
+def collect(driver, spec):
+    """What the page shows for every selector of ``spec``, in one call"""
+    return driver.execute_script(_COLLECT_SCRIPT, [_query(selector, spec[selector]) for selector in spec])
+
+
+def compare(spec, found):
+    """``Mismatch`` list between ``spec`` and what ``collect`` found"""
+    mismatches = []
+    for selector, expectations in spec.items():
+        state = found.get(selector) or {"count": 0}
+        count = state["count"]
+        present = expectations.get("present", True)
+        if bool(count) != present:
+            mismatches.append(Mismatch(selector, "present", present, bool(count)))
+        if "count" in expectations and count != expectations["count"]:
+            mismatches.append(Mismatch(selector, "count", expectations["count"], count))
+        if "min_count" in expectations and count < expectations["min_count"]:
+            mismatches.append(Mismatch(selector, "min_count", expectations["min_count"], count))
+        if not count:
+            continue
+        for check in ("visible", "enabled", "text", "value"):
+            if check in expectations and not _matches(expectations[check], state.get(check)):
+                mismatches.append(Mismatch(selector, check, expectations[check], state.get(check)))
+        for name, expected in sorted(expectations.get("attrs", {}).items()):
+            actual = state["attrs"].get(name)
+            if not _attr_matches(expected, actual):
+                mismatches.append(Mismatch(selector, f"attrs[{name}]",
+                                           {True: "present", None: "absent"}.get(expected, expected), actual))
+    return mismatches
+
+
+def check_dom(driver, spec):
+    """Evaluate ``spec`` against the current page; returns the mismatches"""
+    return compare(spec, collect(driver, spec))
+
+
+def assert_dom(driver, spec, message=""):
+    """Raise ``DomAssertionError`` listing every unmet expectation of ``spec``"""
+    mismatches = check_dom(driver, spec)
+    if mismatches:
+        raise DomAssertionError(mismatches, message)
+
+
+class dom_matches:
+    """
+    Condition for ``wait_for``: the page meets ``spec``. The mismatches of
+    the last poll are kept in ``mismatches`` for the timeout message.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.mismatches = []
+
+    def __call__(self, driver):
+        try:
+            self.mismatches = check_dom(driver, self.spec)
+        except WebDriverException:
+            return False
+        return not self.mismatches
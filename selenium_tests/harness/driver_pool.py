@@ -0,0 +1,347 @@
+"""
+Pooled Chrome WebDriver management.
+
+Starting headless Chrome is the slowest part of most tests, so instead of
+launching a browser per test the suite keeps a small pool of drivers per
+worker process. Between tests a driver is reset (cookies, localStorage,
+sessionStorage, window size, about:blank) and handed to the next test.
+Drivers that crash or cannot be reset are quit and replaced transparently.
+
+Browsers are started locally by default. ``RemoteDriverFactory`` requests
+them from a Selenium Grid or Remote WebDriver URL instead (see
+``harness/grid.py``), with the same Chrome options.
+"""
+
+import logging
+import shutil
+import sys
+import tempfile
+import threading
+
+from selenium import webdriver
+from selenium.common.exceptions import (
+    InvalidSessionIdException,
+    NoAlertPresentException,
+    SessionNotCreatedException,
+    WebDriverException,
+)
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+
+from harness.artifacts import enable_console_logging
+from harness.driver_resolver import resolve_chromedriver
+from harness.grid import DEFAULT_NODE_RETRIES, GridError
+from harness.network import enable_performance_logging
+from harness.parallel import debug_port_range, worker_id
+from harness.perf import install_vitals_observer
+from harness.profiles import clear_emulation
+from harness.profiling import instrument_driver, span
+from harness.waits import install_network_hook
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_SIZE = (1920, 1080)
+
+# Tests wait explicitly through harness.waits; an implicit wait would turn
+# every expected-missing element into a multi-second stall.
+DEFAULT_IMPLICIT_WAIT = 0
+
+# Drivers are recycled after this many tests even if they look healthy,
+# to keep slow leaks in Chrome (memory, detached DOM) from accumulating.
+DEFAULT_MAX_USES = 50
+
+# Errors of a Grid whose node went away under a session (or of a remote
+# browser that crashed), as opposed to a test failing on its own
+NODE_FAILURE_MESSAGES = (
+    "unable to find session",
+    "session not found",
+    "no active session",
+    "could not proxy",
+    "connection refused",
+    "chrome not reachable",
+    "disconnected: not connected to devtools",
+    "tab crashed",
+    "node is down",
+)
+
+
+def build_chrome_options(window_size=DEFAULT_WINDOW_SIZE, user_data_dir=None, debugging_port=None):
+    """
+    Return the headless Chrome options used for every test browser.
+    ``user_data_dir`` and ``debugging_port`` keep browsers started by
+    parallel workers from sharing profiles or colliding on ports.
+    """
+    chrome_options = Options()
+
+    # Headless mode - required for Jenkins/AWS EC2 environment
+    chrome_options.add_argument("--headless=new")
+
+    # Additional options for stability in CI/CD environments
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size={},{}".format(*window_size))
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
+
+    # DevTools Network events for harness.network's request capture
+    enable_performance_logging(chrome_options)
+    # Console messages for the artifacts of a failed test
+    enable_console_logging(chrome_options)
+
+    if user_data_dir:
+        chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+    if debugging_port:
+        chrome_options.add_argument(f"--remote-debugging-port={debugging_port}")
+    return chrome_options
+
+
+def create_chrome_driver(window_size=DEFAULT_WINDOW_SIZE, implicit_wait=DEFAULT_IMPLICIT_WAIT,
+                         user_data_dir=None, debugging_port=None):
+    """Launch a new headless Chrome instance"""
+    chrome_options = build_chrome_options(window_size, user_data_dir, debugging_port)
+
+    try:
+        # Resolved once per session and cached across runs (works offline)
+        driver_path = resolve_chromedriver()
+        service = Service(executable_path=driver_path)
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+    except Exception as e:
+        print(f"Error initializing Chrome driver: {e}")
+        print(f"Python version: {sys.version}")
+        print(f"Python executable: {sys.executable}")
+        raise
+
+    return _prepare_driver(driver, implicit_wait)
+
+
+def _prepare_driver(driver, implicit_wait):
+    instrument_driver(driver)
+    driver.implicitly_wait(implicit_wait)
+    install_network_hook(driver)
+    install_vitals_observer(driver)
+    return driver
+
+
+class RemoteChrome(webdriver.Remote):
+    """
+    Remote Chrome that keeps ``execute_cdp_cmd``: the Grid forwards
+    ChromeDriver's ``goog/cdp/execute`` endpoint to the node, so the page
+    hooks installed over CDP work the same as locally.
+    """
+
+    def __init__(self, command_executor, options):
+        connection = ChromiumRemoteConnection(command_executor, "goog", "chrome", keep_alive=True)
+        super().__init__(command_executor=connection, options=options)
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        return self.execute("executeCdpCommand", {"cmd": cmd, "params": cmd_args})["value"]
+
+
+def create_remote_driver(url, window_size=DEFAULT_WINDOW_SIZE, implicit_wait=DEFAULT_IMPLICIT_WAIT):
+    """Start a session with the headless Chrome options on the Remote WebDriver at ``url``"""
+    # Profile directories and debugging ports are the node's business
+    driver = RemoteChrome(url, build_chrome_options(window_size))
+    return _prepare_driver(driver, implicit_wait)
+
+
+def is_node_failure(error):
+    """Whether ``error`` means the browser's node or session is gone"""
+    if isinstance(error, InvalidSessionIdException):
+        return True
+    if not isinstance(error, WebDriverException):
+        return False
+    message = (error.msg or str(error)).lower()
+    return any(text in message for text in NODE_FAILURE_MESSAGES)
+
+
+class RemoteDriverFactory:
+    """
+    ``DriverPool`` factory for remote browsers. Waits for a free Grid slot
+    through ``scheduler`` (if any) and retries on another node when a node
+    fails to create the session.
+    """
+
+    def __init__(self, url, scheduler=None, retries=DEFAULT_NODE_RETRIES,
+                 window_size=DEFAULT_WINDOW_SIZE, implicit_wait=DEFAULT_IMPLICIT_WAIT):
+        self.url = url
+        self.scheduler = scheduler
+        self.retries = retries
+        self.window_size = window_size
+        self.implicit_wait = implicit_wait
+        self.node_failures = 0
+
+    def __call__(self):
+        for attempt in range(self.retries + 1):
+            if self.scheduler:
+                self.scheduler.acquire()
+            try:
+                return create_remote_driver(self.url, self.window_size, self.implicit_wait)
+            except WebDriverException as e:
+                retry = isinstance(e, SessionNotCreatedException) or is_node_failure(e)
+                if attempt == self.retries or not retry:
+                    raise
+                self.node_failures += 1
+                logger.warning(f"Grid could not start a session ({e.msg}); retrying on another node")
+            finally:
+                if self.scheduler:
+                    self.scheduler.release()
+        raise GridError(f"No session on {self.url} after {self.retries + 1} attempts")
+
+
+class DriverPool:
+    """
+    Thread-safe pool of reusable WebDriver instances.
+
+    ``acquire`` hands out an idle driver (creating one if needed) and
+    ``release`` resets it and puts it back. ``launch_hooks`` are called with
+    every newly started driver, e.g. to inject page scripts. A driver is discarded instead of
+    being reused when it was requested fresh, fails its health check, cannot
+    be reset, or has reached ``max_uses``.
+    """
+
+    def __init__(self, factory=None, window_size=DEFAULT_WINDOW_SIZE,
+                 implicit_wait=DEFAULT_IMPLICIT_WAIT, max_uses=DEFAULT_MAX_USES, launch_hooks=()):
+        self.window_size = window_size
+        self.implicit_wait = implicit_wait
+        self.max_uses = max_uses
+        self._factory = factory or self._launch
+        self.launch_hooks = list(launch_hooks)
+        self._idle = []
+        self._uses = {}
+        self._profiles = {}
+        self._ports = iter(debug_port_range())
+        self._lock = threading.Lock()
+        self.created = 0
+        self.recycled = 0
+
+    def acquire(self, fresh=False):
+        """
+        Return a clean driver. With ``fresh=True`` a brand new browser is
+        started and the pool's idle drivers are left untouched.
+        """
+        if not fresh:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    driver = self._idle.pop()
+                if self.is_alive(driver):
+                    self._uses[id(driver)] += 1
+                    return driver
+                logger.warning("Discarding crashed driver from pool")
+                self._discard(driver)
+
+        with span("driver", "launch"):
+            driver = self._factory()
+        with self._lock:
+            self.created += 1
+            self._uses[id(driver)] = 1
+        try:
+            for hook in self.launch_hooks:
+                hook(driver)
+        except Exception:
+            self._discard(driver)
+            raise
+        return driver
+
+    def release(self, driver, discard=False):
+        """Reset ``driver`` and return it to the pool, or quit it"""
+        if discard or self._uses.get(id(driver), 0) >= self.max_uses:
+            self._discard(driver)
+            return
+
+        with span("driver", "reset"):
+            reset = self.reset(driver)
+        if not reset:
+            logger.warning("Driver could not be reset; recycling it")
+            self._discard(driver)
+            return
+
+        with self._lock:
+            self._idle.append(driver)
+
+    def reset(self, driver):
+        """
+        Bring ``driver`` back to a blank state. Returns False if the driver
+        is dirty in a way that cannot be cleaned up (crashed, hung, etc.).
+        """
+        try:
+            self._dismiss_alert(driver)
+
+            # Close any extra tabs/windows a test may have opened
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+
+            # Web storage is per origin, so clear it while still on the page
+            driver.execute_script(
+                "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}"
+            )
+            driver.delete_all_cookies()
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+
+            # Throttling and device emulation from a profile or set_offline
+            clear_emulation(driver)
+
+            driver.implicitly_wait(self.implicit_wait)
+            driver.set_window_size(*self.window_size)
+            driver.get("about:blank")
+            return True
+        except WebDriverException as e:
+            logger.warning(f"Driver reset failed: {e}")
+            return False
+
+    @staticmethod
+    def is_alive(driver):
+        """Cheap health check: a crashed browser fails any command"""
+        try:
+            driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def close(self):
+        """Quit every idle driver in the pool"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._discard(driver)
+
+    def _launch(self):
+        """Start Chrome with a private profile and this worker's next debug port"""
+        profile = tempfile.mkdtemp(prefix=f"opalumpus-chrome-w{worker_id()}-")
+        with self._lock:
+            port = next(self._ports, None)
+        try:
+            driver = create_chrome_driver(self.window_size, self.implicit_wait, profile, port)
+        except Exception:
+            shutil.rmtree(profile, ignore_errors=True)
+            raise
+        with self._lock:
+            self._profiles[id(driver)] = profile
+        return driver
+
+    @staticmethod
+    def _dismiss_alert(driver):
+        try:
+            driver.switch_to.alert.dismiss()
+        except NoAlertPresentException:
+            pass
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+            profile = self._profiles.pop(id(driver), None)
+            self.recycled += 1
+        try:
+            with span("driver", "quit"):
+                driver.quit()
+        except WebDriverException:
+            pass
+        if profile:
+            shutil.rmtree(profile, ignore_errors=True)
@@ -0,0 +1,183 @@
+"""
+ChromeDriver resolution with a local, version-pinned cache.
+
+webdriver-manager looks up the matching ChromeDriver (possibly over the
+network) every time ``install()`` is called. Here the lookup happens at
+most once per Chrome version: the resolved binary is copied into a local
+cache directory and recorded in a small JSON manifest together with the
+Chrome version it was resolved for. As long as the installed Chrome's major
+version still matches, later sessions reuse the cached binary without any
+network access, which is what the air-gapped agents need.
+
+Resolution order:
+    1. ``CHROMEDRIVER_PATH`` environment variable
+    2. cached binary from the manifest, if it matches the installed Chrome
+    3. webdriver-manager (network), whose result is then cached
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import stat
+import subprocess
+import threading
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "opalumpus-selenium"
+MANIFEST_NAME = "chromedriver.json"
+
+CHROME_COMMANDS = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser"]
+
+_VERSION_PATTERN = re.compile(r"(\d+)\.(\d+)\.(\d+)\.(\d+)")
+
+_lock = threading.Lock()
+_resolved = None
+
+
+def _parse_version(text):
+    match = _VERSION_PATTERN.search(text or "")
+    return match.group(0) if match else None
+
+
+def _major(version):
+    return version.split(".")[0] if version else None
+
+
+def cache_dir():
+    """Directory holding the pinned drivers (``DRIVER_CACHE_DIR`` overrides)"""
+    return Path(os.getenv("DRIVER_CACHE_DIR", DEFAULT_CACHE_DIR)).expanduser()
+
+
+def installed_chrome_version():
+    """Version of the locally installed Chrome, or None if it can't be found"""
+    commands = [os.getenv("CHROME_BINARY")] if os.getenv("CHROME_BINARY") else []
+    commands += CHROME_COMMANDS
+
+    for command in commands:
+        try:
+            result = subprocess.run(
+                [command, "--version"], capture_output=True, text=True, timeout=10
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        version = _parse_version(result.stdout)
+        if version:
+            return version
+
+    if os.name == "nt":
+        try:
+            result = subprocess.run(
+                ["reg", "query", r"HKCU\Software\Google\Chrome\BLBeacon", "/v", "version"],
+                capture_output=True, text=True, timeout=10,
+            )
+            return _parse_version(result.stdout)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+    return None
+
+
+def chromedriver_version(driver_path):
+    """Version reported by a chromedriver binary"""
+    try:
+        result = subprocess.run(
+            [str(driver_path), "--version"], capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return _parse_version(result.stdout)
+
+
+def load_manifest(directory=None):
+    """Return the cached resolution record, or None"""
+    try:
+        with open(Path(directory or cache_dir()) / MANIFEST_NAME, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(record, directory=None):
+    """Atomically write the resolution record (parallel workers may race)"""
+    directory = Path(directory or cache_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp_path = directory / f"{MANIFEST_NAME}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_path, directory / MANIFEST_NAME)
+
+
+def _download_chromedriver(directory):
+    """Resolve ChromeDriver through webdriver-manager and pin a copy in the cache"""
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    source = Path(ChromeDriverManager().install())
+    version = chromedriver_version(source) or "unknown"
+
+    target = Path(directory) / f"chromedriver-{version}" / source.name
+    if not target.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source, target)
+        target.chmod(target.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return target, version
+
+
+def resolve_chromedriver(directory=None):
+    """
+    Return the path of a ChromeDriver binary matching the installed Chrome.
+    The result is memoised for the lifetime of the process.
+    """
+    global _resolved
+    directory = directory or cache_dir()
+
+    with _lock:
+        if _resolved:
+            return _resolved
+
+        override = os.getenv("CHROMEDRIVER_PATH")
+        if override:
+            _resolved = override
+            return _resolved
+
+        chrome_version = installed_chrome_version()
+        manifest = load_manifest(directory)
+        cached_path = manifest and manifest.get("driver_path")
+
+        if cached_path and Path(cached_path).exists():
+            if chrome_version is None:
+                logger.warning("Could not detect Chrome version; using cached ChromeDriver")
+                _resolved = cached_path
+                return _resolved
+            if _major(manifest.get("chrome_version")) == _major(chrome_version):
+                _resolved = cached_path
+                return _resolved
+            logger.info(
+                f"Chrome {chrome_version} does not match cached ChromeDriver for "
+                f"{manifest.get('chrome_version')}; resolving again"
+            )
+
+        try:
+            driver_path, driver_version = _download_chromedriver(directory)
+        except Exception:
+            if cached_path and Path(cached_path).exists():
+                logger.warning("ChromeDriver lookup failed (offline?); using cached ChromeDriver")
+                _resolved = cached_path
+                return _resolved
+            raise
+
+        save_manifest(
+            {
+                "chrome_version": chrome_version,
+                "driver_version": driver_version,
+                "driver_path": str(driver_path),
+                "resolved_at": datetime.now().isoformat(timespec="seconds"),
+            },
+            directory,
+        )
+        _resolved = str(driver_path)
+        return _resolved
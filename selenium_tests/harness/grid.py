@@ -0,0 +1,241 @@
+"""
+Selenium Grid / Remote WebDriver support.
+
+With ``--driver-backend=remote`` the browsers are not started on this
+machine but requested from a Remote WebDriver URL: a Selenium Grid (e.g. the
+one in the repository's ``docker-compose.grid.yml``, started with
+``run_tests.py --grid compose``), a standalone Chrome container or a cloud
+provider. The Chrome options are the same headless options used locally.
+
+A Grid reports its nodes and their session slots at ``GET /status``.
+``SlotScheduler`` uses that to hand out sessions no faster than the Grid
+has free Chrome slots: a worker that needs a browser while every slot is
+busy waits (in request order) until one frees up, and gives up after the
+slot timeout instead of piling requests into the Grid's own queue.
+``run_tests.py --workers auto`` sizes the worker pool by the Grid's slots.
+
+Endpoints that do not report nodes (standalone servers, most clouds) are
+not throttled.
+"""
+
+import collections
+import json
+import os
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from harness.services import REPO_ROOT, ServiceError, compose_command
+
+DRIVER_BACKENDS = ("local", "remote")
+GRID_MODES = ("none", "attach", "compose")
+
+DEFAULT_REMOTE_URL = "http://localhost:4444"
+GRID_COMPOSE_FILE = REPO_ROOT / "docker-compose.grid.yml"
+
+# Set by run_tests.py so every worker uses the Grid it started or found
+DRIVER_BACKEND_ENV = "DRIVER_BACKEND"
+REMOTE_URL_ENV = "SELENIUM_REMOTE_URL"
+
+DEFAULT_SLOT_TIMEOUT = 300
+DEFAULT_NODE_RETRIES = 2
+DEFAULT_GRID_TIMEOUT = 120
+
+STATUS_TIMEOUT = 5
+MIN_POLL = 0.25
+MAX_POLL = 5.0
+
+
+class GridError(Exception):
+    """The Grid is unreachable, has no capacity, or no slot became free in time"""
+
+
+class GridStatus:
+    """Chrome capacity of a Grid, from its ``/status`` answer"""
+
+    def __init__(self, ready, nodes):
+        self.ready = ready
+        self.nodes = nodes
+
+    @classmethod
+    def parse(cls, payload, browser="chrome"):
+        value = payload.get("value", payload)
+        nodes = []
+        for node in value.get("nodes", []):
+            slots = [s for s in node.get("slots", [])
+                     if s.get("stereotype", {}).get("browserName", browser) == browser]
+            nodes.append({
+                "id": node.get("id"),
+                "uri": node.get("uri"),
+                "up": node.get("availability", "UP") == "UP",
+                "slots": len(slots),
+                "busy": sum(1 for s in slots if s.get("session")),
+            })
+        return cls(bool(value.get("ready")), nodes)
+
+    @property
+    def reports_slots(self):
+        """Whether the endpoint is a Grid that reports its slots"""
+        return bool(self.nodes)
+
+    @property
+    def total(self):
+        return sum(node["slots"] for node in self.nodes if node["up"])
+
+    @property
+    def free(self):
+        return sum(node["slots"] - node["busy"] for node in self.nodes if node["up"])
+
+    def __repr__(self):
+        up = sum(1 for node in self.nodes if node["up"])
+        return f"GridStatus(ready={self.ready}, {up}/{len(self.nodes)} nodes up, {self.free}/{self.total} slots free)"
+
+
+def grid_status(url, browser="chrome"):
+    """``GridStatus`` of the Remote WebDriver endpoint at ``url``"""
+    try:
+        with urllib.request.urlopen(f"{url.rstrip('/')}/status", timeout=STATUS_TIMEOUT) as response:
+            return GridStatus.parse(json.loads(response.read().decode("utf-8")), browser)
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        raise GridError(f"Remote WebDriver at {url} is not reachable: {e}") from e
+
+
+def grid_capacity(url):
+    """Chrome slots of the Grid at ``url``, or None if it does not report them"""
+    try:
+        status = grid_status(url)
+    except GridError:
+        return None
+    return status.total if status.reports_slots else None
+
+
+class SlotScheduler:
+    """
+    Lets a session request through only when the Grid reports a free Chrome
+    slot that no other request of this process is about to take. Requests
+    are served in arrival order; ``acquire`` raises ``GridError`` after
+    ``timeout`` seconds without a free slot.
+    """
+
+    def __init__(self, url, timeout=DEFAULT_SLOT_TIMEOUT, status=grid_status):
+        self.url = url
+        self.timeout = timeout
+        self._status = status
+        self._queue = collections.deque()
+        self._pending = 0
+        self._condition = threading.Condition()
+        self.waited = 0.0
+        self.throttled = True
+
+    def acquire(self):
+        """Block until a slot is free; call ``release`` once the session exists (or failed)"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        ticket = object()
+        with self._condition:
+            self._queue.append(ticket)
+            while self._queue[0] is not ticket:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._leave(ticket, started)
+                    raise GridError(f"Waited {self.timeout:.0f}s in the queue for a Grid slot on {self.url}")
+                self._condition.wait(remaining)
+        try:
+            delay = MIN_POLL
+            while self.throttled:
+                status = self._status(self.url)
+                if not status.reports_slots:
+                    self.throttled = False
+                    break
+                with self._condition:
+                    if status.free > self._pending:
+                        break
+                if time.monotonic() + delay > deadline:
+                    raise GridError(f"No free Chrome slot on {self.url} within {self.timeout:.0f}s ({status})")
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_POLL)
+            with self._condition:
+                self._pending += 1
+        finally:
+            with self._condition:
+                self._leave(ticket, started)
+
+    def release(self):
+        with self._condition:
+            self._pending = max(0, self._pending - 1)
+
+    def _leave(self, ticket, started):
+        self._queue.remove(ticket)
+        self._condition.notify_all()
+        self.waited += time.monotonic() - started
+
+
+def wait_for_grid(url, timeout=DEFAULT_GRID_TIMEOUT):
+    """Block until the Grid is ready and has at least one Chrome slot"""
+    deadline = time.monotonic() + timeout
+    delay = MIN_POLL
+    while True:
+        try:
+            status = grid_status(url)
+            if status.ready and (status.total or not status.reports_slots):
+                return status
+            problem = f"not ready ({status})"
+        except GridError as e:
+            problem = str(e)
+        if time.monotonic() + delay > deadline:
+            raise GridError(f"Selenium Grid at {url} did not become ready within {timeout:.0f}s: {problem}")
+        time.sleep(delay)
+        delay = min(delay * 2, MAX_POLL)
+
+
+class GridOrchestrator:
+    """
+    Starts the Grid of ``docker-compose.grid.yml`` (``compose``) or waits for
+    one that is already running (``attach``), and points the test workers at
+    it through the environment.
+    """
+
+    def __init__(self, mode, url=DEFAULT_REMOTE_URL, timeout=DEFAULT_GRID_TIMEOUT,
+                 compose_file=GRID_COMPOSE_FILE, log_dir="service_logs"):
+        if mode not in GRID_MODES:
+            raise GridError(f"Unknown grid mode {mode!r}, expected one of {GRID_MODES}")
+        self.mode = mode
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.compose_file = Path(compose_file)
+        self.log_dir = Path(log_dir)
+        self._compose = None
+
+    def start(self):
+        if self.mode == "none":
+            return None
+        if self.mode == "compose":
+            try:
+                self._compose = compose_command() + ["-f", str(self.compose_file)]
+            except ServiceError as e:
+                raise GridError(str(e)) from e
+            print(f"Starting Selenium Grid with {' '.join(self._compose)} up")
+            if subprocess.run(self._compose + ["up", "-d"]).returncode != 0:
+                self._compose = None
+                raise GridError("docker compose up failed for the Selenium Grid")
+        try:
+            status = wait_for_grid(self.url, self.timeout)
+        except GridError:
+            self.stop()
+            raise
+        os.environ[DRIVER_BACKEND_ENV] = "remote"
+        os.environ[REMOTE_URL_ENV] = self.url
+        print(f"✓ Selenium Grid ready at {self.url}: {status}")
+        return status
+
+    def stop(self):
+        if self._compose:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.log_dir / "grid.log", "w", encoding="utf-8") as log:
+                subprocess.run(self._compose + ["logs", "--no-color", "--timestamps"],
+                               stdout=log, stderr=subprocess.STDOUT)
+            subprocess.run(self._compose + ["down"])
+            self._compose = None
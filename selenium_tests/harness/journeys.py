@@ -0,0 +1,351 @@
+"""
+Concurrent user simulation with real browsers.
+
+``UserSimulation`` drives one headless Chrome per virtual user through the
+booking journey the way a visitor would:
+
+1. open the home page
+2. open /trips and pick one of the upcoming events ("Book Now")
+3. fill in the /book-now form and submit it
+
+Users are started and stopped following a ramp schedule (``user_windows``)
+and repeat the journey, with think time between steps, until their window
+ends. Every journey records the time of each step and of the booking
+transaction, from the click on "Book Now" until the form has been cleared.
+
+The booking page shows the same success alert whether or not the backend
+saved the booking, so the outcome is read from the response itself:
+``RESPONSE_LOG_HOOK`` logs the status and ``success`` flag of every API
+response (and every alert) in the page. Outcomes:
+
+- ``ok``: HTTP 200, ``success: true`` and the form was cleared
+- ``app_error``: the backend answered ``success: false`` (e.g. addBooking
+  failed to save); the UI still reported success
+- ``http_error``: HTTP error status or no response at all
+- ``ui_error``: error alert, or the form was not cleared
+- ``timeout`` / ``error``: a step did not complete or the browser failed
+
+``simulate_users.py`` is the command line entry point.
+"""
+
+import random
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support import expected_conditions as EC
+
+from harness.load import percentile
+from harness.pages import BookNowPage, HomePage, TripsPage
+from harness.seeding import namespace_tag
+from harness.waits import wait_for
+
+OUTCOMES = ("ok", "app_error", "http_error", "ui_error", "timeout", "error")
+
+DEFAULT_THINK_TIME = (1.0, 3.0)
+DEFAULT_TIMEOUT = 30
+
+# Width of the time buckets in the summary, in seconds
+BUCKET_SECONDS = 10
+
+BOOKING_PATH = "/api/booknow"
+
+# Logs API responses and alerts so the outcome of a booking is known even
+# though the page alerts success for any HTTP 200
+RESPONSE_LOG_HOOK = """
+(function () {
+    if (window.__opalumpusLog) { return; }
+    var log = window.__opalumpusLog = {responses: [], alerts: []};
+    var open = XMLHttpRequest.prototype.open;
+    XMLHttpRequest.prototype.open = function (method, url) {
+        this.__opalumpusRequest = {method: method, url: String(url)};
+        return open.apply(this, arguments);
+    };
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        var xhr = this, started = performance.now();
+        xhr.addEventListener('loadend', function () {
+            var body = null;
+            try { body = JSON.parse(xhr.responseText); } catch (e) {}
+            var request = xhr.__opalumpusRequest || {};
+            log.responses.push({
+                method: request.method,
+                url: request.url,
+                status: xhr.status,
+                success: body && typeof body === 'object' && 'success' in body ? body.success : null,
+                message: body && typeof body === 'object' ? body.message || null : null,
+                ms: performance.now() - started
+            });
+        });
+        return send.apply(this, arguments);
+    };
+    var alert = window.alert;
+    window.alert = function (message) {
+        log.alerts.push({message: String(message), at: performance.now()});
+        return alert.apply(this, arguments);
+    };
+})();
+"""
+
+_READ_LOG_SCRIPT = """
+var log = window.__opalumpusLog;
+if (!log) { return {responses: [], alerts: []}; }
+return {responses: log.responses.splice(0), alerts: log.alerts.splice(0)};
+"""
+
+
+def install_response_log(driver):
+    """Log API responses and alerts in every document ``driver`` loads"""
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": RESPONSE_LOG_HOOK})
+
+
+def user_windows(stages):
+    """
+    (start, stop) seconds of each virtual user for a ramp schedule of
+    ``(target users, seconds)`` stages: within a stage users are started
+    (or stopped, newest first) evenly until ``target`` are active.
+    """
+    windows, active, elapsed = [], [], 0.0
+    for target, seconds in stages:
+        change = target - len(active)
+        for i in range(abs(change)):
+            at = elapsed + seconds * i / abs(change)
+            if change > 0:
+                windows.append([at, None])
+                active.append(windows[-1])
+            else:
+                active.pop()[1] = at
+        elapsed += seconds
+    for window in active:
+        window[1] = elapsed
+    return [tuple(window) for window in windows]
+
+
+def parse_stages(value):
+    """``"5:30,10:60,0:10"`` -> [(5, 30.0), (10, 60.0), (0, 10.0)]"""
+    stages = []
+    for part in value.split(","):
+        users, _, seconds = part.strip().partition(":")
+        stages.append((int(users), float(seconds)))
+    return stages
+
+
+class BookingJourney:
+    """One user's visits: home -> trips -> book-now -> submit"""
+
+    def __init__(self, base_url, namespace, think_time=DEFAULT_THINK_TIME,
+                 timeout=DEFAULT_TIMEOUT, rng=None):
+        self.base_url = base_url.rstrip("/")
+        self.tag = namespace_tag(namespace)
+        self.think_time = think_time
+        self.timeout = timeout
+        self.random = rng or random.Random()
+
+    def _think(self):
+        time.sleep(self.random.uniform(*self.think_time))
+
+    def _step(self, steps, name, action):
+        started = time.perf_counter()
+        result = action()
+        steps[name] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    def _choose_trip(self, trips):
+        count = trips.trip_count()
+        if count:
+            return trips.book(self.random.randrange(count), self.timeout)
+        return BookNowPage(trips.driver, self.base_url).open(self.timeout)
+
+    def run(self, driver, user, iteration):
+        """Run the journey once; returns the transaction record"""
+        record = {"user": user, "iteration": iteration, "started": time.time(), "steps": {},
+                  "outcome": None, "transaction_ms": None, "response_ms": None,
+                  "status": None, "success": None, "alert": None, "detail": None}
+        steps = record["steps"]
+        home = HomePage(driver, self.base_url)
+        trips = TripsPage(driver, self.base_url)
+        try:
+            self._step(steps, "home", lambda: home.open(self.timeout))
+            self._think()
+            self._step(steps, "trips", lambda: trips.open(self.timeout))
+            self._think()
+            booking = self._step(steps, "book_now", lambda: self._choose_trip(trips))
+            self._think()
+            booking.fill(
+                f"Sim User {user}",
+                f"sim.user{user}.{iteration}@example.com",
+                self.random.randint(1, 6),
+                f"Simulated booking {self.tag}",
+            )
+            driver.execute_script(_READ_LOG_SCRIPT)  # only this booking's responses count
+
+            clicked = time.perf_counter()
+            booking.submit()
+            alert = wait_for(driver, EC.alert_is_present(), self.timeout, "no alert after booking")
+            record["alert"] = alert.text
+            alert.accept()
+            cleared = True
+            if "error" not in record["alert"].lower():
+                try:
+                    wait_for(driver, lambda d: booking.values("user_name")["user_name"] == "",
+                             self.timeout, "booking form was not cleared")
+                except TimeoutException:
+                    cleared = False
+            record["transaction_ms"] = round((time.perf_counter() - clicked) * 1000, 1)
+            self._classify(record, driver.execute_script(_READ_LOG_SCRIPT), cleared)
+        except TimeoutException as e:
+            record["outcome"], record["detail"] = "timeout", e.msg
+        except WebDriverException as e:
+            record["outcome"], record["detail"] = "error", (e.msg or str(e)).splitlines()[0]
+        return record
+
+    @staticmethod
+    def _classify(record, log, cleared):
+        bookings = [r for r in log["responses"] if (r.get("url") or "").endswith(BOOKING_PATH)]
+        response = bookings[-1] if bookings else None
+        if response:
+            record["status"] = response["status"]
+            record["success"] = response["success"]
+            record["response_ms"] = round(response["ms"], 1)
+        if response is None or not response["status"] or response["status"] >= 400:
+            record["outcome"] = "http_error"
+        elif response["success"] is False:
+            record["outcome"] = "app_error"
+            record["detail"] = response.get("message")
+        elif "error" in record["alert"].lower() or not cleared:
+            record["outcome"] = "ui_error"
+        else:
+            record["outcome"] = "ok"
+
+
+class UserSimulation:
+    """
+    Runs ``BookingJourney`` for every user window of the ramp schedule,
+    each user in its own thread with its own browser from ``driver_pool``.
+    """
+
+    def __init__(self, driver_pool, journey, stages):
+        self.driver_pool = driver_pool
+        self.journey = journey
+        self.windows = user_windows(stages)
+        self.records = []
+        self._lock = threading.Lock()
+        self._active = 0
+        self._started_at = None
+        self.timeline = []
+
+    def _user(self, user, start, stop, origin):
+        delay = origin + start - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        driver = self.driver_pool.acquire(fresh=True)
+        self._change_active(1, origin)
+        iteration = 0
+        try:
+            while time.perf_counter() < origin + stop:
+                record = self.journey.run(driver, user, iteration)
+                record["offset_s"] = round(record["started"] - self._started_at, 1)
+                with self._lock:
+                    self.records.append(record)
+                iteration += 1
+                if record["outcome"] == "error" and not self.driver_pool.is_alive(driver):
+                    self.driver_pool.release(driver, discard=True)
+                    driver = self.driver_pool.acquire(fresh=True)
+        finally:
+            self._change_active(-1, origin)
+            self.driver_pool.release(driver, discard=True)
+
+    def _change_active(self, delta, origin):
+        with self._lock:
+            self._active += delta
+            self.timeline.append((round(time.perf_counter() - origin, 1), self._active))
+
+    def run(self):
+        """Run the whole schedule; returns the transaction records"""
+        origin = time.perf_counter()
+        self._started_at = time.time()
+        threads = [
+            threading.Thread(target=self._user, args=(user, start, stop, origin), daemon=True,
+                             name=f"sim-user-{user}")
+            for user, (start, stop) in enumerate(self.windows)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.records
+
+
+def _stats(values):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    return {"count": len(values), "p50": percentile(values, 50), "p95": percentile(values, 95),
+            "max": values[-1]}
+
+
+def summarize(records, timeline=()):
+    """Outcome counts, error rates and timings overall and per time bucket"""
+    outcomes = {name: sum(1 for r in records if r["outcome"] == name) for name in OUTCOMES}
+    completed = [r for r in records if r["outcome"] == "ok"]
+    steps = sorted({name for r in records for name in r["steps"]})
+
+    buckets = {}
+    for record in records:
+        buckets.setdefault(int(record.get("offset_s", 0) // BUCKET_SECONDS), []).append(record)
+
+    def users_at(second):
+        active = 0
+        for at, count in timeline:
+            if at > second:
+                break
+            active = count
+        return active
+
+    return {
+        "journeys": len(records),
+        "outcomes": outcomes,
+        "error_rate": (len(records) - len(completed)) / len(records) if records else 0.0,
+        # Failures the visitor was told were successful bookings
+        "silent_failures": outcomes["app_error"],
+        "transaction_ms": _stats(r["transaction_ms"] for r in completed),
+        "response_ms": _stats(r["response_ms"] for r in records),
+        "steps_ms": {name: _stats(r["steps"].get(name) for r in records) for name in steps},
+        "over_time": [
+            {
+                "from_s": index * BUCKET_SECONDS,
+                "users": users_at((index + 1) * BUCKET_SECONDS),
+                "journeys": len(bucket),
+                "errors": sum(1 for r in bucket if r["outcome"] != "ok"),
+                "transaction_p95_ms": percentile(
+                    sorted(r["transaction_ms"] for r in bucket if r["transaction_ms"] is not None), 95),
+            }
+            for index, bucket in sorted(buckets.items())
+        ],
+    }
+
+
+def format_summary(summary):
+    """Human readable report of ``summarize``"""
+
+    def stats(values):
+        if not values:
+            return "-"
+        return f"p50 {values['p50']:.0f} ms  p95 {values['p95']:.0f} ms  max {values['max']:.0f} ms"
+
+    outcomes = ", ".join(f"{name} {count}" for name, count in summary["outcomes"].items() if count)
+    lines = [
+        f"Journeys:     {summary['journeys']} ({outcomes or 'none'})",
+        f"Error rate:   {summary['error_rate']:.1%} "
+        f"({summary['silent_failures']} bookings failed in the backend but were shown as successful)",
+        f"Transaction:  {stats(summary['transaction_ms'])}  (click to form cleared)",
+        f"Response:     {stats(summary['response_ms'])}  (POST {BOOKING_PATH} seen by the page)",
+    ]
+    for name, values in summary["steps_ms"].items():
+        lines.append(f"  {name:<10}  {stats(values)}")
+    lines.append(f"{'From':>6} {'Users':>6} {'Journeys':>9} {'Errors':>7} {'p95 ms':>8}")
+    for bucket in summary["over_time"]:
+        p95 = "-" if bucket["transaction_p95_ms"] is None else f"{bucket['transaction_p95_ms']:.0f}"
+        lines.append(f"{bucket['from_s']:>5}s {bucket['users']:>6} {bucket['journeys']:>9} "
+                     f"{bucket['errors']:>7} {p95:>8}")
+    return "\n".join(lines)
@@ -0,0 +1,350 @@
+"""
+HTTP load generation against the Opalumpus Express API.
+
+Two load models are supported:
+
+- closed loop: ``concurrency`` virtual users each send a request, wait for
+  the response and immediately send the next one
+- open loop: requests are started at a fixed arrival ``rate`` (constant or
+  Poisson) regardless of how fast the server answers. Latency is measured
+  from the *scheduled* start, so queueing caused by a slow server is
+  included instead of hidden (no coordinated omission).
+
+Requests issued during the warm-up period are executed but not counted.
+``update_trip`` and ``delete_trip`` work on trips created beforehand by
+``ApiScenarios.prepare``, outside the measured run; a request that finds no
+prepared trip left is counted as skipped instead of timing a creation.
+Results are summarised as throughput, error rate, p50/p95/p99 latency and a
+latency histogram. ``load_test.py`` is the command line entry point.
+
+All requests go through one pooled ``ApiClient``, so connections are kept
+alive across requests instead of paying a TCP handshake each time.
+
+Trips and bookings the scenarios create carry the seed tag of their
+namespace (``loadtest`` by default, see ``harness/seeding.py``): trips are
+deleted by ``ApiScenarios.cleanup``, bookings (which the API cannot delete)
+by ``seed_data.py teardown --backend mongo`` or ``load_test.py
+--seed-backend mongo``.
+"""
+
+import itertools
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from harness.api_client import ApiClient
+from harness.seeding import namespace_tag
+
+# Upper bounds (ms) of the latency histogram buckets
+HISTOGRAM_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float("inf")]
+
+LOAD_TEST_TAG = "loadtest"
+LOAD_TEST_NAMESPACE = "loadtest"
+
+# Scenarios that need existing trips, created by ApiScenarios.prepare
+NEEDS_TRIPS = ("update_trip", "delete_trip")
+
+# Trips created for a closed-loop delete_trip run, whose request count is
+# not known in advance
+DEFAULT_PREPARED_TRIPS = 1000
+
+
+class NoTripAvailable(Exception):
+    """Every prepared trip has been used up"""
+
+
+class Sample:
+    """Outcome of one request"""
+
+    __slots__ = ("scenario", "scheduled", "latency", "ok", "status", "size")
+
+    def __init__(self, scenario, scheduled, latency, ok, status, size):
+        self.scenario = scenario
+        self.scheduled = scheduled
+        self.latency = latency
+        self.ok = ok
+        self.status = status
+        self.size = size
+
+
+def _trip_payload(counter, tag):
+    index = next(counter)
+    return {
+        "destination": f"{LOAD_TEST_TAG}-{index}",
+        "duration": "3 days",
+        "price": 10000 + index,
+        "description": f"Created by the API load test {tag}",
+    }
+
+
+class ApiScenarios:
+    """
+    The operations the load generator can drive. Each scenario sends one
+    request through the shared client and returns the response. Trips
+    created by the scenarios are remembered so ``cleanup`` can delete them;
+    ``update_trip`` and ``delete_trip`` use the ones ``prepare`` created.
+    """
+
+    def __init__(self, client, namespace=LOAD_TEST_NAMESPACE):
+        self.client = client
+        self.namespace = namespace
+        self.tag = namespace_tag(namespace)
+        self.bookings_sent = 0
+        self.created_trip_ids = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def names(self):
+        return ["list_trips", "add_trip", "update_trip", "delete_trip",
+                "book_now", "admin_signin", "mixed"]
+
+    def get(self, name):
+        return getattr(self, name)
+
+    def _remember(self, response):
+        try:
+            trip_id = response.json()["trip"]["_id"]
+        except (ValueError, KeyError, TypeError):
+            return None
+        with self._lock:
+            self.created_trip_ids.append(trip_id)
+        return trip_id
+
+    def create_trip(self):
+        response = self.client.post("/api/trips/add", json=_trip_payload(self._counter, self.tag))
+        return response, self._remember(response)
+
+    def prepare(self, name, count, concurrency=1):
+        """
+        Create the trips ``name`` works on (untimed, before the run); returns
+        how many trips are available to it.
+        """
+        if name in NEEDS_TRIPS:
+            with self._lock:
+                missing = max(0, count - len(self.created_trip_ids))
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(lambda _: self.create_trip(), range(missing)))
+        with self._lock:
+            return len(self.created_trip_ids)
+
+    def list_trips(self):
+        return self.client.get("/api/trips")
+
+    def add_trip(self):
+        return self.create_trip()[0]
+
+    def update_trip(self):
+        with self._lock:
+            if not self.created_trip_ids:
+                raise NoTripAvailable("No prepared trip to update")
+            trip_id = random.choice(self.created_trip_ids)
+        return self.client.put(f"/api/trips/{trip_id}", json={"price": random.randint(10000, 99999)})
+
+    def delete_trip(self):
+        with self._lock:
+            if not self.created_trip_ids:
+                raise NoTripAvailable("No prepared trip left to delete")
+            trip_id = self.created_trip_ids.pop()
+        return self.client.delete(f"/api/trips/{trip_id}")
+
+    def book_now(self):
+        with self._lock:
+            self.bookings_sent += 1
+        return self.client.post("/api/booknow", json={
+            "userName": f"{LOAD_TEST_TAG} user",
+            "userEmail": "loadtest@example.com",
+            "numberOfPeople": 2,
+            "additionalNotes": f"Created by the API load test {self.tag}",
+        })
+
+    def admin_signin(self):
+        return self.client.post("/admin-signin", json={"username": "loadtest", "password": "invalid"})
+
+    def mixed(self):
+        """Read-heavy mix resembling real traffic"""
+        choice = random.random()
+        if choice < 0.7:
+            return self.list_trips()
+        if choice < 0.85:
+            return self.book_now()
+        if choice < 0.95:
+            return self.admin_signin()
+        return self.add_trip()
+
+    def cleanup(self):
+        """Delete every trip created by the scenarios"""
+        with self._lock:
+            trip_ids, self.created_trip_ids = self.created_trip_ids, []
+        for trip_id in trip_ids:
+            try:
+                self.client.delete(f"/api/trips/{trip_id}")
+            except requests.RequestException:
+                pass
+        return len(trip_ids)
+
+
+def load_test_client(api_url, concurrency):
+    """
+    Client for load generation: one keep-alive connection per concurrent
+    request and no retries, so errors are counted instead of hidden.
+    """
+    return ApiClient(api_url, pool_size=concurrency, retries=0, timeout=30)
+
+
+def _is_success(response):
+    """The API reports some failures as HTTP 200 with success: false"""
+    # 401 is the expected answer to the admin_signin scenario's bad credentials
+    if response.status_code >= 400 and response.status_code != 401:
+        return False
+    try:
+        body = response.json()
+    except ValueError:
+        return True
+    return not (isinstance(body, dict) and body.get("success") is False)
+
+
+class LoadGenerator:
+    """Runs one scenario under a closed- or open-loop load model"""
+
+    def __init__(self, scenario_name, operation):
+        self.scenario_name = scenario_name
+        self.operation = operation
+        self._samples = []
+        self._lock = threading.Lock()
+
+    def _execute(self, scheduled):
+        """Send one request; False when there was nothing left to send"""
+        try:
+            response = self.operation()
+            latency = time.perf_counter() - scheduled
+            sample = Sample(self.scenario_name, scheduled, latency, _is_success(response),
+                            response.status_code, len(response.content))
+        except requests.RequestException:
+            sample = Sample(self.scenario_name, scheduled, time.perf_counter() - scheduled,
+                            False, None, 0)
+        except NoTripAvailable:
+            # Not sent, so there is no latency to count
+            sample = Sample(self.scenario_name, scheduled, None, False, None, 0)
+        with self._lock:
+            self._samples.append(sample)
+        return sample.latency is not None
+
+    def run_closed(self, concurrency, duration, warmup=0):
+        """``concurrency`` users issuing back-to-back requests"""
+        start = time.perf_counter()
+        end = start + warmup + duration
+
+        def user():
+            while time.perf_counter() < end:
+                if not self._execute(time.perf_counter()):
+                    break
+
+        threads = [threading.Thread(target=user, daemon=True) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self._measured(start + warmup, end)
+
+    def run_open(self, rate, duration, warmup=0, max_workers=64, poisson=True):
+        """Start ``rate`` requests per second independent of response times"""
+        start = time.perf_counter()
+        end = start + warmup + duration
+        interval = 1.0 / rate
+        next_start = start
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while next_start < end:
+                delay = next_start - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self._execute, next_start)
+                next_start += random.expovariate(rate) if poisson else interval
+        return self._measured(start + warmup, end)
+
+    def _measured(self, measure_start, measure_end):
+        with self._lock:
+            # Running out of prepared trips during the warm-up still shows
+            samples = [s for s in self._samples if s.scheduled >= measure_start or s.latency is None]
+            self._samples = []
+        # Closed-loop users stop early when the prepared trips run out;
+        # throughput is over the time the requests actually covered
+        completed = [s.scheduled + s.latency for s in samples
+                     if s.latency is not None and s.scheduled >= measure_start]
+        end = min(measure_end, max(completed)) if completed else measure_end
+        return summarize(self.scenario_name, samples, end - measure_start)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def histogram(latencies_ms):
+    """Counts per bucket of ``HISTOGRAM_BUCKETS_MS``"""
+    counts = [0] * len(HISTOGRAM_BUCKETS_MS)
+    for value in latencies_ms:
+        for index, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+            if value <= bound:
+                counts[index] += 1
+                break
+    return counts
+
+
+def summarize(scenario, samples, duration):
+    """Aggregate statistics for a list of samples"""
+    skipped = sum(1 for s in samples if s.latency is None)
+    samples = [s for s in samples if s.latency is not None]
+    latencies = sorted(s.latency * 1000 for s in samples)
+    errors = sum(1 for s in samples if not s.ok)
+    return {
+        "scenario": scenario,
+        "requests": len(samples),
+        "errors": errors,
+        "skipped": skipped,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "duration_s": round(duration, 3),
+        "throughput_rps": len(samples) / duration if duration > 0 else 0.0,
+        "mean_ms": statistics.mean(latencies) if latencies else None,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else None,
+        "mean_response_bytes": statistics.mean(s.size for s in samples) if samples else 0,
+        "histogram": dict(zip([str(b) for b in HISTOGRAM_BUCKETS_MS], histogram(latencies))),
+    }
+
+
+def format_summary(summary):
+    """Human readable report for one summary"""
+
+    def ms(value):
+        return "-" if value is None else f"{value:.1f} ms"
+
+    lines = [
+        f"Scenario: {summary['scenario']}",
+        f"  Requests:    {summary['requests']} ({summary['errors']} errors, "
+        f"{summary['error_rate']:.1%})",
+    ]
+    if summary.get("skipped"):
+        lines.append(f"  Skipped:     {summary['skipped']} (no prepared trip left; raise --prepare-trips)")
+    lines += [
+        f"  Throughput:  {summary['throughput_rps']:.1f} req/s",
+        f"  Latency:     p50 {ms(summary['p50_ms'])}  p95 {ms(summary['p95_ms'])}  "
+        f"p99 {ms(summary['p99_ms'])}  max {ms(summary['max_ms'])}",
+        f"  Response:    {summary['mean_response_bytes']:.0f} bytes on average",
+        "  Histogram:",
+    ]
+    total = max(summary["requests"], 1)
+    for bound, count in summary["histogram"].items():
+        label = "> 5000" if bound == "inf" else f"<= {bound}"
+        bar = "#" * int(round(40 * count / total))
+        lines.append(f"    {label:>8} ms {count:>7} {bar}")
+    return "\n".join(lines)
@@ -0,0 +1,317 @@
+"""
+In-process stand-in for the Opalumpus Express API.
+
+``MockApi`` serves the same contracts as ``Backend/server.js`` from a
+thread of the test process, backed by in-memory collections:
+
+- ``GET /``                         -> ``API Working``
+- ``GET /api/trips``                -> ``{"trips": [...]}``
+- ``POST /api/trips/add``           -> ``{"success", "message", "trip"}``
+- ``PUT|DELETE /api/trips/:id``
+- ``POST /api/booknow``             -> ``{"success", "message", "boookingData"}``
+- ``POST /admin-signin``            -> 200 ``{"message": "OK"}`` or 401
+
+Latency and failures are injected per route with ``inject``, so UI tests
+run without MongoDB and can check how the frontend behaves when the API is
+slow or broken.
+
+The frontend's API base URL is fixed when it is built (VITE_API_BASE_URL),
+so the browser is pointed at the mock by ``install_api_redirect``: a script
+injected into every document that rewrites the URL of API requests made
+with XHR (axios) or fetch to the mock's address.
+"""
+
+import itertools
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from harness.seeding import SyntheticData
+
+DEFAULT_TRIP_COUNT = 6
+
+_TRIP_ID = re.compile(r"^/api/trips/(?!add$)([^/]+)$")
+
+TRIP_REQUIRED = ("destination", "duration", "price", "description")
+BOOKING_REQUIRED = ("userName", "userEmail", "numberOfPeople")
+
+API_REDIRECT_HOOK = """
+(function (target) {
+    if (window.__opalumpusApiTarget) { return; }
+    window.__opalumpusApiTarget = target;
+    var apiPath = /^(https?:\\/\\/[^\\/]+)?(\\/api\\/|\\/admin-signin)/;
+    function rewrite(url) {
+        url = String(url);
+        return apiPath.test(url) ? url.replace(/^(https?:\\/\\/[^\\/]+)?/, target) : url;
+    }
+    var open = XMLHttpRequest.prototype.open;
+    XMLHttpRequest.prototype.open = function (method, url) {
+        var args = Array.prototype.slice.call(arguments);
+        args[1] = rewrite(url);
+        return open.apply(this, args);
+    };
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function (input, init) {
+            return originalFetch.call(this, typeof input === 'string' ? rewrite(input) : input, init);
+        };
+    }
+})(%s);
+"""
+
+
+def install_api_redirect(driver, target):
+    """Send the page's API requests to ``target`` (e.g. the mock's URL)"""
+    driver.execute_cdp_cmd(
+        "Page.addScriptToEvaluateOnNewDocument",
+        {"source": API_REDIRECT_HOOK % json.dumps(target.rstrip("/"))},
+    )
+
+
+class Fault:
+    """Latency and/or an error response for requests matching ``route``"""
+
+    def __init__(self, route=None, latency_ms=0, status=None, body=None, rate=1.0, times=None):
+        self.route = route
+        self.latency_ms = latency_ms
+        self.status = status
+        self.body = body
+        self.rate = rate
+        self.remaining = times
+        self.hits = 0
+
+    def matches(self, route):
+        return self.route is None or self.route == route
+
+
+def _route(method, path):
+    """``PUT /api/trips/65a...`` -> ``PUT /api/trips/:id``"""
+    return f"{method} {_TRIP_ID.sub('/api/trips/:id', path)}"
+
+
+def _object_id(counter):
+    """24 hex digit id, shaped like a MongoDB ObjectId"""
+    return "%08x%016x" % (int(time.time()), next(counter))
+
+
+def _number(value):
+    """Cast like Mongoose's Number type: ``"2"`` -> ``2``"""
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.") + "000Z"
+
+
+class MockApi:
+    """
+    Threaded HTTP server implementing the Express API contracts in memory.
+    ``latency_ms`` and ``error_rate`` apply to every route; ``inject`` adds
+    route-specific faults on top.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0, error_rate=0.0,
+                 trips=DEFAULT_TRIP_COUNT, seed=None):
+        self.default_latency_ms = latency_ms
+        self.default_error_rate = error_rate
+        self.initial_trips = trips
+        self.admins = {
+            os.getenv("ADMIN_USERNAME", "admin"): os.getenv("ADMIN_PASSWORD", "admin123"),
+        }
+        self._random = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._server.daemon_threads = True
+        self._thread = None
+        self.reset()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True,
+                                        name="opalumpus-mock-api")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self):
+        """Restore the initial catalogue, drop bookings, faults and the request log"""
+        with self._lock:
+            self.trips = {}
+            for trip in SyntheticData("mock").trips(self.initial_trips):
+                self._insert_trip(trip)
+            self.bookings = []
+            self.requests = []
+            self.faults = []
+
+    def inject(self, route=None, latency_ms=0, status=None, body=None, rate=1.0, times=None):
+        """
+        Delay and/or fail requests to ``route`` (``"POST /api/booknow"``,
+        ``"GET /api/trips"``, ``"PUT /api/trips/:id"``; None for every
+        route). ``rate`` is the share of matching requests affected and
+        ``times`` limits how many are affected in total.
+        """
+        fault = Fault(route, latency_ms, status, body, rate, times)
+        with self._lock:
+            self.faults.append(fault)
+        return fault
+
+    def clear_faults(self):
+        with self._lock:
+            self.faults = []
+
+    def requests_to(self, route):
+        """Logged requests (route, path, body, time) for ``route``"""
+        with self._lock:
+            return [r for r in self.requests if r["route"] == route]
+
+    def _insert_trip(self, fields):
+        trip = {"_id": _object_id(self._ids)}
+        trip.update({name: fields[name] for name in TRIP_REQUIRED})
+        trip["__v"] = 0
+        self.trips[trip["_id"]] = trip
+        return trip
+
+    def _plan(self, route):
+        """(latency seconds, error response or None) for one request"""
+        latency = self.default_latency_ms
+        error = None
+        with self._lock:
+            if self.default_error_rate and self._random.random() < self.default_error_rate:
+                error = (500, {"success": False, "message": "Injected error"})
+            for fault in self.faults:
+                if not fault.matches(route) or fault.remaining == 0:
+                    continue
+                if fault.rate < 1.0 and self._random.random() >= fault.rate:
+                    continue
+                fault.hits += 1
+                if fault.remaining is not None:
+                    fault.remaining -= 1
+                latency += fault.latency_ms
+                if fault.status is not None:
+                    error = (fault.status, fault.body if fault.body is not None
+                             else {"success": False, "message": "Injected error"})
+        return latency / 1000.0, error
+
+    def handle(self, method, path, body):
+        """Return (status, payload) for a request; payload is JSON or text"""
+        route = _route(method, path)
+        with self._lock:
+            self.requests.append({"route": route, "path": path, "body": body, "time": time.time()})
+
+        latency, error = self._plan(route)
+        if latency:
+            time.sleep(latency)
+        if error:
+            return error
+
+        match = _TRIP_ID.match(path)
+        with self._lock:
+            if route == "GET /":
+                return 200, "API Working"
+            if route == "GET /api/trips":
+                return 200, {"trips": list(self.trips.values())}
+            if route == "POST /api/trips/add":
+                if not isinstance(body, dict) or any(body.get(f) in (None, "") for f in TRIP_REQUIRED):
+                    return 200, {"success": False, "message": "Error"}
+                return 200, {"success": True, "message": "Trip added", "trip": self._insert_trip(body)}
+            if match and method == "PUT":
+                trip = self.trips.get(match.group(1))
+                if trip and isinstance(body, dict):
+                    trip.update({k: v for k, v in body.items() if k in TRIP_REQUIRED})
+                return 200, trip
+            if match and method == "DELETE":
+                self.trips.pop(match.group(1), None)
+                return 200, {"success": True, "message": "Trip deleted"}
+            if route == "POST /api/booknow":
+                if not isinstance(body, dict) or any(body.get(f) in (None, "") for f in BOOKING_REQUIRED):
+                    return 200, {"success": False, "message": "Error"}
+                try:
+                    people = _number(body["numberOfPeople"])
+                except (TypeError, ValueError):
+                    # Mongoose rejects the document with a CastError
+                    return 200, {"success": False, "message": "Error"}
+                booking = {
+                    "_id": _object_id(self._ids),
+                    "userName": body["userName"],
+                    "userEmail": body["userEmail"],
+                    "numberOfPeople": people,
+                    "bookingDate": body.get("bookingDate") or _now(),
+                    "additionalNotes": body.get("additionalNotes"),
+                    "__v": 0,
+                }
+                self.bookings.append(booking)
+                return 200, {"success": True, "message": "Booking added added", "boookingData": booking}
+            if route == "POST /admin-signin":
+                body = body if isinstance(body, dict) else {}
+                username = body.get("username")
+                if username not in self.admins or self.admins[username] != body.get("password"):
+                    return 401, {"message": "Invalid username or password"}
+                return 200, {"message": "OK"}
+        return 404, f"Cannot {method} {path}"
+
+
+def _handler_for(api):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are separate writes; without this every
+        # keep-alive response waits for the client's delayed ACK
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _cors_headers(self):
+            # Same as the Express cors() middleware, plus Private Network
+            # Access for pages served from a non-local address
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Access-Control-Allow-Methods", "GET,HEAD,PUT,PATCH,POST,DELETE")
+            self.send_header("Access-Control-Allow-Headers",
+                             self.headers.get("Access-Control-Request-Headers", "Content-Type"))
+            self.send_header("Access-Control-Allow-Private-Network", "true")
+
+        def _respond(self, status, payload):
+            if isinstance(payload, str):
+                data, content_type = payload.encode("utf-8"), "text/html; charset=utf-8"
+            else:
+                data, content_type = json.dumps(payload).encode("utf-8"), "application/json; charset=utf-8"
+            self.send_response(status)
+            self._cors_headers()
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _dispatch(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            try:
+                body = json.loads(raw) if raw else {}
+            except ValueError:
+                self._respond(400, {"message": "Invalid JSON"})
+                return
+            self._respond(*api.handle(self.command, self.path.split("?")[0], body))
+
+        def do_OPTIONS(self):
+            self.send_response(204)
+            self._cors_headers()
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+    return Handler
@@ -0,0 +1,318 @@
+"""
+Network request capture and per-route asset-weight analysis.
+
+Chrome's performance log (``goog:loggingPrefs``) carries the DevTools
+``Network.*`` events of every page. ``NetworkCapture`` drains the log at the
+start of a test and turns the events into one record per request at the
+end of it:
+
+- URL, method, resource type, HTTP status and MIME type
+- transfer size (bytes on the wire) and decoded size
+- timing: duration and time to first byte
+- cache status: network, disk, memory, revalidated (304), service-worker
+- ``Content-Encoding`` of the response
+
+Requests are attributed to the route of the document that made them.
+``AssetReport`` aggregates them per route and flags
+
+- compressible responses (JS, CSS, HTML, JSON, SVG) sent without encoding
+- duplicate fetches: the same URL requested more than once by one page load
+  (e.g. ``GET /api/trips`` twice on mount)
+- oversized images: more than ``IMAGE_BUDGET_KB`` on the wire, or decoded
+  far larger than they are displayed (see ``record_image_sizes``)
+"""
+
+import json
+import statistics
+import threading
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+from selenium.common.exceptions import WebDriverException
+
+IMAGE_BUDGET_KB = 200
+
+# Natural pixels per displayed (device) pixel above which an image counts
+# as oversized for its slot
+IMAGE_OVERSIZE_RATIO = 2.0
+
+# Responses smaller than this are not worth compressing
+COMPRESSIBLE_MIN_BYTES = 1024
+
+COMPRESSIBLE_TYPES = ("javascript", "css", "html", "json", "svg", "xml", "text/plain")
+
+_IMAGE_SIZES_SCRIPT = """
+return Array.from(document.images).filter(function (img) {
+    return img.complete && img.naturalWidth > 0;
+}).map(function (img) {
+    return {
+        url: img.currentSrc || img.src,
+        natural: [img.naturalWidth, img.naturalHeight],
+        displayed: [img.clientWidth, img.clientHeight],
+        dpr: window.devicePixelRatio || 1
+    };
+});
+"""
+
+
+def enable_performance_logging(options):
+    """Ask ChromeDriver to keep the DevTools Network events in the ``performance`` log"""
+    prefs = dict(options.capabilities.get("goog:loggingPrefs", {}), performance="ALL")
+    options.set_capability("goog:loggingPrefs", prefs)
+    options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+
+def _read_log(driver):
+    try:
+        return driver.get_log("performance")
+    except WebDriverException:
+        return []
+
+
+def _route(url):
+    return urlparse(url).path or "/"
+
+
+def _header(headers, name):
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _cache_status(record, response):
+    if response.get("fromServiceWorker"):
+        return "service-worker"
+    if response.get("fromDiskCache"):
+        return "disk"
+    if response.get("fromPrefetchCache") or record.get("servedFromCache"):
+        return "memory"
+    if response.get("status") == 304:
+        return "revalidated"
+    return "network"
+
+
+def parse_events(entries):
+    """
+    Build request records from performance log entries. Redirects end the
+    previous hop's record and start a new one under the same request id.
+    """
+    pending, records = {}, []
+
+    def finish(request_id):
+        record = pending.pop(request_id, None)
+        if record:
+            records.append(record)
+        return record
+
+    for entry in entries:
+        message = json.loads(entry["message"])["message"]
+        method, params = message.get("method", ""), message.get("params", {})
+        request_id = params.get("requestId")
+
+        if method == "Network.requestWillBeSent":
+            if params.get("redirectResponse"):
+                record = finish(request_id)
+                if record:
+                    record["status"] = params["redirectResponse"].get("status")
+                    record["redirect"] = True
+            request = params["request"]
+            pending[request_id] = {
+                "url": request["url"],
+                "method": request.get("method", "GET"),
+                "type": params.get("type", "Other"),
+                "route": _route(params.get("documentURL") or request["url"]),
+                "loader": params.get("loaderId"),
+                "started": params.get("timestamp"),
+                "status": None,
+                "mime": None,
+                "encoding": None,
+                "cache": "network",
+                "transfer_bytes": 0,
+                "decoded_bytes": 0,
+                "duration_ms": None,
+                "ttfb_ms": None,
+                "failed": None,
+            }
+            continue
+
+        record = pending.get(request_id)
+        if record is None:
+            continue
+
+        if method == "Network.requestServedFromCache":
+            record["servedFromCache"] = True
+        elif method == "Network.responseReceived":
+            response = params["response"]
+            record["status"] = response.get("status")
+            record["mime"] = response.get("mimeType")
+            record["encoding"] = _header(response.get("headers"), "content-encoding")
+            record["cache"] = _cache_status(record, response)
+            timing = response.get("timing")
+            if timing:
+                record["ttfb_ms"] = round(timing["receiveHeadersEnd"] - timing["sendStart"], 1)
+        elif method == "Network.dataReceived":
+            record["decoded_bytes"] += params.get("dataLength", 0)
+        elif method == "Network.loadingFinished":
+            record["transfer_bytes"] = int(params.get("encodedDataLength", 0))
+            record["duration_ms"] = round((params["timestamp"] - record["started"]) * 1000, 1)
+            finish(request_id)
+        elif method == "Network.loadingFailed":
+            record["failed"] = params.get("errorText") or "failed"
+            record["duration_ms"] = round((params["timestamp"] - record["started"]) * 1000, 1)
+            finish(request_id)
+
+    # Requests still in flight when the test ended (long polls, aborted loads)
+    records.extend(pending.values())
+    for record in records:
+        record.pop("servedFromCache", None)
+    return records
+
+
+class NetworkCapture:
+    """Per-test view of a driver's network traffic"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._entries = []
+
+    def start(self):
+        """Discard events from before the test (previous test, pool reset)"""
+        _read_log(self.driver)
+        self._entries = []
+
+    def records(self):
+        """Request records so far, e.g. for the artifacts of a failure; capturing goes on"""
+        self._entries.extend(_read_log(self.driver))
+        records = parse_events(self._entries)
+        return [r for r in records if urlparse(r["url"]).scheme in ("http", "https")]
+
+    def stop(self):
+        """Request records for everything the test's pages loaded"""
+        records = self.records()
+        self._entries = []
+        return records
+
+
+def record_image_sizes(driver):
+    """Natural vs displayed size of every loaded <img> on the current page"""
+    try:
+        return driver.execute_script(_IMAGE_SIZES_SCRIPT) or []
+    except WebDriverException:
+        return []
+
+
+def _is_compressible(record):
+    mime = (record.get("mime") or "").lower()
+    return any(kind in mime for kind in COMPRESSIBLE_TYPES)
+
+
+def _short(url):
+    parsed = urlparse(url)
+    return unquote(parsed.path) + (f"?{parsed.query}" if parsed.query else "")
+
+
+def find_issues(records, images=()):
+    """Findings for the requests of one test, as (route, kind, message)"""
+    issues = []
+    seen = {}
+    for record in records:
+        if record["failed"] or record["cache"] != "network":
+            continue
+
+        key = (record["loader"], record["method"], record["url"])
+        seen[key] = seen.get(key, 0) + 1
+        if seen[key] == 2:
+            issues.append((record["route"], "duplicate",
+                           f"{record['method']} {_short(record['url'])} requested more than once "
+                           f"by one page load"))
+        if seen[key] > 1:
+            continue
+
+        size_kb = max(record["transfer_bytes"], record["decoded_bytes"]) / 1024
+        if _is_compressible(record) and not record["encoding"] \
+                and record["decoded_bytes"] >= COMPRESSIBLE_MIN_BYTES:
+            issues.append((record["route"], "uncompressed",
+                           f"{_short(record['url'])} ({record['mime']}, "
+                           f"{record['decoded_bytes'] / 1024:.0f} KB) sent without compression"))
+
+        if record["type"] == "Image" and size_kb > IMAGE_BUDGET_KB:
+            issues.append((record["route"], "oversized-image",
+                           f"{_short(record['url'])} is {size_kb:.0f} KB (budget {IMAGE_BUDGET_KB} KB)"))
+
+    for route, image in images:
+        natural = image["natural"][0] * image["natural"][1]
+        displayed = image["displayed"][0] * image["displayed"][1] * image["dpr"] ** 2
+        if displayed and natural / displayed > IMAGE_OVERSIZE_RATIO ** 2:
+            issues.append((route, "oversized-image",
+                           f"{_short(image['url'])} is {image['natural'][0]}x{image['natural'][1]} "
+                           f"but displayed at {image['displayed'][0]}x{image['displayed'][1]}"))
+    return issues
+
+
+class AssetReport:
+    """Requests and findings of a whole session, per route"""
+
+    def __init__(self):
+        self.tests = []
+        self._lock = threading.Lock()
+
+    def add(self, test, records, images=()):
+        issues = find_issues(records, images)
+        with self._lock:
+            self.tests.append({"test": test, "requests": records, "issues": issues})
+        return issues
+
+    def by_route(self):
+        """
+        Per route: median request count and weight per page load, bytes per
+        resource type, and the distinct findings.
+        """
+        loads, issues = {}, {}
+        for test in self.tests:
+            for record in test["requests"]:
+                loads.setdefault(record["route"], {}).setdefault(record["loader"], []).append(record)
+            for route, kind, message in test["issues"]:
+                issues.setdefault(route, {}).setdefault(message, kind)
+
+        routes = {}
+        for route, page_loads in loads.items():
+            by_type = {}
+            for records in page_loads.values():
+                for record in records:
+                    by_type[record["type"]] = by_type.get(record["type"], 0) + record["transfer_bytes"]
+            routes[route] = {
+                "page_loads": len(page_loads),
+                "requests": statistics.median(len(r) for r in page_loads.values()),
+                "transfer_kb": round(statistics.median(
+                    sum(x["transfer_bytes"] for x in r) for r in page_loads.values()) / 1024, 1),
+                "kb_per_type": {
+                    kind: round(total / len(page_loads) / 1024, 1)
+                    for kind, total in sorted(by_type.items(), key=lambda item: -item[1])
+                },
+                "issues": [{"kind": kind, "message": message}
+                           for message, kind in sorted(issues.get(route, {}).items(), key=lambda i: i[1])],
+            }
+        return routes
+
+    def write(self, path):
+        """Write the per-route report and the raw requests as JSON"""
+        if not self.tests:
+            return None
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"routes": self.by_route(), "tests": self.tests}, f, indent=2)
+        return path
+
+
+def format_report(routes):
+    """Text summary of ``AssetReport.by_route``"""
+    lines = []
+    for route, data in sorted(routes.items(), key=lambda item: -item[1]["transfer_kb"]):
+        types = ", ".join(f"{kind} {kb:.0f} KB" for kind, kb in data["kb_per_type"].items())
+        lines.append(f"{route}: {data['requests']:.0f} requests, {data['transfer_kb']:.0f} KB "
+                     f"per load ({types})")
+        for issue in data["issues"]:
+            lines.append(f"    [{issue['kind']}] {issue['message']}")
+    return "\n".join(lines)
@@ -0,0 +1,335 @@
+"""
+Page objects for the Opalumpus SPA.
+
+Every page declares its elements once as ``Locator`` attributes::
+
+    class BookNowPage(Page):
+        path = "/book-now"
+        user_name = Locator(By.ID, "userName")
+
+and the tests use ``page.user_name`` instead of ``driver.find_element``.
+Each WebDriver call is a round-trip to the browser, so the page keeps the
+element handles it has looked up:
+
+- an element is looked up on first use and the handle is reused after that
+- ``open`` and navigating away (``go``) drop all handles
+- a handle that went stale because React re-rendered the element is looked
+  up again and the call retried once
+
+Reading several fields (``values``, ``snapshot``, ``text``) is one
+``execute_script`` call however many fields are read, instead of one
+``get_attribute`` per field. ``assert_dom`` checks a ``harness.dom`` spec
+keyed by locator names the same way.
+"""
+
+from urllib.parse import urlparse
+
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+
+from harness import dom
+from harness.waits import DEFAULT_TIMEOUT, open_page, wait_for, wait_until_ready
+
+_VALUES_SCRIPT = """
+var result = {};
+arguments[0].forEach(function (field) {
+    var el = document.querySelector(field[1]);
+    result[field[0]] = el ? ('value' in el ? el.value : el.textContent.trim()) : null;
+});
+return result;
+"""
+
+_SNAPSHOT_SCRIPT = """
+var result = {};
+arguments[0].forEach(function (field) {
+    var el = document.querySelector(field[1]);
+    if (!el) { result[field[0]] = null; return; }
+    var style = window.getComputedStyle(el), rect = el.getBoundingClientRect();
+    result[field[0]] = {
+        tag: el.tagName.toLowerCase(),
+        type: el.getAttribute('type'),
+        value: 'value' in el ? el.value : null,
+        text: el.textContent.trim(),
+        required: !!el.required,
+        displayed: style.display !== 'none' && style.visibility !== 'hidden'
+            && rect.width > 0 && rect.height > 0
+    };
+});
+return result;
+"""
+
+_TEXTS_SCRIPT = """
+return Array.from(document.querySelectorAll(arguments[0]), function (el) {
+    return el.textContent.trim();
+});
+"""
+
+
+class Locator:
+    """An element of a page, looked up on first use and then cached"""
+
+    def __init__(self, by, value):
+        self.by = by
+        self.value = value
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, page, owner):
+        if page is None:
+            return self
+        return page.element(self.name)
+
+    @property
+    def locator(self):
+        return (self.by, self.value)
+
+    @property
+    def css(self):
+        """CSS selector for the batched reads (XPath locators cannot be batched)"""
+        if self.by == By.CSS_SELECTOR:
+            return self.value
+        if self.by == By.ID:
+            return f'[id="{self.value}"]'
+        if self.by == By.NAME:
+            return f'[name="{self.value}"]'
+        if self.by == By.CLASS_NAME:
+            return f".{self.value}"
+        if self.by == By.TAG_NAME:
+            return self.value
+        raise ValueError(f"{self.by} locator {self.name!r} cannot be read in a batch")
+
+
+class Element:
+    """
+    Cached handle of a ``Locator``. Attribute access and method calls are
+    forwarded to the WebElement; on a stale handle the element is looked up
+    again and the call retried once.
+    """
+
+    def __init__(self, page, locator):
+        self._page = page
+        self._locator = locator
+        self._element = None
+
+    def resolve(self):
+        """The underlying WebElement, looked up if not cached"""
+        if self._element is None:
+            self._element = self._page.driver.find_element(*self._locator.locator)
+        return self._element
+
+    def cache(self, element):
+        self._element = element
+
+    def invalidate(self):
+        self._element = None
+
+    def _retry_stale(self, action):
+        try:
+            return action(self.resolve())
+        except StaleElementReferenceException:
+            self.invalidate()
+            return action(self.resolve())
+
+    def __getattr__(self, name):
+        value = self._retry_stale(lambda element: getattr(element, name))
+        if not callable(value):
+            return value
+
+        def call(*args, **kwargs):
+            return self._retry_stale(lambda element: getattr(element, name)(*args, **kwargs))
+
+        return call
+
+    def __repr__(self):
+        return f"<Element {self._locator.name} {self._locator.locator}>"
+
+
+class Page:
+    """
+    Base class of the page objects. ``path`` is the SPA route the page is
+    served at.
+    """
+
+    path = "/"
+
+    # Present on every page that has the NavBar
+    nav = Locator(By.TAG_NAME, "nav")
+    hero_title = Locator(By.CSS_SELECTOR, ".HeroText h1")
+
+    def __init__(self, driver, base_url):
+        self.driver = driver
+        self.base_url = base_url.rstrip("/")
+        self._elements = {}
+
+    @property
+    def url(self):
+        return f"{self.base_url}{self.path}"
+
+    @classmethod
+    def locators(cls):
+        """All ``Locator`` attributes of the page, by name"""
+        found = {}
+        for klass in reversed(cls.__mro__):
+            for name, value in vars(klass).items():
+                if isinstance(value, Locator):
+                    found[name] = value
+        return found
+
+    def _locator(self, name):
+        locator = self.locators().get(name)
+        if locator is None:
+            raise AttributeError(f"{type(self).__name__} has no locator {name!r}")
+        return locator
+
+    def element(self, name):
+        """Cached handle of the locator ``name``"""
+        if name not in self._elements:
+            self._elements[name] = Element(self, self._locator(name))
+        return self._elements[name]
+
+    def invalidate(self):
+        """Forget every cached handle (e.g. after the page was replaced)"""
+        self._elements = {}
+
+    def open(self, timeout=DEFAULT_TIMEOUT):
+        """Navigate to the page and wait until it is ready"""
+        self.invalidate()
+        open_page(self.driver, self.url, timeout)
+        return self
+
+    def go(self, page_class, timeout=DEFAULT_TIMEOUT):
+        """Page object for ``page_class`` once the SPA has navigated there"""
+        page = page_class(self.driver, self.base_url)
+        wait_until_ready(self.driver, page.path, timeout)
+        self.invalidate()
+        return page
+
+    def is_current(self):
+        """Whether the browser is showing this page's route"""
+        return (urlparse(self.driver.current_url).path.rstrip("/") or "/") == (self.path.rstrip("/") or "/")
+
+    def wait_for(self, name, timeout=DEFAULT_TIMEOUT):
+        """Wait until the locator ``name`` is in the DOM; returns its cached handle"""
+        element = self.element(name)
+        element.cache(wait_for(self.driver, EC.presence_of_element_located(self._locator(name).locator),
+                               timeout, f"{name} not found on {self.path}"))
+        return element
+
+    def values(self, *names):
+        """``{name: value}`` of the fields (text for non-inputs, None if absent), in one call"""
+        names = names or tuple(self.locators())
+        fields = [[name, self._locator(name).css] for name in names]
+        return self.driver.execute_script(_VALUES_SCRIPT, fields)
+
+    def snapshot(self, *names):
+        """
+        ``{name: {tag, type, value, text, required, displayed}}`` (None if
+        absent) of the locators, in one call
+        """
+        names = names or tuple(self.locators())
+        fields = [[name, self._locator(name).css] for name in names]
+        return self.driver.execute_script(_SNAPSHOT_SCRIPT, fields)
+
+    def _dom_spec(self, spec):
+        locators = self.locators()
+        return {locators[key].css if key in locators else key: value for key, value in spec.items()}
+
+    def check_dom(self, spec):
+        """``harness.dom.check_dom`` with locator names allowed as keys of ``spec``"""
+        return dom.check_dom(self.driver, self._dom_spec(spec))
+
+    def assert_dom(self, spec, message=""):
+        """``harness.dom.assert_dom`` with locator names allowed as keys of ``spec``"""
+        dom.assert_dom(self.driver, self._dom_spec(spec), message)
+
+    def texts(self, css):
+        """Text of every element matching ``css``, in one call"""
+        return self.driver.execute_script(_TEXTS_SCRIPT, css)
+
+    def text(self):
+        """Visible text of the whole page"""
+        return self.driver.execute_script("return document.body.innerText;")
+
+
+class HomePage(Page):
+    path = "/"
+    travel_plan = Locator(By.CSS_SELECTOR, ".HeroText a.travelBtnClass")
+
+
+class TripsPage(Page):
+    path = "/trips"
+    events_heading = Locator(By.CSS_SELECTOR, ".upcoming-events-container h2")
+
+    EVENT = ".event-item"
+
+    def trip_count(self):
+        return self.driver.execute_script("return document.querySelectorAll(arguments[0]).length;",
+                                          self.EVENT)
+
+    def trip_titles(self):
+        return self.texts(f"{self.EVENT} h3")
+
+    def book(self, index=0, timeout=DEFAULT_TIMEOUT):
+        """Click "Book Now" on the ``index``-th trip; returns the booking page"""
+        self.driver.find_elements(By.CSS_SELECTOR, f"{self.EVENT} .book-now-btn")[index].click()
+        return self.go(BookNowPage, timeout)
+
+
+class AboutPage(Page):
+    path = "/about"
+
+
+class ContactUsPage(Page):
+    path = "/contactus"
+
+
+class SignInPage(Page):
+    path = "/admin-signin"
+    username = Locator(By.ID, "username")
+    password = Locator(By.ID, "password")
+    submit_button = Locator(By.CSS_SELECTOR, "button[type='submit']")
+
+    def submit(self, username, password):
+        """Fill in the credentials and submit the form"""
+        self.username.send_keys(username)
+        self.password.send_keys(password)
+        self.submit_button.click()
+
+
+class BookNowPage(Page):
+    path = "/book-now"
+    user_name = Locator(By.ID, "userName")
+    user_email = Locator(By.ID, "userEmail")
+    number_of_people = Locator(By.ID, "numberOfPeople")
+    additional_notes = Locator(By.ID, "additionalNotes")
+    submit_button = Locator(By.CSS_SELECTOR, "button[type='submit']")
+    return_button = Locator(By.CLASS_NAME, "return-btn")
+
+    FIELDS = ("user_name", "user_email", "number_of_people", "additional_notes")
+
+    def fill(self, name, email, people, notes=""):
+        """Type a booking into the form"""
+        for field, value in zip(self.FIELDS, (name, email, str(people), notes)):
+            element = self.element(field)
+            element.clear()
+            if value:
+                element.send_keys(value)
+
+    def submit(self):
+        self.submit_button.click()
+
+    def form(self):
+        """Current value of every booking field, in one call"""
+        return self.values(*self.FIELDS)
+
+
+class TripFormPage(Page):
+    path = "/trip-form"
+    destination = Locator(By.ID, "destination")
+    duration = Locator(By.ID, "duration")
+    price = Locator(By.ID, "price")
+    description = Locator(By.ID, "description")
+    submit_button = Locator(By.CSS_SELECTOR, "button[type='submit']")
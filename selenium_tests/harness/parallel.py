@@ -0,0 +1,240 @@
+"""
+Parallel execution of the suite across worker processes.
+
+``run_tests.py --workers N`` collects the selected tests once, splits them
+into N shards of about equal expected duration (from the test history, see
+``harness/selection.py``) and runs one pytest process per shard. Each worker
+appends its results to its own stream (``harness/results.py``); while the
+workers run, every finished test is printed as a progress line, and
+``run_tests.py`` renders ``results.xml`` and ``report.html`` from the
+streams afterwards. The full output of each worker is kept in
+``.parallel/`` and echoed once it has finished.
+
+Workers learn their identity from the ``OPALUMPUS_WORKER_ID`` environment
+variable, which the driver pool uses to give every Chrome instance its own
+user-data directory and remote-debugging port range.
+"""
+
+import os
+import re
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+
+from harness.results import StreamFollower, Tally, format_progress
+from harness.selection import DEFAULT_HISTORY_FILE, TestHistory, shard_by_duration
+
+WORKER_ID_ENV = "OPALUMPUS_WORKER_ID"
+WORKER_COUNT_ENV = "OPALUMPUS_WORKER_COUNT"
+RUN_ID_ENV = "OPALUMPUS_RUN_ID"
+
+# Rough resident size of one headless Chrome plus chromedriver
+CHROME_MEMORY_MB = 300
+
+# Each worker gets its own block of remote-debugging ports
+DEBUG_PORT_BASE = 9222
+DEBUG_PORTS_PER_WORKER = 100
+
+WORK_DIR = Path(".parallel")
+
+# Test modules that must see the results of every shard
+FINAL_PASS_MODULES = ("test_performance_budgets.py",)
+
+# Seconds between looks at the results streams while workers run
+PROGRESS_INTERVAL = 1.0
+
+
+def worker_id():
+    """Index of the current worker process (0 when not running in parallel)"""
+    return int(os.getenv(WORKER_ID_ENV, "0"))
+
+
+def current_run_id():
+    """Identifier shared by all workers of one suite run"""
+    run_id = os.getenv(RUN_ID_ENV)
+    if not run_id:
+        run_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+        os.environ[RUN_ID_ENV] = run_id
+    return run_id
+
+
+def debug_port_range():
+    """Remote-debugging ports reserved for the current worker"""
+    start = DEBUG_PORT_BASE + worker_id() * DEBUG_PORTS_PER_WORKER
+    return range(start, start + DEBUG_PORTS_PER_WORKER)
+
+
+def available_memory_mb():
+    """Best-effort available physical memory, or None if unknown"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+
+    if os.name == "nt":
+        import ctypes
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("sullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys // (1024 * 1024)
+
+    return None
+
+
+def auto_worker_count(memory_per_worker_mb=CHROME_MEMORY_MB):
+    """Size the worker pool by CPU cores, capped by available memory"""
+    workers = os.cpu_count() or 1
+    memory = available_memory_mb()
+    if memory is not None:
+        workers = min(workers, memory // memory_per_worker_mb)
+    return max(1, workers)
+
+
+def collect_test_ids(pytest_cmd, pytest_args):
+    """Return the node ids pytest would run for ``pytest_args``"""
+    # Verbosity flags (including the -v in pytest.ini addopts) change the
+    # collect-only output format, so force the plain one-id-per-line form.
+    selection = [a for a in pytest_args if not re.fullmatch(r"-[vq]+|--verbose|--quiet", a)]
+    result = subprocess.run(
+        pytest_cmd + ["-o", "addopts=", "--collect-only", "-q"] + selection,
+        capture_output=True,
+        text=True,
+    )
+    return [line.strip() for line in result.stdout.splitlines() if "::" in line]
+
+
+def option_value(pytest_args, name, env, default):
+    """Value of a conftest.py option in ``pytest_args``, else its environment default"""
+    for index, arg in enumerate(pytest_args):
+        if arg.startswith(f"{name}="):
+            return arg.split("=", 1)[1]
+        if arg == name and index + 1 < len(pytest_args):
+            return pytest_args[index + 1]
+    return os.getenv(env, default)
+
+
+def split_report_args(pytest_args):
+    """
+    Separate the report options (--html, --junit-xml, ...) from the rest of
+    the pytest arguments: ``run_tests.py`` renders the reports from the
+    results streams instead. Returns (remaining_args, html_path, junit_path).
+    """
+    remaining = []
+    html_path = junit_path = None
+    args = iter(pytest_args)
+    for arg in args:
+        if arg.startswith("--html="):
+            html_path = arg.split("=", 1)[1]
+        elif arg == "--html":
+            html_path = next(args)
+        elif arg.startswith(("--junit-xml=", "--junitxml=")):
+            junit_path = arg.split("=", 1)[1]
+        elif arg in ("--junit-xml", "--junitxml"):
+            junit_path = next(args)
+        elif arg == "--self-contained-html":
+            continue
+        else:
+            remaining.append(arg)
+    return remaining, html_path, junit_path
+
+
+def run_parallel(pytest_cmd, pytest_args, workers, results_dir):
+    """
+    Run the suite sharded across ``workers`` processes, printing each
+    finished test from the results streams in ``results_dir``. Returns the
+    overall exit code.
+    """
+    test_ids = collect_test_ids(pytest_cmd, pytest_args)
+    if not test_ids:
+        print("No tests collected.")
+        return 5
+
+    # Budget checks need every worker's page timings, so they run in a
+    # final pass once all shards are done
+    final_ids = [t for t in test_ids if t.startswith(FINAL_PASS_MODULES)]
+    test_ids = [t for t in test_ids if t not in final_ids]
+
+    durations = TestHistory(option_value(pytest_args, "--history-file", "TEST_HISTORY_FILE", DEFAULT_HISTORY_FILE)).durations(test_ids)
+    balanced = shard_by_duration(test_ids, workers, durations)
+    shards = [shard_ids for shard_ids, _ in balanced]
+    WORK_DIR.mkdir(exist_ok=True)
+    print(f"Running {len(test_ids)} tests across {len(shards)} workers "
+          f"(expected {', '.join(f'{load:.0f}s' for _, load in balanced)})\n")
+
+    # The run id is exported to the workers through the environment
+    progress = Progress(StreamFollower(results_dir, current_run_id()))
+    count = len(shards) + bool(final_ids)
+    returncode = _wait_for_workers([
+        _start_worker(pytest_cmd, pytest_args, shard_ids, index, count)
+        for index, shard_ids in enumerate(shards)
+    ], progress)
+    if final_ids:
+        final = _start_worker(pytest_cmd, pytest_args, final_ids, len(shards), count)
+        returncode = _wait_for_workers([final], progress) or returncode
+    print(f"\n{progress.tally.summary()}")
+    return returncode
+
+
+class Progress:
+    """Prints the tests that finished since the last ``update``"""
+
+    def __init__(self, follower):
+        self.follower = follower
+        self.tally = Tally()
+
+    def update(self):
+        for event in self.follower.poll():
+            self.tally.add(event)
+            if event.get("event") == "test":
+                print(format_progress(event, self.tally), flush=True)
+
+
+def _start_worker(pytest_cmd, base_args, test_ids, index, count):
+    """Launch one pytest worker process"""
+    env = dict(os.environ)
+    env[WORKER_ID_ENV] = str(index)
+    env[WORKER_COUNT_ENV] = str(count)
+    env["PYTHONUNBUFFERED"] = "1"
+
+    cmd = pytest_cmd + base_args + test_ids
+    log = open(WORK_DIR / f"worker-{index}.log", "w", encoding="utf-8")
+    process = subprocess.Popen(cmd, env=env, stdout=log, stderr=subprocess.STDOUT)
+    return index, process, log
+
+
+def _wait_for_workers(processes, progress):
+    """
+    Print progress until every worker has exited, then echo their output.
+    Returns the first failing exit code.
+    """
+    while any(process.poll() is None for _, process, _ in processes):
+        progress.update()
+        time.sleep(PROGRESS_INTERVAL)
+    progress.update()
+
+    returncode = 0
+    for index, process, log in processes:
+        code = process.returncode
+        log.close()
+        returncode = returncode or code
+        print(f"{'-' * 20} worker {index} (exit code {code}) {'-' * 20}")
+        print((WORK_DIR / f"worker-{index}.log").read_text(encoding="utf-8"))
+    return returncode
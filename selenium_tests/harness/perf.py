@@ -0,0 +1,153 @@
+"""
+Page-load and Web Vitals capture for every route the suite visits.
+
+After each ``open_page`` the recorder evaluates a snippet through CDP
+(``Runtime.evaluate``) that reads the browser's Performance API:
+
+- Navigation Timing: TTFB, DOMContentLoaded, load
+- Paint Timing: first-contentful-paint
+- LCP and CLS, collected by PerformanceObservers injected into every
+  document before the app starts (see ``VITALS_OBSERVER_HOOK``)
+- Resource Timing: total transfer size, image bytes and the heaviest
+  resources, so the effect of the hero images is visible
+
+Samples are grouped per route and written to
+``<perf dir>/<run id>-w<worker>.json`` at the end of the session; all
+workers of a parallel run share the same run id.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+from harness.parallel import current_run_id, worker_id
+from harness.profiles import summarize_cells
+
+DEFAULT_PERF_DIR = "perf_results"
+
+# LCP and CLS are only observable through PerformanceObserver, which has to
+# be registered before the entries are emitted.
+VITALS_OBSERVER_HOOK = """
+(function () {
+    if (window.__opalumpusVitals || !window.PerformanceObserver) { return; }
+    var vitals = window.__opalumpusVitals = {lcp: null, cls: 0};
+    try {
+        new PerformanceObserver(function (list) {
+            var entries = list.getEntries();
+            var last = entries[entries.length - 1];
+            vitals.lcp = last.renderTime || last.loadTime || last.startTime;
+            vitals.lcpElement = last.element ? (last.element.currentSrc || last.element.tagName) : null;
+        }).observe({type: 'largest-contentful-paint', buffered: true});
+        new PerformanceObserver(function (list) {
+            list.getEntries().forEach(function (entry) {
+                if (!entry.hadRecentInput) { vitals.cls += entry.value; }
+            });
+        }).observe({type: 'layout-shift', buffered: true});
+    } catch (e) {}
+})();
+"""
+
+_COLLECT_SCRIPT = """
+(function () {
+    var nav = performance.getEntriesByType('navigation')[0] || {};
+    var fcp = performance.getEntriesByType('paint').filter(function (p) {
+        return p.name === 'first-contentful-paint';
+    })[0];
+    var vitals = window.__opalumpusVitals || {};
+    var imagePattern = /\\.(png|jpe?g|gif|webp|avif|svg)(\\?|$)/i;
+
+    var transfer = nav.transferSize || nav.encodedBodySize || 0;
+    var imageBytes = 0;
+    var resources = performance.getEntriesByType('resource').map(function (r) {
+        var size = r.transferSize || r.encodedBodySize || 0;
+        transfer += size;
+        if (r.initiatorType === 'img' || imagePattern.test(r.name)) { imageBytes += size; }
+        return {name: r.name, type: r.initiatorType, bytes: size, duration: Math.round(r.duration)};
+    });
+    resources.sort(function (a, b) { return b.bytes - a.bytes; });
+
+    return {
+        ttfb: nav.responseStart || null,
+        domContentLoaded: nav.domContentLoadedEventEnd || null,
+        load: nav.loadEventEnd || null,
+        fcp: fcp ? fcp.startTime : null,
+        lcp: vitals.lcp,
+        lcpElement: vitals.lcpElement || null,
+        cls: vitals.cls === undefined ? null : vitals.cls,
+        transferBytes: transfer,
+        imageBytes: imageBytes,
+        requestCount: resources.length + 1,
+        heaviestResources: resources.slice(0, 10)
+    };
+})()
+"""
+
+
+def install_vitals_observer(driver):
+    """Register the LCP/CLS observers for every document ``driver`` loads"""
+    driver.execute_cdp_cmd(
+        "Page.addScriptToEvaluateOnNewDocument", {"source": VITALS_OBSERVER_HOOK}
+    )
+
+
+def collect_page_metrics(driver):
+    """Read the timing data for the currently loaded page over CDP"""
+    response = driver.execute_cdp_cmd(
+        "Runtime.evaluate", {"expression": _COLLECT_SCRIPT, "returnByValue": True}
+    )
+    return response.get("result", {}).get("value") or {}
+
+
+class PerfRecorder:
+    """Collects per-route page metrics for one test session"""
+
+    def __init__(self, output_dir=DEFAULT_PERF_DIR, run_id=None):
+        self.output_dir = Path(output_dir)
+        self.run_id = run_id or current_run_id()
+        self.current_test = None
+        self.current_profile = None
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def record(self, driver, url):
+        """Navigation listener: capture metrics for the page just opened"""
+        metrics = collect_page_metrics(driver)
+        sample = {
+            "route": urlparse(url).path or "/",
+            "url": url,
+            "test": self.current_test,
+            "profile": self.current_profile,
+            "timestamp": time.time(),
+        }
+        sample.update(metrics)
+        with self._lock:
+            self.samples.append(sample)
+        return sample
+
+    def by_route(self):
+        """Samples grouped by route path"""
+        routes = {}
+        for sample in self.samples:
+            routes.setdefault(sample["route"], []).append(sample)
+        return routes
+
+    def write(self):
+        """Write this worker's samples; returns the file path (or None)"""
+        if not self.samples:
+            return None
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"{self.run_id}-w{worker_id()}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "run_id": self.run_id,
+                    "worker": worker_id(),
+                    "routes": self.by_route(),
+                    "cells": summarize_cells(self.samples),
+                },
+                f,
+                indent=2,
+            )
+        return path
@@ -0,0 +1,191 @@
+"""
+Network, CPU and device emulation profiles for the test matrix.
+
+A *profile* is one cell of the matrix network x CPU x device and is applied
+to a driver over CDP:
+
+- ``Network.emulateNetworkConditions``: latency, throughput, offline
+- ``Emulation.setCPUThrottlingRate``: slow-down factor for the main thread
+- ``Emulation.setDeviceMetricsOverride``: viewport, pixel ratio, mobile
+  (plus touch emulation for mobile devices)
+
+``--network``, ``--cpu`` and ``--device`` (see conftest.py) select the
+values to cross; every test that uses the ``driver`` fixture then runs once
+per cell and its page timings are tagged with the cell's name.
+"""
+
+import itertools
+
+from harness.budgets import metric_medians
+
+
+class NetworkProfile:
+    """Throughput in kbit/s, round-trip latency in ms"""
+
+    def __init__(self, name, latency_ms=0, download_kbps=None, upload_kbps=None, offline=False):
+        self.name = name
+        self.latency_ms = latency_ms
+        self.download_kbps = download_kbps
+        self.upload_kbps = upload_kbps
+        self.offline = offline
+
+    @property
+    def throttled(self):
+        return self.offline or self.latency_ms or self.download_kbps or self.upload_kbps
+
+    def conditions(self):
+        def bytes_per_second(kbps):
+            return -1 if kbps is None else kbps * 1024 / 8
+
+        return {
+            "offline": self.offline,
+            "latency": self.latency_ms,
+            "downloadThroughput": bytes_per_second(self.download_kbps),
+            "uploadThroughput": bytes_per_second(self.upload_kbps),
+        }
+
+
+class DeviceProfile:
+    def __init__(self, name, width, height, scale=1, mobile=False):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.mobile = mobile
+
+
+# Values follow the WebPageTest connectivity presets
+NETWORKS = {
+    "none": NetworkProfile("none"),
+    "4g": NetworkProfile("4g", latency_ms=170, download_kbps=9000, upload_kbps=9000),
+    "3g": NetworkProfile("3g", latency_ms=300, download_kbps=1600, upload_kbps=768),
+    "slow-3g": NetworkProfile("slow-3g", latency_ms=400, download_kbps=400, upload_kbps=400),
+    "offline": NetworkProfile("offline", offline=True),
+}
+
+# Main-thread slow-down relative to the CI machine
+CPU_RATES = {
+    "none": 1,
+    "mid": 4,
+    "low": 6,
+}
+
+DEVICES = {
+    "desktop": DeviceProfile("desktop", 1920, 1080),
+    "tablet": DeviceProfile("tablet", 768, 1024, scale=2, mobile=True),
+    "phone": DeviceProfile("phone", 375, 667, scale=2, mobile=True),
+}
+
+
+class Profile:
+    """One cell of the emulation matrix"""
+
+    def __init__(self, network="none", cpu="none", device="desktop"):
+        for value, known, kind in ((network, NETWORKS, "network"), (cpu, CPU_RATES, "cpu"),
+                                   (device, DEVICES, "device")):
+            if value not in known:
+                raise ValueError(f"Unknown {kind} profile {value!r}, expected one of {sorted(known)}")
+        self.network = NETWORKS[network]
+        self.cpu_rate = CPU_RATES[cpu]
+        self.cpu = cpu
+        self.device = DEVICES[device]
+
+    @property
+    def name(self):
+        """e.g. ``3g-cpu4x-phone``"""
+        return f"{self.network.name}-cpu{self.cpu_rate}x-{self.device.name}"
+
+    @property
+    def slowdown(self):
+        """Rough factor by which waits should be extended under this profile"""
+        factor = self.cpu_rate
+        if self.network.download_kbps:
+            factor *= max(1, 4000 / self.network.download_kbps)
+        return factor
+
+    def apply(self, driver):
+        """Emulate this profile in ``driver`` until ``clear_emulation``"""
+        if self.network.throttled:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.emulateNetworkConditions", self.network.conditions())
+        if self.cpu_rate != 1:
+            driver.execute_cdp_cmd("Emulation.setCPUThrottlingRate", {"rate": self.cpu_rate})
+        emulate_device(driver, self.device)
+
+    def __repr__(self):
+        return f"Profile({self.name})"
+
+
+def emulate_device(driver, device):
+    driver.execute_cdp_cmd("Emulation.setDeviceMetricsOverride", {
+        "width": device.width,
+        "height": device.height,
+        "deviceScaleFactor": device.scale,
+        "mobile": device.mobile,
+    })
+    driver.execute_cdp_cmd("Emulation.setTouchEmulationEnabled", {"enabled": device.mobile})
+
+
+def set_offline(driver, offline=True):
+    """Cut (or restore) the network of an already loaded page"""
+    driver.execute_cdp_cmd("Network.enable", {})
+    profile = NETWORKS["offline" if offline else "none"]
+    driver.execute_cdp_cmd("Network.emulateNetworkConditions", profile.conditions())
+
+
+def clear_emulation(driver):
+    """Undo every override set by ``Profile.apply`` or ``set_offline``"""
+    driver.execute_cdp_cmd("Network.emulateNetworkConditions", NETWORKS["none"].conditions())
+    driver.execute_cdp_cmd("Emulation.setCPUThrottlingRate", {"rate": 1})
+    driver.execute_cdp_cmd("Emulation.clearDeviceMetricsOverride", {})
+    driver.execute_cdp_cmd("Emulation.setTouchEmulationEnabled", {"enabled": False})
+
+
+def _split(value):
+    return [v.strip() for v in value.split(",") if v.strip()] if value else []
+
+
+def build_matrix(networks="", cpus="", devices=""):
+    """
+    Every combination of the comma separated selections. Returns an empty
+    list when nothing is selected, i.e. tests run once without emulation.
+    """
+    networks, cpus, devices = _split(networks), _split(cpus), _split(devices)
+    if not (networks or cpus or devices):
+        return []
+    return [
+        Profile(network, cpu, device)
+        for network, cpu, device in itertools.product(
+            networks or ["none"], cpus or ["none"], devices or ["desktop"]
+        )
+    ]
+
+
+def summarize_cells(samples):
+    """Median metrics per profile and route for samples tagged with a profile"""
+    cells = {}
+    for sample in samples:
+        if sample.get("profile"):
+            cells.setdefault(sample["profile"], {}).setdefault(sample["route"], []).append(sample)
+    return {
+        profile: {route: metric_medians(route_samples) for route, route_samples in routes.items()}
+        for profile, routes in cells.items()
+    }
+
+
+def format_cells(cells, metrics=("fcp_ms", "lcp_ms", "load_ms", "transfer_kb")):
+    """Text table of ``summarize_cells`` output, slowest LCP first"""
+    rows = [
+        (profile, route, medians)
+        for profile, routes in cells.items()
+        for route, medians in routes.items()
+    ]
+    rows.sort(key=lambda row: row[2].get("lcp_ms") or 0, reverse=True)
+    width = max([len(r[0]) for r in rows] + [7])
+    lines = [f"{'Profile':<{width}}  {'Route':<14}" + "".join(f"{m:>12}" for m in metrics)]
+    for profile, route, medians in rows:
+        values = "".join(
+            f"{medians[m]:>12.0f}" if m in medians else f"{'-':>12}" for m in metrics
+        )
+        lines.append(f"{profile:<{width}}  {route:<14}{values}")
+    return "\n".join(lines)
@@ -0,0 +1,388 @@
+"""
+Per-phase timing of the suite itself.
+
+While a ``Profiler`` is active, the harness records a span for:
+
+- each test and its setup, call and teardown phases (conftest.py)
+- each fixture's setup and teardown
+- each WebDriver command, timed where it leaves the client
+  (``instrument_driver`` wraps the driver's command executor); commands
+  that come back with an error, e.g. a ``findElement`` that ran into the
+  implicit wait, are marked ``(error)``
+- browser launch and reset in the driver pool
+- explicit waits (``harness.waits.wait_for``) and ``time.sleep`` calls
+- API client requests, and the page's own requests from the network
+  capture on a separate ``network`` track
+
+Spans are kept as Chrome trace events (``ph: "X"``), so the trace opens in
+chrome://tracing, Perfetto or speedscope. ``write_folded`` produces the
+same data as folded stacks for ``flamegraph.pl``. ``summarize`` and
+``summary_html`` turn the traces of all workers into the tables shown in
+report.html.
+"""
+
+import functools
+import html
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+# Fixture teardowns shorter than this are left out of the trace
+MIN_TEARDOWN_US = 50
+
+HOT_SPOTS = 15
+SLOWEST_TESTS = 10
+
+SUMMARY_START = '<div id="suite-profile">'
+SUMMARY_END = "<!-- /suite-profile -->"
+
+_active = None
+
+
+def active():
+    """The profiler recording spans, or None"""
+    return _active
+
+
+def span(category, name, **args):
+    """Time a block under the active profiler; does nothing without one"""
+    if _active is None:
+        return nullcontext()
+    return _active.span(category, name, **args)
+
+
+class Profiler:
+    """Collects trace events for one worker process"""
+
+    def __init__(self, worker=0):
+        self.worker = worker
+        self.events = []
+        self.current_test = None
+        self._origin = time.perf_counter()
+        self._mark = None
+        self._lock = threading.Lock()
+        self._sleep = None
+
+    def now(self):
+        """Microseconds since the profiler was created"""
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def add(self, category, name, start, end, track=None, **args):
+        """Record a finished span; ``start`` and ``end`` as returned by ``now``"""
+        if self.current_test and "test" not in args:
+            args["test"] = self.current_test
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round(start, 1),
+            "dur": round(max(0.0, end - start), 1),
+            "pid": self.worker,
+            "tid": track or threading.current_thread().name,
+            "args": args,
+        }
+        with self._lock:
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, category, name, **args):
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.add(category, name, start, self.now(), **args)
+
+    def start(self):
+        """Make this the active profiler and time ``time.sleep`` in this thread"""
+        global _active
+        _active = self
+        main = threading.get_ident()
+        sleep = self._sleep = time.sleep
+
+        @functools.wraps(sleep)
+        def timed_sleep(seconds):
+            if threading.get_ident() != main:
+                return sleep(seconds)
+            with self.span("sleep", "time.sleep"):
+                return sleep(seconds)
+
+        time.sleep = timed_sleep
+
+    def stop(self):
+        global _active
+        if _active is self:
+            _active = None
+        if self._sleep is not None:
+            time.sleep = self._sleep
+            self._sleep = None
+
+    def mark(self):
+        """Start of a stretch timed after the fact (see ``fixture_finished``)"""
+        self._mark = self.now()
+
+    def fixture_finished(self, argname):
+        """
+        Teardown span for ``argname``: pytest has no hook before a fixture's
+        finalizers, but they run one after another, so a fixture's teardown
+        is the time since the previous one finished.
+        """
+        end = self.now()
+        if self._mark is not None and end - self._mark >= MIN_TEARDOWN_US:
+            self.add("fixture", f"{argname} teardown", self._mark, end)
+        self._mark = end
+
+    def add_requests(self, records, window_start, window_end):
+        """
+        Place the page's requests (``NetworkCapture`` records) on the
+        ``network`` track. DevTools timestamps share the clock of
+        ``time.monotonic``; if they do not fall inside the test, they are
+        shifted to start with it.
+        """
+        timed = [r for r in records if r.get("started") and r.get("duration_ms") is not None]
+        if not timed:
+            return
+        offset = (time.perf_counter() - time.monotonic()) * 1e6 - self._origin * 1e6
+        first = min(r["started"] for r in timed) * 1e6 + offset
+        if not window_start - 1e6 <= first <= window_end + 1e6:
+            offset += window_start - first
+        for record in timed:
+            start = record["started"] * 1e6 + offset
+            self.add("network", f"{record['method']} {_short_url(record['url'])}",
+                     start, start + record["duration_ms"] * 1000, track="network",
+                     type=record["type"], status=record["status"], ttfb_ms=record["ttfb_ms"])
+
+    def write(self, path):
+        """Write the spans as a Chrome trace (JSON object format)"""
+        if not self.events:
+            return None
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            events = sorted(self.events, key=lambda e: (e["ts"], -e["dur"]))
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": self.worker, "args": {"name": f"worker {self.worker}"}},
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+        return path
+
+
+def _short_url(url):
+    return re.sub(r"^[a-z]+://[^/]+", "", url).split("?")[0] or "/"
+
+
+def _command_name(command, params):
+    if command == "executeCdpCommand":
+        return f"cdp {params.get('cmd')}"
+    return command
+
+
+def instrument_driver(driver):
+    """
+    Time every command ``driver`` sends while a profiler is active. Wraps
+    the command executor, so commands issued by Selenium itself (e.g. the
+    polling of ``WebDriverWait``) are included.
+    """
+    executor = driver.command_executor
+    if getattr(executor, "_opalumpus_profiled", False):
+        return driver
+    execute = executor.execute
+
+    @functools.wraps(execute)
+    def timed_execute(command, params):
+        profiler = _active
+        if profiler is None:
+            return execute(command, params)
+        start = profiler.now()
+        response = execute(command, params)
+        value = response.get("value") if isinstance(response, dict) else None
+        failed = isinstance(value, dict) and "error" in value
+        name = _command_name(command, params or {}) + (" (error)" if failed else "")
+        profiler.add("webdriver", name, start, profiler.now())
+        return response
+
+    executor.execute = timed_execute
+    executor._opalumpus_profiled = True
+    return driver
+
+
+def load_traces(paths):
+    """Complete (``ph: "X"``) events from trace files"""
+    events = []
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        events.extend(e for e in data.get("traceEvents", []) if e.get("ph") == "X")
+    return events
+
+
+def _nest(events):
+    """
+    Yield (event, stack of enclosing events, self time) per event. Spans
+    nest by time on the same process and thread, as in the trace viewers.
+    """
+    tracks = {}
+    for event in events:
+        tracks.setdefault((event["pid"], event["tid"]), []).append(event)
+    for track in tracks.values():
+        track.sort(key=lambda e: (e["ts"], -e["dur"]))
+        stack, children = [], {}
+        finished = []
+
+        def close(until):
+            while stack and (until is None or stack[-1]["ts"] + stack[-1]["dur"] <= until):
+                done = stack.pop()
+                finished.append((done, list(stack), done["dur"] - children.pop(id(done), 0)))
+
+        for event in track:
+            close(event["ts"])
+            if stack:
+                parent = stack[-1]
+                children[id(parent)] = children.get(id(parent), 0) + event["dur"]
+            stack.append(event)
+        close(None)
+        yield from finished
+
+
+def _frame(event):
+    return f"{event['cat']}:{event['name']}".replace(";", ",")
+
+
+def write_folded(events, path):
+    """Folded stacks (``frame;frame;frame self_microseconds``) for flamegraph.pl"""
+    stacks = {}
+    for event, parents, self_time in _nest(events):
+        key = ";".join([_frame(p) for p in parents] + [_frame(event)])
+        stacks[key] = stacks.get(key, 0) + self_time
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for key, value in sorted(stacks.items()):
+            if value >= 1:
+                f.write(f"{key} {int(value)}\n")
+    return path
+
+
+def summarize(events):
+    """
+    Phase totals, hot spots (by self time) and the slowest tests. Times in
+    seconds. Network requests overlap each other and the test, so they are
+    reported separately instead of being part of the self times.
+    """
+    phases, spots, tests, network = {}, {}, {}, {}
+    for event, parents, self_time in _nest(events):
+        seconds, self_seconds = event["dur"] / 1e6, self_time / 1e6
+        test = event["args"].get("test")
+        if event["cat"] == "network":
+            entry = network.setdefault(event["name"], {"calls": 0, "total": 0.0})
+            entry["calls"] += 1
+            entry["total"] += seconds
+            continue
+        if event["cat"] == "test":
+            tests.setdefault(event["name"], {})["total"] = seconds
+            continue
+        if event["cat"] == "phase":
+            phases[event["name"]] = phases.get(event["name"], 0.0) + seconds
+            if test:
+                tests.setdefault(test, {})[event["name"]] = seconds
+            continue
+        key = (event["cat"], event["name"])
+        entry = spots.setdefault(key, {"calls": 0, "self": 0.0, "total": 0.0})
+        entry["calls"] += 1
+        entry["self"] += self_seconds
+        entry["total"] += seconds
+        if test and event["cat"] in ("webdriver", "wait", "sleep"):
+            totals = tests.setdefault(test, {})
+            totals[event["cat"]] = totals.get(event["cat"], 0.0) + self_seconds
+
+    return {
+        "phases": phases,
+        "hot_spots": sorted(
+            ({"category": cat, "name": name, **values} for (cat, name), values in spots.items()),
+            key=lambda s: -s["self"],
+        ),
+        "tests": sorted(
+            ({"test": test, **values} for test, values in tests.items() if "total" in values),
+            key=lambda t: -t["total"],
+        ),
+        "network": sorted(
+            ({"name": name, **values} for name, values in network.items()),
+            key=lambda n: -n["total"],
+        ),
+    }
+
+
+def format_summary(summary, limit=10):
+    """Text version of the hot spots for the terminal"""
+    lines = [f"{'Category':<10} {'Operation':<48} {'Calls':>6} {'Self s':>8} {'Total s':>8}"]
+    for spot in summary["hot_spots"][:limit]:
+        lines.append(f"{spot['category']:<10} {spot['name'][:48]:<48} {spot['calls']:>6} "
+                     f"{spot['self']:>8.2f} {spot['total']:>8.2f}")
+    return "\n".join(lines)
+
+
+def _table(headers, rows):
+    head = "".join(f"<th>{html.escape(h)}</th>" for h in headers)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{html.escape(str(cell))}</td>" for cell in row) + "</tr>" for row in rows
+    )
+    return f"<table><tr>{head}</tr>{body}</table>"
+
+
+def summary_html(summary, traces=()):
+    """Tables for the pytest-html summary, wrapped so they can be replaced after a parallel merge"""
+    phase_total = sum(summary["phases"].values()) or 1
+    phases = _table(
+        ["Phase", "Seconds", "Share"],
+        [(name, f"{seconds:.2f}", f"{seconds / phase_total:.0%}")
+         for name, seconds in sorted(summary["phases"].items(), key=lambda p: -p[1])],
+    )
+    spots = _table(
+        ["Category", "Operation", "Calls", "Self (s)", "Total (s)", "Mean (ms)"],
+        [(s["category"], s["name"], s["calls"], f"{s['self']:.2f}", f"{s['total']:.2f}",
+          f"{s['total'] / s['calls'] * 1000:.1f}") for s in summary["hot_spots"][:HOT_SPOTS]],
+    )
+    tests = _table(
+        ["Test", "Total (s)", "Setup", "Call", "Teardown", "WebDriver", "Waits", "Sleeps"],
+        [(t["test"], f"{t['total']:.2f}", *(f"{t.get(k, 0.0):.2f}" for k in
+                                             ("setup", "call", "teardown", "webdriver", "wait", "sleep")))
+         for t in summary["tests"][:SLOWEST_TESTS]],
+    )
+    network = _table(
+        ["Request", "Count", "Total (s)", "Mean (ms)"],
+        [(n["name"], n["calls"], f"{n['total']:.2f}", f"{n['total'] / n['calls'] * 1000:.1f}")
+         for n in summary["network"][:HOT_SPOTS]],
+    )
+    files = ", ".join(html.escape(str(t)) for t in traces)
+    return (
+        f"{SUMMARY_START}<h3>Suite profile</h3>{phases}"
+        f"<h4>Hot spots (self time)</h4>{spots}"
+        f"<h4>Slowest tests</h4>{tests}"
+        f"<h4>Page requests</h4>{network}"
+        f"<p>Traces: {files}</p></div>{SUMMARY_END}"
+    )
+
+
+def trace_paths(perf_dir, run_id):
+    """Trace files of every worker of ``run_id``"""
+    return sorted(Path(perf_dir).glob(f"{run_id}-trace-w*.json"))
+
+
+def suite_summary_html(perf_dir, run_id):
+    """
+    Profile summary of every worker's trace for the final report (and the
+    folded stacks of all of them), or "" when nothing was traced
+    """
+    traces = trace_paths(perf_dir, run_id)
+    if not traces:
+        return ""
+    events = load_traces(traces)
+    write_folded(events, Path(perf_dir) / f"{run_id}-trace.folded")
+    return summary_html(summarize(events), [os.path.basename(str(t)) for t in traces])
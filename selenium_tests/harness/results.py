@@ -0,0 +1,476 @@
+"""
+Streaming test results.
+
+Every pytest process appends one JSON line per event to its own results
+stream, ``results/<run id>-w<worker>.jsonl``, and flushes it right away::
+
+    {"event": "start", "run_id": "...", "worker": 0, "time": ..., "collected": 14}
+    {"event": "test", "nodeid": "...", "outcome": "failed", "duration": 3.2,
+     "phases": {"setup": 0.4, "call": 2.6, "teardown": 0.2}, "message": "...",
+     "longrepr": "...", "artifacts": [{"kind": "screenshot", "path": "..."}], ...}
+    {"event": "finish", "time": ..., "exitstatus": 1}
+
+When a test fails (or a passing one is sampled), the ``capture`` callback
+stores its artifacts at that moment, before the teardown resets the
+browser (see ``harness/artifacts.py``); the stream only holds their paths,
+relative to the results directory. A test that was rerun (``--reruns``)
+keeps the artifacts of every attempt, and its line says how many reruns
+it took, how long they ran and whether it passed on one (``flaky``). Nothing about a
+finished test stays in memory: the test processes forget it once its line
+is written, and every reader goes through the streams line by line:
+
+- ``StreamFollower`` picks up the lines appended since the last poll (the
+  progress lines of ``run_tests.py`` and ``results.py watch``/``serve``)
+- ``render_junit`` and ``render_html`` write ``results.xml`` and
+  ``report.html`` from the streams once the run is over
+"""
+
+import html
+import json
+import os
+import re
+import socket
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from pathlib import Path
+from xml.sax.saxutils import quoteattr
+
+DEFAULT_RESULTS_DIR = "results"
+
+OUTCOMES = ("passed", "failed", "error", "skipped", "xfailed", "xpassed")
+SYMBOLS = {"passed": "✓", "failed": "✗", "error": "✗", "skipped": "-", "xfailed": "x", "xpassed": "!"}
+
+# Captured output kept per test; the rest is in the worker log
+MAX_OUTPUT = 20000
+
+# Markers that say nothing about the test itself
+_PLUMBING_MARKERS = {"parametrize", "usefixtures", "filterwarnings"}
+
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def stream_path(results_dir, run_id, worker):
+    return Path(results_dir) / f"{run_id}-w{worker}.jsonl"
+
+
+def stream_paths(results_dir, run_id):
+    """Streams of every worker of ``run_id``"""
+    return sorted(Path(results_dir).glob(f"{run_id}-w*.jsonl"))
+
+
+def latest_run_id(results_dir):
+    """Run id of the most recently written stream in ``results_dir``, or None"""
+    streams = sorted(Path(results_dir).glob("*-w*.jsonl"), key=lambda p: p.stat().st_mtime)
+    if not streams:
+        return None
+    return streams[-1].name.rsplit("-w", 1)[0]
+
+
+def _outcome(reports):
+    if any(r.failed for r in reports):
+        return "error" if any(r.failed and r.when != "call" for r in reports) else "failed"
+    call = next((r for r in reports if r.when == "call"), None)
+    if call is not None and hasattr(call, "wasxfail"):
+        return "xfailed" if call.skipped else "xpassed"
+    if any(r.skipped for r in reports):
+        return "skipped"
+    return "passed"
+
+
+def _message(report):
+    """One line saying why a phase failed or was skipped"""
+    if isinstance(report.longrepr, tuple):
+        return report.longrepr[2].removeprefix("Skipped: ")
+    crash = getattr(report.longrepr, "reprcrash", None)
+    text = crash.message if crash is not None else str(report.longrepr or "").strip()
+    return text.splitlines()[0] if text else ""
+
+
+def _clip(text):
+    if len(text) <= MAX_OUTPUT:
+        return text
+    return text[:MAX_OUTPUT] + f"\n... ({len(text) - MAX_OUTPUT} more characters in the worker log)"
+
+
+def _extras(reports):
+    """pytest-html extras that are markup or text (images are left out)"""
+    found = []
+    for report in reports:
+        for extra in getattr(report, "extras", None) or getattr(report, "extra", None) or []:
+            if extra.get("format_type") in ("html", "text", "url"):
+                found.append({"format": extra["format_type"], "name": extra.get("name", ""),
+                              "content": extra.get("content", "")})
+    return found
+
+
+class ResultStream:
+    """
+    pytest plugin that appends each test's outcome, phase timings,
+    properties and failure artifacts to the worker's results stream as
+    soon as the test's teardown has finished. ``capture(item, since)``
+    returns the ``[{"kind", "path"}]`` artifacts of a failed (or
+    ``sample``d passing) test.
+
+    Artifacts are taken when a phase's report is made, not when it is
+    logged: the rerun plugin logs the reports of a test only after its
+    last attempt, when the browser has long been reset.
+    """
+
+    def __init__(self, results_dir, run_id, worker, capture=None, sample=lambda nodeid: False):
+        self.results_dir = Path(results_dir)
+        self.run_id = run_id
+        self.worker = worker
+        self.capture = capture
+        self.sample = sample
+        self.path = stream_path(results_dir, run_id, worker)
+        self._file = None
+        self._item = None
+        self._since = 0
+        self._reports = []
+        self._artifacts = []
+
+    def write(self, event):
+        self._file.write(json.dumps(event, default=str) + "\n")
+        self._file.flush()
+
+    def pytest_sessionstart(self, session):
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def pytest_collection_finish(self, session):
+        self.write({"event": "start", "run_id": self.run_id, "worker": self.worker,
+                    "time": time.time(), "collected": len(session.items)})
+
+    def pytest_runtest_setup(self, item):
+        self._item = item
+        self._since = time.time()
+
+    def pytest_runtest_makereport(self, item, call):
+        if call.when == "call" and call.excinfo is None and self.sample(item.nodeid):
+            self._capture(item)
+
+    def pytest_exception_interact(self, node, call, report):
+        if call.when != "teardown":
+            self._capture(node)
+
+    def pytest_runtest_logreport(self, report):
+        self._reports.append(report)
+        if report.when == "teardown":
+            self.write(self._record(report.nodeid, self._reports))
+            self._reports = []
+            self._artifacts = []
+
+    def _capture(self, item):
+        """Artifacts of the test's browser, before the teardown resets it"""
+        if self.capture is None or item is not self._item:
+            return
+        self._artifacts.extend(self.capture(item, self._since))
+
+    def _record(self, nodeid, reports):
+        outcome = _outcome(reports)
+        explained = [r for r in reports if r.failed or r.skipped]
+        last = reports[-1]
+        record = {
+            "event": "test",
+            "nodeid": nodeid,
+            "outcome": outcome,
+            "worker": self.worker,
+            "start": min((getattr(r, "start", 0) for r in reports), default=0),
+            "duration": round(sum(r.duration for r in reports), 3),
+            "phases": {r.when: round(r.duration, 3) for r in reports},
+            "markers": sorted({m.name for m in self._item.iter_markers()} - _PLUMBING_MARKERS) if self._item else [],
+            "properties": dict(last.user_properties),
+            "artifacts": self._artifacts,
+            "extras": _extras(reports),
+        }
+        if getattr(last, "reruns", 0):
+            record["reruns"] = last.reruns
+            record["rerun_seconds"] = round(last.rerun_seconds, 3)
+            record["rerun_messages"] = last.rerun_messages
+            record["flaky"] = outcome == "passed"
+        if explained:
+            record["message"] = _message(explained[0])
+        if outcome in ("failed", "error"):
+            record["longrepr"] = _clip("\n\n".join(r.longreprtext for r in reports if r.failed))
+            record["stdout"] = _clip(last.capstdout)
+            record["stderr"] = _clip(last.capstderr)
+        return record
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        if self._file is None:
+            return
+        self.write({"event": "finish", "time": time.time(), "exitstatus": int(exitstatus)})
+        self._file.close()
+        self._file = None
+
+
+def read_events(paths):
+    """Every complete event of the streams at ``paths``, one line at a time"""
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # still being written
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def read_tests(paths):
+    return (event for event in read_events(paths) if event.get("event") == "test")
+
+
+class StreamFollower:
+    """
+    Follows the streams of a run while it is going: ``poll`` returns the
+    events appended since the previous call, including those of workers
+    that started in the meantime.
+    """
+
+    def __init__(self, results_dir, run_id):
+        self.results_dir = results_dir
+        self.run_id = run_id
+        self.offsets = {}
+
+    def poll(self):
+        events = []
+        for path in stream_paths(self.results_dir, self.run_id):
+            offset = self.offsets.get(path, 0)
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+            complete = data.rfind(b"\n") + 1
+            self.offsets[path] = offset + complete
+            for line in data[:complete].decode("utf-8").splitlines():
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue
+        return events
+
+
+class Tally:
+    """Running counts of a run; only numbers are kept, not the results"""
+
+    def __init__(self):
+        self.counts = dict.fromkeys(OUTCOMES, 0)
+        self.collected = 0
+        self.workers = 0
+        self.finished = 0
+        self.started = None
+        self.ended = None
+        self.test_seconds = 0.0
+        self.rerun = 0
+        self.rerun_seconds = 0.0
+        self.flaky = 0
+
+    def add(self, event):
+        kind = event.get("event")
+        if kind == "start":
+            self.workers += 1
+            self.collected += event.get("collected", 0)
+            self.started = min(self.started or event["time"], event["time"])
+        elif kind == "finish":
+            self.finished += 1
+            self.ended = max(self.ended or event["time"], event["time"])
+        elif kind == "test":
+            self.counts[event["outcome"]] = self.counts.get(event["outcome"], 0) + 1
+            self.test_seconds += event.get("duration", 0)
+            self.rerun += bool(event.get("reruns"))
+            self.rerun_seconds += event.get("rerun_seconds", 0)
+            self.flaky += bool(event.get("flaky"))
+        return self
+
+    @property
+    def done(self):
+        return sum(self.counts.values())
+
+    @property
+    def complete(self):
+        return bool(self.workers) and self.finished == self.workers
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.ended if self.complete else time.time()) - self.started
+
+    def summary(self):
+        counts = ", ".join(f"{value} {outcome}" for outcome, value in self.counts.items() if value)
+        summary = f"{self.done}/{self.collected} tests: {counts or 'none finished'} in {self.elapsed:.0f}s"
+        if self.rerun:
+            summary += f" ({self.rerun} rerun, {self.flaky} flaky, {self.rerun_seconds:.0f}s of reruns)"
+        return summary
+
+
+def tally(paths):
+    result = Tally()
+    for event in read_events(paths):
+        result.add(event)
+    return result
+
+
+def format_progress(event, tally):
+    """Console line for one finished test"""
+    width = len(str(tally.collected or tally.done))
+    line = (f"[{tally.done:>{width}}/{tally.collected}] {SYMBOLS.get(event['outcome'], '?')} "
+            f"{event['outcome'].upper():8} {event['nodeid']} ({event['duration']:.1f}s, w{event['worker']})")
+    if event.get("reruns"):
+        line += f" after {event['reruns']} rerun(s)" + (", FLAKY" if event.get("flaky") else "")
+    if event.get("message") and event["outcome"] in ("failed", "error"):
+        line += f"\n      {event['message']}"
+    return line
+
+
+def _junit_names(nodeid):
+    """``classname`` and ``name`` of a node id, the way pytest's junitxml writes them"""
+    parts = nodeid.split("::")
+    module = parts[0].removesuffix(".py").replace("/", ".")
+    return ".".join([module] + parts[1:-1]), parts[-1]
+
+
+def _xml_text(text):
+    return _XML_ILLEGAL.sub("", text or "")
+
+
+def render_junit(paths, output):
+    """Write ``results.xml`` from the streams: one ``testsuite``, one ``testcase`` per test"""
+    totals = tally(paths)
+    counts = totals.counts
+    suite = {
+        "name": "pytest",
+        "errors": counts["error"],
+        "failures": counts["failed"],
+        "skipped": counts["skipped"] + counts["xfailed"],
+        "tests": totals.done,
+        "time": f"{totals.elapsed:.3f}",
+        "timestamp": datetime.fromtimestamp(totals.started or time.time()).isoformat(timespec="seconds"),
+        "hostname": socket.gethostname(),
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        attributes = " ".join(f"{key}={quoteattr(str(value))}" for key, value in suite.items())
+        f.write(f'<?xml version="1.0" encoding="utf-8"?>\n<testsuites><testsuite {attributes}>')
+        for event in read_tests(paths):
+            classname, name = _junit_names(event["nodeid"])
+            case = ET.Element("testcase", classname=classname, name=name, time=f"{event['duration']:.3f}")
+            properties = dict(event["properties"])
+            if event.get("reruns"):
+                properties.update(reruns=event["reruns"], rerun_seconds=event["rerun_seconds"],
+                                  flaky=event["flaky"])
+            if properties:
+                element = ET.SubElement(case, "properties")
+                for key, value in properties.items():
+                    ET.SubElement(element, "property", name=str(key), value=_xml_text(str(value)))
+            outcome = event["outcome"]
+            message = _xml_text(event.get("message", ""))
+            if outcome in ("failed", "error"):
+                tag = "failure" if outcome == "failed" else "error"
+                ET.SubElement(case, tag, message=message).text = _xml_text(event.get("longrepr"))
+            elif outcome in ("skipped", "xfailed"):
+                kind = "pytest.skip" if outcome == "skipped" else "pytest.xfail"
+                ET.SubElement(case, "skipped", type=kind, message=message).text = message
+            if event.get("stdout"):
+                ET.SubElement(case, "system-out").text = _xml_text(event["stdout"])
+            if event.get("stderr"):
+                ET.SubElement(case, "system-err").text = _xml_text(event["stderr"])
+            f.write(ET.tostring(case, encoding="unicode"))
+        f.write("</testsuite></testsuites>\n")
+
+
+_STYLE = """
+body { font-family: Helvetica, Arial, sans-serif; font-size: 13px; margin: 20px; color: #222; }
+h1 { font-size: 22px; }
+table.results { border-collapse: collapse; width: 100%; }
+table.results th, table.results td { border: 1px solid #e6e6e6; padding: 4px 8px; text-align: left; vertical-align: top; }
+table.results th { background: #f5f5f5; }
+.passed { color: #2e7d32; } .failed, .error { color: #c62828; }
+.skipped, .xfailed { color: #8d6e00; } .xpassed { color: #ad1457; }
+.flaky { color: #e65100; }
+.counts label { margin-right: 14px; }
+pre { background: #fafafa; border: 1px solid #eee; padding: 6px; white-space: pre-wrap; max-height: 400px; overflow: auto; }
+img.screenshot { max-width: 480px; border: 1px solid #ccc; }
+"""
+
+_FILTER_SCRIPT = """
+document.querySelectorAll('.counts input').forEach(function (box) {
+    box.addEventListener('change', function () {
+        document.querySelectorAll('tbody.' + box.value).forEach(function (row) {
+            row.style.display = box.checked ? '' : 'none';
+        });
+    });
+});
+"""
+
+
+def _artifact_html(artifact, link_base):
+    href = html.escape(f"{link_base}/{artifact['path']}" if link_base else artifact["path"], quote=True)
+    if artifact["kind"] == "screenshot":
+        return f'<a href="{href}"><img class="screenshot" loading="lazy" src="{href}" alt="screenshot"></a>'
+    label = artifact["kind"] + (" (gzip)" if artifact["path"].endswith(".gz") else "")
+    return f'<a href="{href}">{html.escape(label)}</a>'
+
+
+def _test_html(event, link_base):
+    outcome = event["outcome"]
+    phases = ", ".join(f"{when} {seconds:.2f}s" for when, seconds in event["phases"].items())
+    details = []
+    if event.get("message"):
+        details.append(f"<p>{html.escape(event['message'])}</p>")
+    if event.get("reruns"):
+        verdict = "passed on a rerun (flaky)" if event["flaky"] else "failed every attempt"
+        details.append(f"<p>{event['reruns']} rerun(s), {event['rerun_seconds']:.2f}s: {verdict}</p>")
+        details.extend(f"<p>Attempt {n}: {html.escape(message)}</p>"
+                       for n, message in enumerate(event["rerun_messages"], 1))
+    if event.get("longrepr"):
+        details.append(f"<pre>{html.escape(event['longrepr'])}</pre>")
+    if event["artifacts"]:
+        details.append("<p>" + " ".join(_artifact_html(a, link_base) for a in event["artifacts"]) + "</p>")
+    if event["properties"]:
+        details.append("<p>" + ", ".join(f"{html.escape(str(k))}={html.escape(str(v))}"
+                                          for k, v in event["properties"].items()) + "</p>")
+    for extra in event.get("extras", []):
+        if extra["format"] == "html":
+            details.append(extra["content"])
+        elif extra["format"] == "url":
+            url = html.escape(extra["content"], quote=True)
+            details.append(f'<p><a href="{url}">{html.escape(extra["name"] or extra["content"])}</a></p>')
+        else:
+            details.append(f"<pre>{html.escape(extra['content'])}</pre>")
+    for stream in ("stdout", "stderr"):
+        if event.get(stream):
+            details.append(f"<details><summary>{stream}</summary><pre>{html.escape(event[stream])}</pre></details>")
+    result = f'{outcome} <span class="flaky">(flaky)</span>' if event.get("flaky") else outcome
+    row = (f'<tr><td class="{outcome}">{result}</td><td>{html.escape(event["nodeid"])}</td>'
+           f'<td>{event["duration"]:.2f}s</td><td>{html.escape(phases)}</td><td>w{event["worker"]}</td></tr>')
+    if details:
+        row += f'<tr><td></td><td colspan="4">{"".join(details)}</td></tr>'
+    return f'<tbody class="{outcome}">{row}</tbody>\n'
+
+
+def render_html(paths, output, title="Opalumpus Selenium Tests", extra_html=""):
+    """
+    Write ``report.html`` from the streams. Screenshots and console logs
+    are linked, not embedded, so the report stays small; ``extra_html``
+    (e.g. the suite profile) goes after the results.
+    """
+    output = Path(output)
+    totals = tally(paths)
+    results_dir = Path(paths[0]).parent if paths else Path(DEFAULT_RESULTS_DIR)
+    link_base = os.path.relpath(results_dir.resolve(), output.resolve().parent).replace(os.sep, "/")
+    counts = "".join(
+        f'<label class="{outcome}"><input type="checkbox" value="{outcome}" checked> '
+        f'{totals.counts[outcome]} {outcome}</label>'
+        for outcome in OUTCOMES
+    )
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>"
+                f"<style>{_STYLE}</style></head><body>\n<h1>{html.escape(title)}</h1>\n")
+        f.write(f"<p>{html.escape(totals.summary())} on {totals.workers} worker(s), "
+                f"{totals.test_seconds:.0f}s of test time.</p>\n<p class=\"counts\">{counts}</p>\n")
+        f.write('<table class="results"><thead><tr><th>Result</th><th>Test</th><th>Duration</th>'
+                "<th>Phases</th><th>Worker</th></tr></thead>\n")
+        for event in read_tests(paths):
+            f.write(_test_html(event, link_base))
+        f.write(f"</table>\n{extra_html}\n<script>{_FILTER_SCRIPT}</script>\n</body></html>\n")
@@ -0,0 +1,429 @@
+"""
+Test selection and ordering from the suite's own history.
+
+``TestHistory`` keeps the last runs of every test in a JSON file
+(``test_history.json`` by default): duration, outcome and the routes the
+test exercised, i.e. the pages it opened and the API paths it called. From
+that the harness
+
+- runs recently failed tests first, then critical ones (``order_key``)
+- balances parallel shards by expected duration instead of test count
+  (``shard_by_duration``)
+- with ``--changed-only``, runs just the tests covering the routes touched
+  by the files in ``git diff`` (``select_changed``)
+- scores how flaky each test is (``TestHistory.flakiness``) so the tests
+  over ``--flaky-threshold`` can be quarantined (``split_quarantined``)
+
+Changed files are mapped to routes without a hand-kept list for the
+frontend: the imports of ``Opalumpus_frontEnd/src`` are followed up to the
+page components mounted in ``App.jsx``. Backend files are mapped with
+``BACKEND_ROUTES``. Anything that cannot be mapped (harness code, build
+files, ``server.js``) selects every test.
+"""
+
+import json
+import os
+import re
+import statistics
+import subprocess
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlparse
+
+from harness.services import REPO_ROOT
+
+DEFAULT_HISTORY_FILE = "test_history.json"
+
+# Runs kept per test, and how many of the latest count as "recent"
+MAX_RUNS = 20
+RECENT_RUNS = 3
+
+# Expected duration of a test that has never run
+DEFAULT_DURATION = 10.0
+
+# Runs a test needs before it can be scored as flaky, and the default score
+# from which it is quarantined
+FLAKY_MIN_RUNS = 5
+DEFAULT_FLAKY_THRESHOLD = 0.3
+
+LOCK_TIMEOUT = 30
+
+FRONTEND = "Opalumpus_frontEnd"
+BACKEND = "Backend"
+TESTS = "selenium_tests"
+
+# Backend source -> API paths it serves; other backend files affect every route
+BACKEND_ROUTES = {
+    "Backend/routes/tripRoute.js": ("/api/trips",),
+    "Backend/controllers/tripController.js": ("/api/trips",),
+    "Backend/models/tripModels.js": ("/api/trips",),
+    "Backend/routes/userRoute.js": ("/api/booknow",),
+    "Backend/controllers/userController.js": ("/api/booknow",),
+    "Backend/models/userModel.js": ("/api/booknow",),
+    "Backend/models/adminModel.js": ("/admin-signin",),
+    "Backend/add-admin.js": ("/admin-signin",),
+}
+
+# Changes that cannot affect a test run
+IGNORED_SUFFIXES = (".md",)
+IGNORED_NAMES = (".gitignore", ".dockerignore", ".gitattributes")
+
+ALL_PAGES = "page:*"
+ALL_API = "api:*"
+
+_OBJECT_ID = re.compile(r"/[0-9a-fA-F]{24}(?=/|$)")
+_IMPORT = re.compile(r"""import\s+(?:[\w*{}\s,]+\s+from\s+)?["'](\.{1,2}/[^"']+)["']""")
+_ROUTE = re.compile(r"""<Route\s+path=["']([^"']+)["']\s+element=\{<(\w+)""")
+_SOURCE_SUFFIXES = ("", ".jsx", ".js", ".tsx", ".ts")
+
+
+def _base(nodeid):
+    """Node id without its parametrization, e.g. the profile matrix cell"""
+    return nodeid.split("[", 1)[0]
+
+
+def page_key(path):
+    return f"page:{path or '/'}"
+
+
+def api_key(path):
+    return f"api:{_OBJECT_ID.sub('/:id', path)}"
+
+
+def is_api_path(path):
+    return path.startswith("/api/") or path == "/admin-signin"
+
+
+def coverage_keys(records):
+    """Page routes and API paths touched by the requests of a NetworkCapture"""
+    keys = set()
+    for record in records:
+        keys.add(page_key(record["route"]))
+        path = urlparse(record["url"]).path
+        if record["type"] in ("XHR", "Fetch") and is_api_path(path):
+            keys.add(api_key(path))
+    return keys
+
+
+@contextmanager
+def _locked(path):
+    """Exclusive lock file next to ``path``, shared by parallel workers"""
+    lock = Path(f"{path}.lock")
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            if time.monotonic() > deadline:
+                # Left behind by a killed worker
+                lock.unlink(missing_ok=True)
+                deadline = time.monotonic() + LOCK_TIMEOUT
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        lock.unlink(missing_ok=True)
+
+
+class TestHistory:
+    """Durations, outcomes and covered routes of past runs, per test"""
+
+    __test__ = False  # not a test class, despite the name
+
+    def __init__(self, path=DEFAULT_HISTORY_FILE):
+        self.path = Path(path)
+        self.tests = self._load()
+        self.results = {}
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f).get("tests", {})
+        except (OSError, ValueError):
+            return {}
+
+    def record(self, nodeid, outcome, duration):
+        """Result of ``nodeid`` in the current run"""
+        result = self.results.setdefault(nodeid, {"covers": set()})
+        result.update(outcome=outcome, duration=duration)
+
+    def cover(self, nodeid, keys):
+        """Routes exercised by ``nodeid`` in the current run (see ``coverage_keys``)"""
+        self.results.setdefault(nodeid, {"covers": set()})["covers"].update(keys)
+
+    def save(self):
+        """Merge the current run into the file; safe with parallel workers"""
+        results = {nodeid: r for nodeid, r in self.results.items() if r.get("outcome")}
+        if not results:
+            return None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with _locked(self.path):
+            tests = self._load()
+            for nodeid, result in results.items():
+                entry = tests.setdefault(nodeid, {"durations": [], "outcomes": [], "covers": []})
+                entry["outcomes"] = (entry["outcomes"] + [result["outcome"]])[-MAX_RUNS:]
+                if result["outcome"] in ("passed", "failed", "flaky"):
+                    entry["durations"] = (entry["durations"] + [round(result["duration"], 3)])[-MAX_RUNS:]
+                if result["covers"]:
+                    entry["covers"] = sorted(result["covers"])
+                entry["last_run"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"tests": tests}, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+            self.tests = tests
+        return self.path
+
+    def duration(self, nodeid):
+        """Median duration of ``nodeid`` or, failing that, of its other parametrizations"""
+        entry = self.tests.get(nodeid)
+        if entry and entry["durations"]:
+            return statistics.median(entry["durations"])
+        related = [
+            d for other, e in self.tests.items() if _base(other) == _base(nodeid) for d in e["durations"]
+        ]
+        return statistics.median(related) if related else None
+
+    def durations(self, nodeids):
+        """Expected duration of each test; unknown tests get the median of the known ones"""
+        known = {nodeid: self.duration(nodeid) for nodeid in nodeids}
+        values = [d for d in known.values() if d is not None]
+        default = statistics.median(values) if values else DEFAULT_DURATION
+        return {nodeid: default if d is None else d for nodeid, d in known.items()}
+
+    def recently_failed(self, nodeid):
+        entry = self.tests.get(nodeid)
+        return bool(entry) and any(o in ("failed", "error", "flaky") for o in entry["outcomes"][-RECENT_RUNS:])
+
+    def flakiness(self, nodeid):
+        """
+        0 for a test that keeps passing (or keeps failing), towards 1 for a
+        coin flip: runs it only passed on a rerun, plus runs whose pass/fail
+        differs from the run before, as a share of its last runs. Skipped
+        runs do not count; 0 until ``FLAKY_MIN_RUNS`` runs are known.
+        """
+        entry = self.tests.get(nodeid) or {}
+        outcomes = [o for o in entry.get("outcomes", []) if o in ("passed", "failed", "error", "flaky")]
+        if len(outcomes) < FLAKY_MIN_RUNS:
+            return 0.0
+        passed = [o in ("passed", "flaky") for o in outcomes]
+        flips = sum(1 for previous, current in zip(passed, passed[1:]) if previous != current)
+        return min(1.0, (outcomes.count("flaky") + flips) / len(outcomes))
+
+    def covers(self, nodeid):
+        """Routes ``nodeid`` exercised when it last ran, or None if unknown"""
+        entry = self.tests.get(nodeid) or {}
+        return set(entry.get("covers") or []) or None
+
+
+class HistoryRecorder:
+    """
+    pytest plugin that feeds the outcome and duration (setup, call and
+    teardown) of every test into a ``TestHistory`` and saves it at the end
+    of the session. A test that passed only on a rerun is "flaky".
+    """
+
+    def __init__(self, history):
+        self.history = history
+        self._phases = {}
+
+    def pytest_runtest_logreport(self, report):
+        phases = self._phases.setdefault(report.nodeid, [])
+        phases.append(report)
+        if report.when != "teardown":
+            return
+        del self._phases[report.nodeid]
+        if any(r.failed for r in phases):
+            outcome = "error" if any(r.failed and r.when != "call" for r in phases) else "failed"
+        elif any(r.skipped for r in phases):
+            outcome = "skipped"
+        elif getattr(report, "reruns", 0):
+            outcome = "flaky"
+        else:
+            outcome = "passed"
+        self.history.record(report.nodeid, outcome, sum(r.duration for r in phases))
+
+    def pytest_sessionfinish(self, session):
+        self.history.save()
+
+
+def split_quarantined(history, items, threshold=DEFAULT_FLAKY_THRESHOLD):
+    """(quarantined, other) items: quarantined ones score at least ``threshold``"""
+    quarantined, other = [], []
+    for item in items:
+        (quarantined if history.flakiness(item.nodeid) >= threshold else other).append(item)
+    return quarantined, other
+
+
+def order_key(history, nodeid, critical):
+    """Recently failed tests first, then critical ones, then the rest"""
+    if history.recently_failed(nodeid):
+        return 0
+    return 1 if critical else 2
+
+
+def shard_by_duration(test_ids, workers, durations):
+    """
+    Split ``test_ids`` into ``workers`` shards of about equal total
+    duration: longest test first onto the least loaded shard. Tests keep
+    their original order within a shard.
+    """
+    shards = [[] for _ in range(workers)]
+    loads = [0.0] * workers
+    position = {test_id: index for index, test_id in enumerate(test_ids)}
+    for test_id in sorted(test_ids, key=lambda t: -durations.get(t, DEFAULT_DURATION)):
+        lightest = loads.index(min(loads))
+        shards[lightest].append(test_id)
+        loads[lightest] += durations.get(test_id, DEFAULT_DURATION)
+    for s in shards:
+        s.sort(key=position.get)
+    return [(s, load) for s, load in zip(shards, loads) if s]
+
+
+def _git(*args):
+    result = subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True)
+    return result.stdout.split("\n") if result.returncode == 0 else None
+
+
+def default_base():
+    """Target branch of the pull request (Jenkins' CHANGE_TARGET), else main"""
+    return f"origin/{os.getenv('CHANGE_TARGET', 'main')}"
+
+
+def changed_files(base):
+    """
+    Files changed since the merge base with ``base``, plus uncommitted and
+    untracked ones, relative to the repository root.
+    """
+    for ref in (base, base.split("/", 1)[-1]):
+        if _git("rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}") is not None:
+            committed = _git("diff", "--name-only", f"{ref}...HEAD") or []
+            break
+    else:
+        print(f"⚠️  {base} not found, only considering uncommitted changes")
+        committed = []
+    uncommitted = _git("diff", "--name-only", "HEAD") or []
+    untracked = _git("ls-files", "--others", "--exclude-standard") or []
+    return sorted({f for f in committed + uncommitted + untracked if f})
+
+
+def _resolve_import(source, specifier):
+    target = (source.parent / specifier).resolve()
+    for suffix in _SOURCE_SUFFIXES:
+        candidate = target.with_name(target.name + suffix)
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def frontend_pages(root=REPO_ROOT / FRONTEND / "src"):
+    """
+    Source file -> page routes it ends up on, following imports from the
+    page components mounted with ``<Route path=...>`` in App.jsx. Files
+    reachable only through App.jsx itself (navigation, global styles) map
+    to every page.
+    """
+    importers = {}
+    for path in root.rglob("*"):
+        if path.suffix not in (".js", ".jsx", ".ts", ".tsx"):
+            continue
+        for specifier in _IMPORT.findall(path.read_text(encoding="utf-8", errors="replace")):
+            target = _resolve_import(path, specifier)
+            if target:
+                importers.setdefault(target, set()).add(path)
+
+    app = root / "App.jsx"
+    source = app.read_text(encoding="utf-8") if app.is_file() else ""
+    components = {
+        name: _resolve_import(app, specifier)
+        for name, specifier in re.findall(r"""import\s+(\w+)\s+from\s+["'](\.[^"']+)["']""", source)
+    }
+    pages = {}
+    for path, name in _ROUTE.findall(source):
+        if components.get(name):
+            pages.setdefault(components[name], set()).add(path)
+
+    def routes_of(path, seen):
+        if path in pages:
+            return set(pages[path])
+        if path == app or path not in importers:
+            return {"*"}
+        routes = set()
+        for importer in importers[path] - seen:
+            routes |= routes_of(importer, seen | {path})
+        return routes or {"*"}
+
+    return {path: routes_of(path, {path}) for path in set(importers) | set(pages)}
+
+
+def affected_routes(files):
+    """
+    Coverage keys affected by the changed ``files`` (repository relative),
+    and the test modules changed directly. Returns (None, None) when a
+    change affects every test.
+    """
+    keys, modules, pages = set(), set(), None
+    for name in files:
+        path = Path(name)
+        if path.suffix in IGNORED_SUFFIXES or path.name in IGNORED_NAMES:
+            continue
+        if path.parts[0] == TESTS:
+            if path.parent.name == TESTS and path.name.startswith("test_") and path.suffix == ".py":
+                modules.add(path.name)
+                continue
+            return None, None
+        if path.parts[0] == FRONTEND:
+            if len(path.parts) > 2 and path.parts[1] == "src":
+                if pages is None:
+                    pages = frontend_pages()
+                routes = pages.get((REPO_ROOT / path).resolve(), {"*"})
+                keys |= {ALL_PAGES if r == "*" else page_key(r) for r in routes}
+            else:
+                keys.add(ALL_PAGES)
+            continue
+        if path.parts[0] == BACKEND:
+            keys |= {api_key(p) for p in BACKEND_ROUTES.get(name, ("*",))}
+            continue
+        # Compose files, Jenkinsfile, scripts at the root
+        return None, None
+    return keys, modules
+
+
+def _matches(covered, keys):
+    for key in keys:
+        if key in (ALL_PAGES, ALL_API):
+            prefix = key[:-1]
+            if any(c.startswith(prefix) for c in covered):
+                return True
+        elif key.startswith("api:"):
+            if any(c == key or c.startswith(key + "/") for c in covered):
+                return True
+        elif key in covered:
+            return True
+    return False
+
+
+def select_changed(history, items, files):
+    """
+    Split ``items`` into (selected, deselected) for the changed ``files``.
+    Smoke tests and tests without recorded coverage are always selected.
+    """
+    keys, modules = affected_routes(files)
+    if keys is None:
+        return list(items), []
+    selected, deselected = [], []
+    for item in items:
+        covered = history.covers(item.nodeid)
+        if (
+            covered is None
+            or item.get_closest_marker("smoke") is not None
+            or item.nodeid.split("::", 1)[0].rsplit("/", 1)[-1] in modules
+            or _matches(covered, keys)
+        ):
+            selected.append(item)
+        else:
+            deselected.append(item)
+    return selected, deselected
@@ -0,0 +1,306 @@
+"""
+Start (or attach to) the application services and wait until they are ready.
+
+The suite needs MongoDB, the Express backend and the Vite frontend. Instead
+of sleeping a fixed time after starting them, ``ServiceOrchestrator`` polls
+each service's health check with exponential backoff and returns as soon as
+all of them answer:
+
+- mongodb: TCP connect to the host/port of ``MONGO_URI``
+- backend: ``GET <api url>/api/trips`` answers 200 (so MongoDB is usable)
+- frontend: ``GET <base url>/`` serves the page with ``#root``
+
+Modes:
+
+- ``attach``: only wait for services that are already running
+- ``local``: start the backend (``npm start``) and frontend
+  (``npm run dev``) as child processes, unless they already answer
+- ``compose``: ``docker compose up -d --build`` with the repository's
+  ``docker-compose.yml``
+
+Processes started here are stopped again by ``stop`` (whole process group,
+so npm's node children go too) and their output is kept in ``log_dir``.
+Services that were already running are left alone.
+"""
+
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from urllib.parse import urlparse
+
+MODES = ("none", "attach", "local", "compose")
+
+# Set once services are up, so pytest (and each parallel worker) started by
+# run_tests.py attaches instead of starting them again
+SERVICES_READY_ENV = "OPALUMPUS_SERVICES_READY"
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+COMPOSE_FILE = REPO_ROOT / "docker-compose.yml"
+DEFAULT_LOG_DIR = "service_logs"
+DEFAULT_TIMEOUT = 180
+
+INITIAL_DELAY = 0.1
+MAX_DELAY = 2.0
+BACKOFF_FACTOR = 2
+PROBE_TIMEOUT = 3
+STOP_TIMEOUT = 10
+
+
+class ServiceError(Exception):
+    """A service could not be started or did not become ready"""
+
+
+def http_ready(url, expect=None):
+    """Health check: ``url`` answers 200 (and contains ``expect``)"""
+
+    def check():
+        try:
+            with urllib.request.urlopen(url, timeout=PROBE_TIMEOUT) as response:
+                if response.status != 200:
+                    return False
+                return expect is None or expect in response.read().decode("utf-8", "replace")
+        except (urllib.error.URLError, OSError, ValueError):
+            return False
+
+    return check
+
+
+def tcp_ready(host, port):
+    """Health check: something accepts connections on ``host:port``"""
+
+    def check():
+        try:
+            with socket.create_connection((host, port), timeout=PROBE_TIMEOUT):
+                return True
+        except OSError:
+            return False
+
+    return check
+
+
+def _port(url, default):
+    return urlparse(url).port or default
+
+
+class Service:
+    """One service: how to check it and, optionally, how to start it locally"""
+
+    def __init__(self, name, check, command=None, cwd=None, env=None):
+        self.name = name
+        self.check = check
+        self.command = command
+        self.cwd = cwd
+        self.env = env or {}
+        self.process = None
+        self.log_path = None
+        self.ready_after = None
+
+    def start(self, log_dir):
+        """Start the service in its own process group, logging to ``log_dir``"""
+        executable = shutil.which(self.command[0])
+        if executable is None:
+            raise ServiceError(f"Cannot start {self.name}: '{self.command[0]}' is not installed")
+
+        self.log_path = Path(log_dir) / f"{self.name}.log"
+        log = open(self.log_path, "w", encoding="utf-8")
+        kwargs = {}
+        if os.name == "nt":
+            kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+        try:
+            self.process = subprocess.Popen(
+                [executable] + self.command[1:],
+                cwd=self.cwd,
+                env=dict(os.environ, **self.env),
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL,
+                **kwargs
+            )
+        finally:
+            log.close()
+
+    def exited(self):
+        return self.process is not None and self.process.poll() is not None
+
+    def stop(self):
+        """Stop the service's whole process tree"""
+        if self.process is None or self.process.poll() is not None:
+            return
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/T", "/F", "/PID", str(self.process.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            os.killpg(self.process.pid, signal.SIGTERM)
+        try:
+            self.process.wait(timeout=STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            if os.name != "nt":
+                os.killpg(self.process.pid, signal.SIGKILL)
+            self.process.wait()
+
+    def log_tail(self, lines=20):
+        if not self.log_path or not self.log_path.exists():
+            return ""
+        with open(self.log_path, encoding="utf-8", errors="replace") as f:
+            return "".join(f.readlines()[-lines:])
+
+
+def wait_until_ready(services, timeout=DEFAULT_TIMEOUT, on_ready=None):
+    """
+    Poll every service until its check passes. Each service backs off
+    exponentially (0.1 s doubling up to 2 s) on its own, so a slow one does
+    not delay noticing the others. Fails fast if a started process exits.
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    pending = {service.name: [service, started, INITIAL_DELAY] for service in services}
+
+    while pending:
+        now = time.monotonic()
+        for name, state in list(pending.items()):
+            service, next_probe, delay = state
+            if now < next_probe:
+                continue
+            if service.check():
+                service.ready_after = time.monotonic() - started
+                del pending[name]
+                if on_ready:
+                    on_ready(service)
+                continue
+            if service.exited():
+                raise ServiceError(
+                    f"{name} exited with code {service.process.returncode} before it was ready\n"
+                    f"{service.log_tail()}"
+                )
+            state[1], state[2] = now + delay, min(delay * BACKOFF_FACTOR, MAX_DELAY)
+
+        if not pending:
+            break
+        if time.monotonic() >= deadline:
+            details = "\n".join(
+                f"{name}: not ready\n{state[0].log_tail()}" for name, state in pending.items()
+            )
+            raise ServiceError(f"Services not ready after {timeout}s\n{details}")
+        next_due = min(state[1] for state in pending.values())
+        time.sleep(max(0.0, min(next_due, deadline) - time.monotonic()))
+
+
+def compose_command():
+    """``docker compose`` (v2) or the standalone ``docker-compose``"""
+    if shutil.which("docker"):
+        probe = subprocess.run(["docker", "compose", "version"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if probe.returncode == 0:
+            return ["docker", "compose"]
+    if shutil.which("docker-compose"):
+        return ["docker-compose"]
+    raise ServiceError("--services=compose needs docker compose or docker-compose")
+
+
+class ServiceOrchestrator:
+    """
+    Brings the application up for a test run and takes it down afterwards.
+    ``only`` limits which services are managed, e.g. just the frontend when
+    the API is mocked. MongoDB is only checked when ``mongo_uri`` is given.
+    """
+
+    def __init__(self, mode, base_url, api_url, mongo_uri=None,
+                 log_dir=DEFAULT_LOG_DIR, timeout=DEFAULT_TIMEOUT, only=None):
+        if mode not in MODES:
+            raise ServiceError(f"Unknown services mode {mode!r}, expected one of {MODES}")
+        self.mode = mode
+        self.base_url = base_url.rstrip("/")
+        self.api_url = api_url.rstrip("/")
+        self.mongo_uri = mongo_uri
+        self.log_dir = Path(log_dir)
+        self.timeout = timeout
+        self.services = [s for s in self._services() if only is None or s.name in only]
+        self._compose = None
+
+    def _services(self):
+        backend = Service(
+            "backend",
+            http_ready(f"{self.api_url}/api/trips", expect='"trips"'),
+            command=["npm", "start"],
+            cwd=REPO_ROOT / "Backend",
+            env={"PORT": str(_port(self.api_url, 3000))},
+        )
+        frontend = Service(
+            "frontend",
+            http_ready(f"{self.base_url}/", expect='id="root"'),
+            command=["npm", "run", "dev", "--", "--port", str(_port(self.base_url, 5173)), "--strictPort"],
+            cwd=REPO_ROOT / "Opalumpus_frontEnd",
+            # The dev server reads VITE_* from the environment, so the
+            # frontend talks to the backend under test
+            env={"VITE_API_BASE_URL": self.api_url},
+        )
+        services = [backend, frontend]
+        if self.mongo_uri:
+            location = urlparse(self.mongo_uri)
+            if location.scheme == "mongodb" and location.hostname:
+                services.insert(0, Service("mongodb", tcp_ready(location.hostname, location.port or 27017)))
+        return services
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """Start what is needed for ``mode`` and block until every service is ready"""
+        if self.mode == "none":
+            return
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        began = time.monotonic()
+
+        if self.mode == "compose":
+            self._compose = compose_command() + ["-f", str(COMPOSE_FILE)]
+            print(f"Starting services with {' '.join(self._compose)} up")
+            names = [s.name for s in self.services]
+            result = subprocess.run(self._compose + ["up", "-d", "--build"] + names)
+            if result.returncode != 0:
+                raise ServiceError("docker compose up failed")
+        elif self.mode == "local":
+            for service in self.services:
+                if service.command is None:
+                    continue
+                if service.check():
+                    print(f"✓ {service.name} already running, attaching")
+                    continue
+                print(f"Starting {service.name}: {' '.join(service.command)} (log: "
+                      f"{self.log_dir / (service.name + '.log')})")
+                service.start(self.log_dir)
+
+        try:
+            wait_until_ready(
+                self.services,
+                self.timeout,
+                on_ready=lambda s: print(f"✓ {s.name} ready after {s.ready_after:.1f}s"),
+            )
+        except ServiceError:
+            self.stop()
+            raise
+        os.environ[SERVICES_READY_ENV] = "1"
+        print(f"✓ All services ready in {time.monotonic() - began:.1f}s")
+
+    def stop(self):
+        """Stop the services started by ``start`` and collect their logs"""
+        for service in reversed(self.services):
+            service.stop()
+        if self._compose:
+            with open(self.log_dir / "compose.log", "w", encoding="utf-8") as log:
+                subprocess.run(self._compose + ["logs", "--no-color", "--timestamps"],
+                               stdout=log, stderr=subprocess.STDOUT)
+            subprocess.run(self._compose + ["down"])
+            self._compose = None
+        os.environ.pop(SERVICES_READY_ENV, None)
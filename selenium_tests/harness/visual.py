@@ -0,0 +1,316 @@
+"""
+Visual regression checks: screenshots per route and viewport compared with
+approved baselines.
+
+A screenshot is compared with its baseline in NumPy, all pixels at once:
+
+- the colour distance of each pixel is measured in YIQ space, weighted the
+  way the eye weighs brightness over hue (as pixelmatch does); pixels
+  closer than ``threshold`` (0-1) count as equal
+- a differing pixel is anti-aliasing (the same edge rendered a sub-pixel
+  off) and does not count when, as in pixelmatch, at most two of its
+  neighbours have its brightness and its darkest or brightest neighbour
+  lies in a flat area (more than two identical neighbours) of both images
+- ``ignore`` rectangles (e.g. content from the database) are masked out
+- a screenshot of a different size differs by every pixel outside the
+  common area
+
+A comparison passes while at most ``max_diff_pct`` percent of the pixels
+differ. ``VisualDiffer.compare`` hands the work to a process pool and
+returns a future, so the browser moves on to the next viewport while the
+previous screenshot is being compared.
+
+Baselines are PNGs in ``visual_baselines/<name>.png`` (RGB, optimized),
+checked in with the tests. A run never changes them: screenshots without a
+baseline or that differ from it are kept in ``results/<run id>/visual/``
+with a diff image and a ``.json`` verdict, and ``python visual.py approve``
+makes them the new baselines.
+"""
+
+import json
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from harness.profiles import DEVICES, DeviceProfile
+
+DEFAULT_BASELINE_DIR = "visual_baselines"
+VISUAL_DIR = "visual"
+
+DEFAULT_THRESHOLD = 0.1
+DEFAULT_MAX_DIFF_PCT = 0.1
+
+# The viewports of test_page_responsiveness, at a pixel ratio of 1 so the
+# baselines stay small and are compared quickly
+VIEWPORTS = {
+    name: DeviceProfile(name, device.width, device.height, mobile=device.mobile)
+    for name, device in DEVICES.items()
+}
+
+# Largest possible YIQ distance (black against white)
+_MAX_DELTA = 35215.0
+
+# (dy, dx) of the eight neighbours, in the order pixelmatch visits them
+_NEIGHBOURS = [(dy, dx) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+
+# Animations, transitions and the text caret would make every screenshot
+# slightly different
+_FREEZE_STYLE = """
+*, *::before, *::after {
+    animation: none !important;
+    transition: none !important;
+    caret-color: transparent !important;
+}
+"""
+
+# Freezes the page, then waits for fonts, images and two frames to paint
+_SETTLE_SCRIPT = """
+var done = arguments[arguments.length - 1];
+if (!document.getElementById('opalumpus-visual-freeze')) {
+    var style = document.createElement('style');
+    style.id = 'opalumpus-visual-freeze';
+    style.textContent = arguments[0];
+    document.head.appendChild(style);
+}
+var images = Array.prototype.filter.call(document.images, function (img) { return !img.complete; });
+Promise.all([document.fonts ? document.fonts.ready : null].concat(images.map(function (img) {
+    return new Promise(function (resolve) { img.onload = img.onerror = resolve; });
+}))).then(function () {
+    requestAnimationFrame(function () { requestAnimationFrame(function () { done(true); }); });
+});
+"""
+
+# Rectangles of the elements matching the selectors, in screenshot pixels
+_RECTS_SCRIPT = """
+var ratio = window.devicePixelRatio || 1;
+var rects = [];
+arguments[0].forEach(function (selector) {
+    document.querySelectorAll(selector).forEach(function (element) {
+        var r = element.getBoundingClientRect();
+        if (r.width && r.height) {
+            rects.push([r.left * ratio, r.top * ratio, r.width * ratio, r.height * ratio]);
+        }
+    });
+});
+return rects;
+"""
+
+
+def settle(driver):
+    """Freeze animations and wait until the page is painted"""
+    driver.execute_async_script(_SETTLE_SCRIPT, _FREEZE_STYLE)
+
+
+def element_rects(driver, selectors):
+    """``[x, y, width, height]`` of every element matching ``selectors``"""
+    return driver.execute_script(_RECTS_SCRIPT, list(selectors)) if selectors else []
+
+
+def baseline_name(path, viewport):
+    """e.g. ``trips@phone`` for ``/trips`` on the phone viewport"""
+    slug = re.sub(r"[^a-z0-9]+", "-", path.lower()).strip("-") or "home"
+    return f"{slug}@{viewport}"
+
+
+def load_image(path):
+    """RGB pixels of a PNG as a ``uint8`` array of shape (height, width, 3)"""
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def save_image(pixels, path):
+    """Write RGB pixels as a compact PNG"""
+    Image.fromarray(pixels).save(path, optimize=True)
+
+
+def _yiq(pixels):
+    rgb = pixels.astype(np.float32)
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    y = 0.29889531 * r + 0.58662247 * g + 0.11448223 * b
+    i = 0.59597799 * r - 0.27417610 * g - 0.32180189 * b
+    q = 0.21147017 * r - 0.52261711 * g + 0.31114694 * b
+    return y, i, q
+
+
+def _neighbours(values, fill):
+    """Views of ``values`` in which each pixel holds one of its eight neighbours (``fill`` outside)"""
+    height, width = values.shape
+    padded = np.pad(values, 1, mode="constant", constant_values=fill)
+    for dy, dx in _NEIGHBOURS:
+        yield padded[1 + dy:1 + dy + height, 1 + dx:1 + dx + width]
+
+
+def _many_siblings(pixels, edge):
+    """Pixels with more than two identical neighbours; the image edge counts as one"""
+    packed = (pixels[..., 0].astype(np.uint32) << 16) | (pixels[..., 1].astype(np.uint32) << 8) | pixels[..., 2]
+    count = edge.astype(np.uint8)
+    # 2**24 is no colour, so the outside never matches
+    for neighbour in _neighbours(packed, 1 << 24):
+        count += neighbour == packed
+    return count > 2
+
+
+def _antialiased(y, flat, edge):
+    """
+    pixelmatch's anti-aliasing check of every pixel of one image (brightness
+    ``y``): at most two neighbours of the same brightness (the image edge
+    counts as one), and the darkest or the brightest neighbour is ``flat``
+    (has many siblings in both images).
+    """
+    zeroes = edge.astype(np.uint8)
+    low, high = np.zeros_like(y), np.zeros_like(y)
+    low_flat, high_flat = np.zeros(y.shape, dtype=bool), np.zeros(y.shape, dtype=bool)
+    # The outside is NaN, which is neither equal, darker nor brighter
+    for neighbour, neighbour_flat in zip(_neighbours(y, np.nan), _neighbours(flat, False)):
+        delta = y - neighbour
+        zeroes += delta == 0
+        # Strict comparisons: the first of equally dark neighbours wins
+        brighter, darker = delta < low, delta > high
+        np.copyto(low, delta, where=brighter)
+        np.copyto(low_flat, neighbour_flat, where=brighter)
+        np.copyto(high, delta, where=darker)
+        np.copyto(high_flat, neighbour_flat, where=darker)
+    return (zeroes <= 2) & (low < 0) & (high > 0) & (low_flat | high_flat)
+
+
+def diff_images(expected, actual, threshold=DEFAULT_THRESHOLD, ignore=(), antialiasing=True):
+    """
+    Compare two RGB arrays. Returns (differing pixel count, total pixel
+    count, mask) where the mask is 0 (equal), 1 (differs), 2
+    (anti-aliasing) or 3 (ignored) per pixel of the larger size.
+    """
+    height = max(expected.shape[0], actual.shape[0])
+    width = max(expected.shape[1], actual.shape[1])
+    common_h = min(expected.shape[0], actual.shape[0])
+    common_w = min(expected.shape[1], actual.shape[1])
+    mask = np.ones((height, width), dtype=np.uint8)
+    expected, actual = expected[:common_h, :common_w], actual[:common_h, :common_w]
+
+    # Most screenshots match their baseline exactly
+    changed = (expected != actual).any(axis=2)
+    common = np.zeros((common_h, common_w), dtype=np.uint8)
+    if changed.any():
+        # Only the box around the changed pixels (plus the neighbours of
+        # their neighbours, which the anti-aliasing check looks at) is measured
+        rows, cols = np.flatnonzero(changed.any(axis=1)), np.flatnonzero(changed.any(axis=0))
+        box = (slice(max(0, rows[0] - 2), min(common_h, rows[-1] + 3)),
+               slice(max(0, cols[0] - 2), min(common_w, cols[-1] + 3)))
+        y1, i1, q1 = _yiq(expected[box])
+        y2, i2, q2 = _yiq(actual[box])
+        delta = 0.5053 * (y1 - y2) ** 2 + 0.299 * (i1 - i2) ** 2 + 0.1957 * (q1 - q2) ** 2
+        different = delta > _MAX_DELTA * threshold * threshold
+        common[box] = different
+        if antialiasing and different.any():
+            ys, xs = np.ogrid[box[0], box[1]]
+            edge = (ys == 0) | (ys == common_h - 1) | (xs == 0) | (xs == common_w - 1)
+            flat = _many_siblings(expected[box], edge) & _many_siblings(actual[box], edge)
+            aa = _antialiased(y1, flat, edge) | _antialiased(y2, flat, edge)
+            common[box][different & aa] = 2
+    mask[:common_h, :common_w] = common
+
+    for x, y, w, h in ignore:
+        x0, y0 = max(0, int(x)), max(0, int(y))
+        mask[y0:max(y0, int(np.ceil(y + h))), x0:max(x0, int(np.ceil(x + w)))] = 3
+    return int(np.count_nonzero(mask == 1)), height * width, mask
+
+
+def diff_overlay(expected, actual, mask):
+    """The baseline faded to grey with differences in red and anti-aliasing in yellow"""
+    height, width = mask.shape
+    base = expected if expected.shape[:2] == mask.shape else actual if actual.shape[:2] == mask.shape else None
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    if base is not None:
+        grey = _yiq(base)[0]
+        image[...] = (255 - 0.1 * (255 - grey))[..., None].astype(np.uint8)
+    image[mask == 1] = (255, 0, 0)
+    image[mask == 2] = (255, 255, 0)
+    image[mask == 3] = (200, 200, 255)
+    return image
+
+
+def compare_files(baseline, actual, output_dir, name, threshold=DEFAULT_THRESHOLD,
+                  max_diff_pct=DEFAULT_MAX_DIFF_PCT, ignore=()):
+    """
+    Compare the screenshot ``actual`` with the ``baseline`` PNG; runs in the
+    process pool. Writes the verdict to ``<output_dir>/<name>.json`` (and a
+    diff image when they differ) and returns it.
+    """
+    started = time.perf_counter()
+    output_dir = Path(output_dir)
+    result = {"name": name, "baseline": str(baseline), "actual": str(actual), "ignored": len(ignore)}
+    pixels = load_image(actual)
+    if not Path(baseline).exists():
+        result.update(status="new", size=list(pixels.shape[1::-1]))
+    else:
+        expected = load_image(baseline)
+        count, total, mask = diff_images(expected, pixels, threshold, ignore)
+        result.update(
+            status="differs" if count * 100 > max_diff_pct * total else "matches",
+            pixels=count,
+            percent=round(count * 100 / total, 4),
+            size=list(pixels.shape[1::-1]),
+            baseline_size=list(expected.shape[1::-1]),
+        )
+        if count:
+            diff = output_dir / f"{name}.diff.png"
+            Image.fromarray(diff_overlay(expected, pixels, mask)).save(diff, compress_level=1)
+            result["diff"] = str(diff)
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    (output_dir / f"{name}.json").write_text(json.dumps(result, indent=2), encoding="utf-8")
+    return result
+
+
+class VisualDiffer:
+    """
+    Compares screenshots with their baselines in a pool of processes.
+    The pool starts on the first comparison; ``close`` waits for it.
+    """
+
+    def __init__(self, baseline_dir, output_dir, threshold=DEFAULT_THRESHOLD,
+                 max_diff_pct=DEFAULT_MAX_DIFF_PCT, processes=None):
+        self.baseline_dir = Path(baseline_dir)
+        self.output_dir = Path(output_dir)
+        self.threshold = threshold
+        self.max_diff_pct = max_diff_pct
+        self.processes = processes or min(len(VIEWPORTS), os.cpu_count() or 1)
+        self._pool = None
+
+    def compare(self, name, png, ignore=()):
+        """Store the screenshot ``png`` (bytes) and compare it with baseline ``name``; returns a future"""
+        if self._pool is None:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            # Forking a process that runs WebDriver threads is unsafe
+            self._pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+        actual = self.output_dir / f"{name}.png"
+        actual.write_bytes(png)
+        return self._pool.submit(
+            compare_files, self.baseline_dir / f"{name}.png", actual, self.output_dir, name,
+            self.threshold, self.max_diff_pct, [tuple(rect) for rect in ignore],
+        )
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def verdicts(output_dir):
+    """The ``.json`` verdicts of a run's comparisons, by name"""
+    return {
+        path.stem: json.loads(path.read_text(encoding="utf-8"))
+        for path in sorted(Path(output_dir).glob("*.json"))
+    }
+
+
+def approve(verdict, baseline_dir):
+    """Make a run's screenshot the baseline; returns the baseline path"""
+    baseline = Path(baseline_dir) / f"{verdict['name']}.png"
+    baseline.parent.mkdir(parents=True, exist_ok=True)
+    save_image(load_image(verdict["actual"]), baseline)
+    return baseline
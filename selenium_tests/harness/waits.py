@@ -0,0 +1,199 @@
+"""
+Event-driven readiness checks for the React single-page app.
+
+Instead of sleeping for a fixed time after every navigation or click, tests
+wait for the conditions that actually matter:
+
+- ``route_rendered``: the SPA router shows the expected path and React has
+  mounted content into ``#root``
+- ``network_idle``: no fetch/XHR is in flight (tracked by a small script
+  injected into every document before the app's own code runs)
+- ``element_stable``: an element is present and its box has stopped moving
+
+Each condition is a plain callable usable with ``WebDriverWait.until``.
+"""
+
+import time
+from urllib.parse import urlparse
+
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    UnexpectedAlertPresentException,
+)
+from selenium.webdriver.support.ui import WebDriverWait
+
+from harness.profiling import span
+
+DEFAULT_TIMEOUT = 10
+POLL_FREQUENCY = 0.05
+
+# Milliseconds without any network activity before the page counts as idle
+NETWORK_QUIET_MS = 250
+
+# Counts in-flight fetch/XHR requests. Installed with
+# Page.addScriptToEvaluateOnNewDocument so it wraps the APIs before the
+# application bundle (axios) captures references to them.
+NETWORK_IDLE_HOOK = """
+(function () {
+    if (window.__opalumpusNetwork) { return; }
+    var state = window.__opalumpusNetwork = {pending: 0, lastActivity: performance.now()};
+    function start() { state.pending += 1; state.lastActivity = performance.now(); }
+    function done() { state.pending = Math.max(0, state.pending - 1); state.lastActivity = performance.now(); }
+
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function () {
+            start();
+            return originalFetch.apply(this, arguments).then(
+                function (response) { done(); return response; },
+                function (error) { done(); throw error; }
+            );
+        };
+    }
+
+    var originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        start();
+        this.addEventListener('loadend', done, {once: true});
+        return originalSend.apply(this, arguments);
+    };
+})();
+"""
+
+# Callables invoked as listener(driver, url) after every open_page
+_navigation_listeners = []
+
+# Multiplier for every timeout, raised while a throttled profile is emulated
+_timeout_scale = 1.0
+
+_NETWORK_STATE_SCRIPT = """
+var state = window.__opalumpusNetwork;
+if (!state) { return null; }
+return {pending: state.pending, quietFor: performance.now() - state.lastActivity};
+"""
+
+_ROUTE_STATE_SCRIPT = """
+var root = document.getElementById('root');
+return {
+    readyState: document.readyState,
+    path: window.location.pathname,
+    mounted: !!root && root.childElementCount > 0
+};
+"""
+
+
+def install_network_hook(driver):
+    """Register the fetch/XHR tracker for every document ``driver`` loads"""
+    driver.execute_cdp_cmd(
+        "Page.addScriptToEvaluateOnNewDocument", {"source": NETWORK_IDLE_HOOK}
+    )
+
+
+def route_rendered(path):
+    """Condition: the SPA is showing ``path`` and React has mounted"""
+    expected = path.rstrip("/") or "/"
+
+    def condition(driver):
+        state = driver.execute_script(_ROUTE_STATE_SCRIPT)
+        current = state["path"].rstrip("/") or "/"
+        return state["readyState"] == "complete" and current == expected and state["mounted"]
+
+    return condition
+
+
+def network_idle(quiet_ms=NETWORK_QUIET_MS):
+    """Condition: no fetch/XHR pending for at least ``quiet_ms``"""
+
+    def condition(driver):
+        try:
+            state = driver.execute_script(_NETWORK_STATE_SCRIPT)
+        except UnexpectedAlertPresentException:
+            # The app only alerts once it has handled a response
+            return True
+        if state is None:
+            # Hook not installed in this document; nothing to wait for
+            return True
+        return state["pending"] == 0 and state["quietFor"] >= quiet_ms
+
+    return condition
+
+
+class element_stable:
+    """
+    Condition: the element at ``locator`` exists, is displayed and its
+    bounding box is unchanged across ``samples`` consecutive polls.
+    Returns the element once stable.
+    """
+
+    def __init__(self, locator, samples=2):
+        self.locator = locator
+        self.samples = samples
+        self._last_rect = None
+        self._matches = 0
+
+    def __call__(self, driver):
+        try:
+            element = driver.find_element(*self.locator)
+            rect = element.rect if element.is_displayed() else None
+        except (NoSuchElementException, StaleElementReferenceException):
+            rect = None
+
+        if rect is None or rect != self._last_rect:
+            self._last_rect = rect
+            self._matches = 0
+            return False
+
+        self._matches += 1
+        return element if self._matches >= self.samples - 1 else False
+
+
+def set_timeout_scale(factor):
+    """Stretch all waits by ``factor`` (e.g. under network/CPU throttling)"""
+    global _timeout_scale
+    _timeout_scale = max(1.0, factor)
+
+
+def _condition_name(condition, message):
+    """``route_rendered.<locals>.condition`` -> ``route_rendered``"""
+    name = getattr(condition, "__qualname__", type(condition).__name__).split(".<locals>")[0]
+    return message or "condition" if name == "<lambda>" else name
+
+
+def wait_for(driver, condition, timeout=DEFAULT_TIMEOUT, message=""):
+    """``WebDriverWait.until`` with a tight polling interval"""
+    with span("wait", _condition_name(condition, message)):
+        return WebDriverWait(driver, timeout * _timeout_scale, poll_frequency=POLL_FREQUENCY).until(
+            condition, message
+        )
+
+
+def wait_for_network_idle(driver, timeout=DEFAULT_TIMEOUT, quiet_ms=NETWORK_QUIET_MS):
+    """Block until no fetch/XHR has been in flight for ``quiet_ms``"""
+    return wait_for(driver, network_idle(quiet_ms), timeout, "network did not go idle")
+
+
+def wait_until_ready(driver, path, timeout=DEFAULT_TIMEOUT):
+    """Block until ``path`` is rendered and its data requests have settled"""
+    deadline = time.monotonic() + timeout * _timeout_scale
+    wait_for(driver, route_rendered(path), timeout, f"route {path} did not render")
+    remaining = (deadline - time.monotonic()) / _timeout_scale
+    wait_for_network_idle(driver, max(remaining, POLL_FREQUENCY))
+
+
+def add_navigation_listener(listener):
+    """Call ``listener(driver, url)`` each time ``open_page`` finishes"""
+    _navigation_listeners.append(listener)
+
+
+def remove_navigation_listener(listener):
+    if listener in _navigation_listeners:
+        _navigation_listeners.remove(listener)
+
+
+def open_page(driver, url, timeout=DEFAULT_TIMEOUT):
+    """Navigate to ``url`` and return once the page is ready for assertions"""
+    driver.get(url)
+    wait_until_ready(driver, urlparse(url).path or "/", timeout)
+    for listener in list(_navigation_listeners):
+        listener(driver, url)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+API load test runner for the Opalumpus Express backend
+Usage:
+    python load_test.py --scenario list_trips --concurrency 20 --duration 30
+    python load_test.py --scenario mixed --rate 50 --duration 60 --warmup 10
+    python load_test.py --trip-sizes 0,100,1000,10000 --concurrency 10
+
+--rate switches from the closed-loop model (fixed number of concurrent
+users) to the open-loop model (fixed arrival rate). --trip-sizes grows the
+trips collection step by step and measures GET /api/trips at each size.
+update_trip and delete_trip work on trips created before the run starts
+(--prepare-trips); requests that find none left are reported as skipped.
+Trips and bookings are tagged with --namespace; the trips are deleted at
+the end, the bookings only with --seed-backend mongo (the API cannot
+delete them).
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from harness.load import (
+    DEFAULT_PREPARED_TRIPS,
+    LOAD_TEST_NAMESPACE,
+    NEEDS_TRIPS,
+    ApiScenarios,
+    LoadGenerator,
+    format_summary,
+    load_test_client,
+)
+from harness.seeding import BACKENDS, DEFAULT_MONGO_URI, SeedingError, create_seeder
+
+load_dotenv()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Opalumpus API load test")
+    parser.add_argument("--api-url", default=os.getenv("API_URL", "http://localhost:3000"))
+    parser.add_argument("--scenario", default="list_trips",
+                        help="list_trips, add_trip, update_trip, delete_trip, book_now, admin_signin or mixed")
+    parser.add_argument("--concurrency", type=int, default=10,
+                        help="Concurrent users (closed loop) or max in-flight requests (open loop)")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Open-loop arrival rate in requests per second")
+    parser.add_argument("--constant-arrivals", action="store_true",
+                        help="Use evenly spaced arrivals instead of a Poisson process")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds per run")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds of unmeasured warm-up")
+    parser.add_argument("--prepare-trips", type=int, default=None,
+                        help="Trips to create before an update_trip or delete_trip run (default: "
+                             "--concurrency for update_trip, the expected arrivals for an open-loop "
+                             f"delete_trip, {DEFAULT_PREPARED_TRIPS} otherwise)")
+    parser.add_argument("--trip-sizes", default=None,
+                        help="Comma separated trips collection sizes to sweep GET /api/trips over")
+    parser.add_argument("--namespace", default=LOAD_TEST_NAMESPACE,
+                        help="Seed namespace the created trips and bookings are tagged with")
+    parser.add_argument("--seed-backend", choices=BACKENDS, default=os.getenv("SEED_BACKEND", "api"),
+                        help="mongo also removes the bookings the load test created (default: api)")
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGO_URI", DEFAULT_MONGO_URI))
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    return parser.parse_args(argv)
+
+
+def trips_to_prepare(name, args):
+    if args.prepare_trips is not None:
+        return args.prepare_trips
+    if name == "update_trip":
+        return args.concurrency
+    if args.rate:
+        return int(args.rate * (args.warmup + args.duration) * 1.1) + args.concurrency
+    return DEFAULT_PREPARED_TRIPS
+
+
+def run_scenario(scenarios, name, args):
+    if name in NEEDS_TRIPS:
+        prepared = scenarios.prepare(name, trips_to_prepare(name, args), args.concurrency)
+        print(f"Prepared {prepared} trips for {name}")
+    generator = LoadGenerator(name, scenarios.get(name))
+    if args.rate:
+        return generator.run_open(args.rate, args.duration, args.warmup,
+                                  max_workers=args.concurrency,
+                                  poisson=not args.constant_arrivals)
+    return generator.run_closed(args.concurrency, args.duration, args.warmup)
+
+
+def grow_trips(scenarios, target, concurrency):
+    """Add load-test trips until the collection holds at least ``target`` trips"""
+    current = len(scenarios.client.get("/api/trips", timeout=60).json().get("trips", []))
+    missing = max(0, target - current)
+    if missing:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda _: scenarios.create_trip(), range(missing)))
+    return current + missing
+
+
+def remove_bookings(scenarios, client, args):
+    """Delete the tagged bookings with the mongo backend, or say they are left behind"""
+    if args.seed_backend != "mongo":
+        print(f"\n⚠️  {scenarios.bookings_sent} bookings tagged {scenarios.tag} are left in the database; "
+              f"remove them with: python seed_data.py teardown --namespace {args.namespace} --backend mongo")
+        return
+    try:
+        seeder = create_seeder("mongo", api_client=client, mongo_uri=args.mongo_uri)
+        try:
+            removed = seeder.teardown(args.namespace)
+        finally:
+            seeder.close()
+    except Exception as e:
+        # pymongo missing or MongoDB unreachable: the results still count
+        print(f"\n⚠️  Could not remove the bookings tagged {scenarios.tag}: {e}")
+        return
+    print(f"Removed {removed['bookings']} bookings created by the load test")
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    client = load_test_client(args.api_url, args.concurrency)
+    scenarios = ApiScenarios(client, args.namespace)
+    results = []
+
+    print("=" * 60)
+    print(f"Opalumpus API Load Test against {args.api_url}")
+    print("=" * 60)
+
+    try:
+        if args.trip_sizes:
+            for size in [int(s) for s in args.trip_sizes.split(",")]:
+                actual = grow_trips(scenarios, size, args.concurrency)
+                summary = run_scenario(scenarios, "list_trips", args)
+                summary["trips_in_collection"] = actual
+                results.append(summary)
+                print(f"\nTrips in collection: {actual}")
+                print(format_summary(summary))
+        else:
+            if args.scenario not in scenarios.names():
+                print(f"Unknown scenario: {args.scenario}")
+                return 2
+            summary = run_scenario(scenarios, args.scenario, args)
+            results.append(summary)
+            print()
+            print(format_summary(summary))
+    finally:
+        removed = scenarios.cleanup()
+        if removed:
+            print(f"\nRemoved {removed} trips created by the load test")
+        if scenarios.bookings_sent:
+            remove_bookings(scenarios, client, args)
+        client.close()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📊 Results written to {args.output}")
+
+    return 1 if any(r["errors"] or r["skipped"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
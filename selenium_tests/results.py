@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Live view of the streamed test results
+Usage:
+    python results.py watch                  # progress lines in the terminal
+    python results.py serve --port 8765      # live page at http://localhost:8765
+    python results.py render --html report.html --junit-xml results.xml
+
+Every command reads the run in --results-dir (default: results) with the
+newest stream unless --run names one. watch and serve follow the streams
+while the tests are still running; render writes the reports of a finished
+run (run_tests.py does that on its own).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from harness.profiling import suite_summary_html
+from harness.results import (
+    DEFAULT_RESULTS_DIR,
+    StreamFollower,
+    Tally,
+    format_progress,
+    latest_run_id,
+    render_html,
+    render_junit,
+    stream_paths,
+)
+
+_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Opalumpus tests: RUN_ID</title>
+<style>
+body { font-family: Helvetica, Arial, sans-serif; font-size: 13px; margin: 20px; }
+table { border-collapse: collapse; width: 100%; }
+td, th { border: 1px solid #e6e6e6; padding: 3px 8px; text-align: left; vertical-align: top; }
+.passed { color: #2e7d32; } .failed, .error { color: #c62828; } .skipped, .xfailed { color: #8d6e00; }
+pre { white-space: pre-wrap; margin: 4px 0; }
+</style></head><body>
+<h1>Opalumpus tests: RUN_ID</h1>
+<p id="summary">Waiting for results...</p>
+<table><thead><tr><th>Result</th><th>Test</th><th>Duration</th><th>Worker</th></tr></thead>
+<tbody id="results"></tbody></table>
+<script>
+var offsets = {}, counts = {}, collected = {}, finished = {};
+function cell(text, cls) {
+    var td = document.createElement('td');
+    td.textContent = text;
+    if (cls) { td.className = cls; }
+    return td;
+}
+function add(event) {
+    if (event.event === 'start') { collected[event.worker] = event.collected; return; }
+    if (event.event === 'finish') { finished[event.worker] = true; return; }
+    counts[event.outcome] = (counts[event.outcome] || 0) + 1;
+    var row = document.createElement('tr'), detail = cell(event.nodeid);
+    if (event.message) {
+        var pre = document.createElement('pre');
+        pre.textContent = event.message;
+        detail.appendChild(pre);
+    }
+    (event.artifacts || []).forEach(function (artifact) {
+        var link = document.createElement('a');
+        link.href = '/files/' + artifact.path;
+        link.textContent = artifact.kind + ' ';
+        detail.appendChild(link);
+    });
+    row.appendChild(cell(event.outcome, event.outcome));
+    row.appendChild(detail);
+    row.appendChild(cell(event.duration.toFixed(2) + 's'));
+    row.appendChild(cell('w' + event.worker));
+    document.getElementById('results').appendChild(row);
+}
+function summary() {
+    var done = 0, total = 0, parts = [], workers = Object.keys(collected);
+    Object.keys(counts).forEach(function (k) { done += counts[k]; parts.push(counts[k] + ' ' + k); });
+    workers.forEach(function (w) { total += collected[w]; });
+    var running = workers.length && Object.keys(finished).length === workers.length ? 'finished' : 'running';
+    document.getElementById('summary').textContent =
+        done + '/' + total + ' tests: ' + (parts.join(', ') || 'none finished') + ' (' + running + ')';
+}
+function poll() {
+    fetch('/events?' + new URLSearchParams({offsets: JSON.stringify(offsets)}))
+        .then(function (response) { return response.json(); })
+        .then(function (data) {
+            offsets = data.offsets;
+            data.events.forEach(add);
+            summary();
+        })
+        .finally(function () { setTimeout(poll, 1000); });
+}
+poll();
+</script></body></html>
+"""
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Live view and reports of the streamed test results")
+    parser.add_argument("command", choices=("watch", "serve", "render"))
+    parser.add_argument("--results-dir", default=os.getenv("RESULTS_DIR", DEFAULT_RESULTS_DIR))
+    parser.add_argument("--run", default=None, help="Run id (default: the run with the newest stream)")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the live page (serve)")
+    parser.add_argument("--html", default=None, help="Render the HTML report to this file (render)")
+    parser.add_argument("--junit-xml", default=None, help="Render the JUnit XML to this file (render)")
+    parser.add_argument("--perf-dir", default=os.getenv("PERF_RESULTS_DIR", "perf_results"),
+                        help="Suite profile traces to include in the HTML report (render)")
+    return parser.parse_args(argv)
+
+
+def watch(results_dir, run_id):
+    """Print every test as it finishes until all workers of the run are done"""
+    follower = StreamFollower(results_dir, run_id)
+    tally = Tally()
+    try:
+        while True:
+            for event in follower.poll():
+                tally.add(event)
+                if event.get("event") == "test":
+                    print(format_progress(event, tally), flush=True)
+            if tally.complete:
+                break
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    print(f"\n{tally.summary()}")
+    return 1 if tally.counts["failed"] or tally.counts["error"] else 0
+
+
+class _ViewerHandler(SimpleHTTPRequestHandler):
+    """The live page, the events after given offsets, and the failure artifacts"""
+
+    results_dir = None
+    run_id = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=str(self.results_dir), **kwargs)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/":
+            self._send(_PAGE.replace("RUN_ID", self.run_id).encode("utf-8"), "text/html; charset=utf-8")
+        elif url.path == "/events":
+            follower = StreamFollower(self.results_dir, self.run_id)
+            offsets = json.loads(parse_qs(url.query).get("offsets", ["{}"])[0])
+            follower.offsets = {Path(self.results_dir) / name: offset for name, offset in offsets.items()}
+            events = follower.poll()
+            body = {"events": events, "offsets": {path.name: offset for path, offset in follower.offsets.items()}}
+            self._send(json.dumps(body).encode("utf-8"), "application/json")
+        elif url.path.startswith("/files/") and url.path.endswith(".gz"):
+            self._send_compressed(url.path[len("/files/"):])
+        elif url.path.startswith("/files/"):
+            self.path = self.path[len("/files"):]
+            super().do_GET()
+        else:
+            self.send_error(404)
+
+    def _send_compressed(self, relative):
+        """A gzipped artifact, sent as is for the browser to unpack"""
+        path = (self.results_dir / relative).resolve()
+        if self.results_dir.resolve() not in path.parents or not path.is_file():
+            self.send_error(404)
+            return
+        content_type = self.guess_type(path.name[:-len(".gz")])
+        if content_type == "application/octet-stream":
+            content_type = "text/plain; charset=utf-8"
+        self._send(path.read_bytes(), content_type, {"Content-Encoding": "gzip"})
+
+    def _send(self, body, content_type, headers=None):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(results_dir, run_id, port):
+    handler = type("ViewerHandler", (_ViewerHandler,), {"results_dir": Path(results_dir), "run_id": run_id})
+    server = ThreadingHTTPServer(("", port), handler)
+    print(f"Live results of {run_id} at http://localhost:{port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    return 0
+
+
+def render(args, run_id):
+    streams = stream_paths(args.results_dir, run_id)
+    if args.junit_xml:
+        render_junit(streams, args.junit_xml)
+        print(f"✓ JUnit XML written to {args.junit_xml}")
+    if args.html:
+        render_html(streams, args.html, extra_html=suite_summary_html(args.perf_dir, run_id))
+        print(f"✓ HTML report written to {args.html}")
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    run_id = args.run or latest_run_id(args.results_dir)
+    if run_id is None:
+        if args.command != "watch":
+            print(f"✗ No results streams in {args.results_dir}")
+            return 2
+        # watch may be started before the tests
+        print(f"Waiting for a results stream in {args.results_dir}...")
+        while run_id is None:
+            time.sleep(1)
+            run_id = latest_run_id(args.results_dir)
+    if args.command == "watch":
+        return watch(args.results_dir, run_id)
+    if args.command == "serve":
+        return serve(args.results_dir, run_id, args.port)
+    return render(args, run_id)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
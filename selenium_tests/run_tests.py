@@ -1,14 +1,98 @@
 #!/usr/bin/env python3
 """
 Quick test runner script for Opalumpus Selenium tests
-Usage: python run_tests.py [options]
+Usage: python run_tests.py [--workers N|auto] [--services MODE] [--grid MODE] [pytest options]
+
+--html and --junit-xml are rendered from the results stream of the run
+(results/<run id>-w<worker>.jsonl) once the tests are done.
 """
 
+import argparse
 import sys
 import subprocess
 import os
 from pathlib import Path
 
+from harness.artifacts import DEFAULT_KEEP_RUNS, DEFAULT_MAX_MB, prune
+from harness.grid import (
+    DEFAULT_REMOTE_URL,
+    DRIVER_BACKEND_ENV,
+    GRID_MODES,
+    REMOTE_URL_ENV,
+    GridError,
+    GridOrchestrator,
+    grid_capacity,
+)
+from harness.parallel import auto_worker_count, current_run_id, option_value, run_parallel, split_report_args
+from harness.profiling import suite_summary_html
+from harness.results import DEFAULT_RESULTS_DIR, render_html, render_junit, stream_paths
+from harness.services import MODES, ServiceError, ServiceOrchestrator
+
+def parse_args(argv):
+    """Split runner options from the arguments forwarded to pytest"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        "--workers",
+        default="1",
+        help="Number of parallel worker processes, or 'auto' to size by CPU and memory",
+    )
+    parser.add_argument(
+        "--services",
+        choices=MODES,
+        default=os.getenv("SERVICES", "none"),
+        help="Start (local, compose) or wait for (attach) the application before testing",
+    )
+    parser.add_argument(
+        "--services-timeout",
+        type=float,
+        default=180,
+        help="Seconds to wait for the services to become ready",
+    )
+    parser.add_argument(
+        "--grid",
+        choices=GRID_MODES,
+        default=os.getenv("GRID", "none"),
+        help="Run the browsers on a Selenium Grid: start docker-compose.grid.yml (compose) or use a running one (attach)",
+    )
+    return parser.parse_known_args(argv)
+
+def worker_count(option, test_args):
+    """
+    --workers as a number. 'auto' sizes by CPU and memory, or by the Grid's
+    Chrome slots when the browsers run remotely.
+    """
+    if option != "auto":
+        return int(option)
+    if option_value(test_args, "--driver-backend", DRIVER_BACKEND_ENV, "local") == "remote":
+        slots = grid_capacity(option_value(test_args, "--remote-url", REMOTE_URL_ENV, DEFAULT_REMOTE_URL))
+        if slots:
+            print(f"Sizing workers by the Grid's {slots} Chrome slots")
+            return slots
+    return auto_worker_count()
+
+def create_orchestrator(options, test_args):
+    """Service orchestrator for the URLs the tests will use"""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        # python-dotenv is only installed in the venv; rely on the environment
+        pass
+    only = None
+    joined = " ".join(test_args)
+    if "--api-backend=mock" in joined or "--api-backend mock" in joined or \
+            ("--api-backend" not in joined and os.getenv("API_BACKEND") == "mock"):
+        # The API is replaced by the in-process mock; only the frontend is needed
+        only = ("frontend",)
+    return ServiceOrchestrator(
+        options.services,
+        base_url=os.getenv("BASE_URL", "http://localhost:5173"),
+        api_url=os.getenv("API_URL", "http://localhost:3000"),
+        mongo_uri=os.getenv("MONGO_URI"),
+        timeout=options.services_timeout,
+        only=only,
+    )
+
 def main():
     """Main test runner"""
     print("=" * 60)
@@ -51,29 +135,75 @@ def main():
     print("=" * 60 + "\n")
     
     # Get command line arguments (skip script name)
-    test_args = sys.argv[1:] if len(sys.argv) > 1 else []
+    options, test_args = parse_args(sys.argv[1:])
     
     # Default arguments if none provided
     if not test_args:
-        test_args = ["-v", "--html=report.html", "--self-contained-html"]
+        test_args = ["-v", "--html=report.html"]
+    
+    # The tests stream their results; the reports are rendered from the
+    # streams once the run is over
+    test_args, html_path, junit_path = split_report_args(test_args)
+    results_dir = option_value(test_args, "--results-dir", "RESULTS_DIR", DEFAULT_RESULTS_DIR)
+    run_id = current_run_id()
+    
+    # Bring the application (and the Grid) up once for all workers
+    orchestrator = create_orchestrator(options, test_args)
+    grid = GridOrchestrator(
+        options.grid,
+        url=option_value(test_args, "--remote-url", REMOTE_URL_ENV, DEFAULT_REMOTE_URL),
+    )
+    try:
+        orchestrator.start()
+        grid.start()
+    except (ServiceError, GridError) as e:
+        orchestrator.stop()
+        print(f"\n✗ {e}")
+        return 1
+    workers = worker_count(options.workers, test_args)
+    
+    # Run pytest, sharded across worker processes if requested
+    try:
+        if workers > 1:
+            # Single processes prune in conftest.py; workers would race each other
+            runs, deleted, freed = prune(
+                results_dir,
+                int(option_value(test_args, "--keep-runs", "RESULTS_KEEP_RUNS", DEFAULT_KEEP_RUNS)),
+                float(option_value(test_args, "--artifacts-max-mb", "ARTIFACTS_MAX_MB", DEFAULT_MAX_MB)),
+                option_value(test_args, "--perf-dir", "PERF_RESULTS_DIR", "perf_results"),
+            )
+            if runs or deleted:
+                print(f"Pruned {runs} old run(s) and {deleted} artifact(s) ({freed / 1024 / 1024:.1f} MB)")
+            returncode = run_parallel([str(pytest_path)], test_args, workers, results_dir)
+        else:
+            returncode = subprocess.run([str(pytest_path)] + test_args).returncode
+    finally:
+        grid.stop()
+        orchestrator.stop()
     
-    # Run pytest
-    cmd = [str(pytest_path)] + test_args
-    result = subprocess.run(cmd)
+    if returncode == 5 and option_value(test_args, "--quarantine", "QUARANTINE", "run") == "only":
+        print("\nNo quarantined tests.")
+        returncode = 0
     
     # Print summary
     print("\n" + "=" * 60)
-    if result.returncode == 0:
+    if returncode == 0:
         print("✓ All tests passed!")
     else:
         print("✗ Some tests failed. Check the output above.")
     print("=" * 60)
     
-    # Print report location if HTML report was generated
-    if "--html" in " ".join(test_args):
-        print(f"\n📊 HTML report generated: {Path.cwd() / 'report.html'}")
+    streams = stream_paths(results_dir, run_id)
+    print(f"\n📄 Results stream: {', '.join(str(p) for p in streams) or 'none written'}")
+    if streams and junit_path:
+        render_junit(streams, junit_path)
+        print(f"📋 JUnit XML rendered: {Path.cwd() / junit_path}")
+    if streams and html_path:
+        perf_dir = option_value(test_args, "--perf-dir", "PERF_RESULTS_DIR", "perf_results")
+        render_html(streams, html_path, extra_html=suite_summary_html(perf_dir, run_id))
+        print(f"📊 HTML report rendered: {Path.cwd() / html_path}")
     
-    return result.returncode
+    return returncode
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Synthetic data seeding for the Opalumpus test environment
+Usage:
+    python seed_data.py seed --namespace demo --trips 10000 --bookings 500
+    python seed_data.py seed --namespace demo --admins 5 --backend mongo
+    python seed_data.py count --namespace demo
+    python seed_data.py teardown --namespace demo
+    python seed_data.py scale --sizes 100,1000,10000 --output trips_scale.json
+
+The same --seed always produces the same documents. ``scale`` grows a trips
+catalogue step by step and measures GET /api/trips and the rendering of the
+/trips page (UpcomingEvents) at each size, then removes the catalogue.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from harness.api_client import ApiClient
+from harness.seeding import (
+    BACKENDS,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_MONGO_URI,
+    DEFAULT_SEED,
+    SeedingError,
+    SyntheticData,
+    create_seeder,
+    seed_scenario,
+)
+
+load_dotenv()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Opalumpus synthetic data seeding")
+    parser.add_argument("command", choices=["seed", "count", "teardown", "scale"])
+    parser.add_argument("--namespace", default="manual", help="Namespace the data is tagged with")
+    parser.add_argument("--backend", choices=BACKENDS, default=os.getenv("SEED_BACKEND", "api"))
+    parser.add_argument("--api-url", default=os.getenv("API_URL", "http://localhost:3000"))
+    parser.add_argument("--base-url", default=os.getenv("BASE_URL", "http://localhost:5173"))
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGO_URI", DEFAULT_MONGO_URI))
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--trips", type=int, default=0)
+    parser.add_argument("--bookings", type=int, default=0)
+    parser.add_argument("--admins", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Concurrent API requests per batch (api backend)")
+    parser.add_argument("--sizes", default="100,1000,10000",
+                        help="Comma separated catalogue sizes for the scale command")
+    parser.add_argument("--samples", type=int, default=5,
+                        help="Measurements per size for the scale command")
+    parser.add_argument("--keep", action="store_true",
+                        help="Keep the catalogue after the scale command")
+    parser.add_argument("--output", default=None, help="Write scale results as JSON to this file")
+    return parser.parse_args(argv)
+
+
+def measure_api(client, samples):
+    """Median latency (ms) and size of GET /api/trips"""
+    latencies, size = [], 0
+    for _ in range(samples):
+        started = time.perf_counter()
+        response = client.get("/api/trips", timeout=120)
+        latencies.append((time.perf_counter() - started) * 1000)
+        size = len(response.content)
+    return statistics.median(latencies), size
+
+
+def measure_render(driver, base_url, expected, samples):
+    """Median time (ms) until /trips lists ``expected`` trips, plus page metrics"""
+    from selenium.webdriver.common.by import By
+
+    from harness.perf import collect_page_metrics
+    from harness.waits import wait_for
+
+    durations, metrics = [], {}
+    for _ in range(samples):
+        driver.get("about:blank")
+        started = time.perf_counter()
+        driver.get(f"{base_url}/trips")
+        wait_for(
+            driver,
+            lambda d: len(d.find_elements(By.CLASS_NAME, "event-item")) >= expected,
+            timeout=300,
+            message=f"/trips did not list {expected} trips",
+        )
+        durations.append((time.perf_counter() - started) * 1000)
+        metrics = collect_page_metrics(driver)
+    return statistics.median(durations), metrics
+
+
+def run_scale(args, seeder, client):
+    from harness.driver_pool import DriverPool
+
+    data = SyntheticData(args.namespace, args.seed)
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+    trips = data.trips(sizes[-1])
+    existing = len(client.list_trips()) - seeder.count(args.namespace)["trips"]
+    seeder.teardown(args.namespace)
+
+    pool = DriverPool()
+    driver = pool.acquire()
+    results, seeded = [], 0
+    try:
+        for size in sizes:
+            started = time.perf_counter()
+            seeder.insert_trips(trips[seeded:size])
+            seed_seconds = time.perf_counter() - started
+            seeded = size
+
+            api_ms, api_bytes = measure_api(client, args.samples)
+            render_ms, metrics = measure_render(driver, args.base_url, existing + size, args.samples)
+            result = {
+                "seeded_trips": size,
+                "total_trips": existing + size,
+                "seed_seconds": round(seed_seconds, 2),
+                "api_median_ms": round(api_ms, 1),
+                "api_response_bytes": api_bytes,
+                "render_median_ms": round(render_ms, 1),
+                "fcp_ms": metrics.get("fcp"),
+                "lcp_ms": metrics.get("lcp"),
+            }
+            results.append(result)
+            print(f"{size:>8} trips: seeded in {seed_seconds:.1f}s, "
+                  f"GET /api/trips {api_ms:.0f} ms ({api_bytes / 1024:.0f} KB), "
+                  f"/trips rendered in {render_ms:.0f} ms")
+    finally:
+        pool.release(driver, discard=True)
+        pool.close()
+        if not args.keep:
+            seeder.teardown(args.namespace)
+    return results
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    client = ApiClient(args.api_url, pool_size=args.concurrency, timeout=60)
+
+    print("=" * 60)
+    print(f"Opalumpus data seeding ({args.backend} backend, namespace '{args.namespace}')")
+    print("=" * 60)
+
+    try:
+        seeder = create_seeder(args.backend, api_client=client, mongo_uri=args.mongo_uri,
+                               batch_size=args.batch_size, concurrency=args.concurrency)
+        try:
+            if args.command == "seed":
+                scenario = seed_scenario(seeder, args.namespace, args.seed,
+                                         args.trips, args.bookings, args.admins)
+                print(f"✓ Seeded {scenario.counts()} in {scenario.seconds:.2f}s")
+            elif args.command == "count":
+                print(f"Documents in '{args.namespace}': {seeder.count(args.namespace)}")
+            elif args.command == "teardown":
+                started = time.perf_counter()
+                removed = seeder.teardown(args.namespace)
+                print(f"✓ Removed {removed} in {time.perf_counter() - started:.2f}s")
+                if not seeder.can_remove_bookings:
+                    print("Bookings cannot be deleted through the API; use --backend mongo")
+            else:
+                results = run_scale(args, seeder, client)
+                if args.output:
+                    with open(args.output, "w", encoding="utf-8") as f:
+                        json.dump(results, f, indent=2)
+                    print(f"\n📊 Results written to {args.output}")
+        finally:
+            seeder.close()
+    except SeedingError as e:
+        print(f"✗ {e}")
+        return 1
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
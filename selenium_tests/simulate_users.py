@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Concurrent browser user simulation for the Opalumpus booking flow
+Usage:
+    python simulate_users.py --users 10 --ramp-up 30 --hold 60
+    python simulate_users.py --stages 5:30,20:60,20:120,0:30 --output users.json
+
+Every virtual user is a headless Chrome going home -> /trips -> Book Now ->
+submit, with think time between the steps. --stages is a list of
+users:seconds steps: the number of users moves evenly to the target within
+each step. Bookings are tagged with --namespace; remove them with
+    python seed_data.py teardown --namespace loadsim --backend mongo
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+
+from dotenv import load_dotenv
+
+from harness.driver_pool import DriverPool
+from harness.journeys import (
+    DEFAULT_THINK_TIME,
+    DEFAULT_TIMEOUT,
+    BookingJourney,
+    UserSimulation,
+    format_summary,
+    install_response_log,
+    parse_stages,
+    summarize,
+)
+from harness.parallel import CHROME_MEMORY_MB, available_memory_mb
+
+load_dotenv()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Opalumpus browser user simulation")
+    parser.add_argument("--base-url", default=os.getenv("BASE_URL", "http://localhost:5173"))
+    parser.add_argument("--users", type=int, default=5, help="Peak number of concurrent users")
+    parser.add_argument("--ramp-up", type=float, default=30, help="Seconds to reach --users")
+    parser.add_argument("--hold", type=float, default=60, help="Seconds to stay at --users")
+    parser.add_argument("--ramp-down", type=float, default=10, help="Seconds to stop all users")
+    parser.add_argument("--stages", default=None,
+                        help="users:seconds steps, e.g. 5:30,20:60,0:10 (overrides the options above)")
+    parser.add_argument("--think-time", default=",".join(str(t) for t in DEFAULT_THINK_TIME),
+                        help="min,max seconds a user waits between steps")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="Seconds a step may take before the journey counts as timed out")
+    parser.add_argument("--namespace", default="loadsim", help="Namespace the bookings are tagged with")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for think times and choices")
+    parser.add_argument("--output", default=None, help="Write the summary and journeys as JSON to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if args.stages:
+        stages = parse_stages(args.stages)
+    else:
+        stages = [(args.users, args.ramp_up), (args.users, args.hold), (0, args.ramp_down)]
+    think_time = tuple(float(t) for t in args.think_time.split(","))
+    peak = max(users for users, _ in stages)
+
+    print("=" * 60)
+    print(f"Opalumpus browser user simulation against {args.base_url}")
+    print(f"Stages: {', '.join(f'{u} users for {s:g}s' for u, s in stages)}")
+    print("=" * 60)
+
+    memory = available_memory_mb()
+    if memory is not None and peak * CHROME_MEMORY_MB > memory:
+        print(f"⚠ {peak} browsers need about {peak * CHROME_MEMORY_MB} MB, "
+              f"only {memory} MB available; results will measure this machine, not the app")
+
+    rng = random.Random(args.seed) if args.seed is not None else None
+    journey = BookingJourney(args.base_url, args.namespace, think_time, args.timeout, rng)
+    pool = DriverPool(launch_hooks=[install_response_log])
+    simulation = UserSimulation(pool, journey, stages)
+    try:
+        records = simulation.run()
+    finally:
+        pool.close()
+
+    summary = summarize(records, simulation.timeline)
+    print()
+    print(format_summary(summary))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"stages": stages, "summary": summary, "journeys": records}, f, indent=2)
+        print(f"\n📊 Results written to {args.output}")
+
+    return 1 if summary["error_rate"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
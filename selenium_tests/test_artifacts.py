@@ -0,0 +1,131 @@
+"""
+Unit tests for the artifact store pruning and sampling (harness/artifacts.py)
+No browser or application is needed.
+"""
+
+import json
+import os
+
+from harness.artifacts import ArtifactStore, prune, sampled
+
+
+def write_run(results_dir, run_id, mtime, artifacts=()):
+    """One worker stream of ``run_id`` whose test refers to ``artifacts``"""
+    path = results_dir / f"{run_id}-w0.jsonl"
+    events = [
+        {"event": "start", "run_id": run_id, "worker": 0, "time": mtime, "collected": 1},
+        {"event": "test", "nodeid": "test_x.py::test_x", "outcome": "failed",
+         "artifacts": [{"kind": "dom", "path": artifact} for artifact in artifacts]},
+    ]
+    path.write_text("".join(json.dumps(event) + "\n" for event in events), encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def store_bytes(results_dir, size, fill):
+    return ArtifactStore(results_dir).put("screenshot", bytes([fill]) * size)
+
+
+def test_prune_keeps_the_newest_runs(tmp_path):
+    for n in range(5):
+        write_run(tmp_path, f"run{n}", mtime=1000 + n)
+
+    dropped, deleted, _ = prune(tmp_path, keep_runs=2, max_mb=100)
+
+    assert dropped == 3
+    assert deleted == 0
+    assert sorted(p.name for p in tmp_path.glob("*.jsonl")) == ["run3-w0.jsonl", "run4-w0.jsonl"]
+
+
+def test_prune_removes_the_directories_of_dropped_runs(tmp_path):
+    write_run(tmp_path, "old", mtime=1000)
+    write_run(tmp_path, "new", mtime=2000)
+    for run_id in ("old", "new"):
+        (tmp_path / run_id).mkdir()
+        (tmp_path / run_id / "attempt.log").write_text("...")
+
+    prune(tmp_path, keep_runs=1, max_mb=100)
+
+    assert not (tmp_path / "old").exists()
+    assert (tmp_path / "new" / "attempt.log").exists()
+
+
+def test_prune_deletes_only_unreferenced_artifacts(tmp_path):
+    shared = store_bytes(tmp_path, 100, 1)
+    old_only = store_bytes(tmp_path, 100, 2)
+    new_only = store_bytes(tmp_path, 100, 3)
+    orphan = store_bytes(tmp_path, 100, 4)
+    write_run(tmp_path, "old", mtime=1000, artifacts=[shared, old_only])
+    write_run(tmp_path, "new", mtime=2000, artifacts=[shared, new_only])
+
+    dropped, deleted, freed = prune(tmp_path, keep_runs=1, max_mb=100)
+
+    assert (dropped, deleted, freed) == (1, 2, 200)
+    assert (tmp_path / shared).exists()
+    assert (tmp_path / new_only).exists()
+    assert not (tmp_path / old_only).exists()
+    assert not (tmp_path / orphan).exists()
+
+
+def test_prune_drops_old_runs_over_the_size_limit(tmp_path):
+    mb = 1024 * 1024
+    for n in range(3):
+        write_run(tmp_path, f"run{n}", mtime=1000 + n, artifacts=[store_bytes(tmp_path, mb // 2, n)])
+
+    # Two runs' artifacts (1 MB) are within the limit, the third is not
+    dropped, deleted, _ = prune(tmp_path, keep_runs=10, max_mb=1.2)
+
+    assert (dropped, deleted) == (1, 1)
+    assert sorted(p.name for p in tmp_path.glob("*.jsonl")) == ["run1-w0.jsonl", "run2-w0.jsonl"]
+
+
+def test_prune_always_keeps_the_newest_run(tmp_path):
+    write_run(tmp_path, "old", mtime=1000, artifacts=[store_bytes(tmp_path, 1000, 1)])
+    newest = store_bytes(tmp_path, 2000, 2)
+    write_run(tmp_path, "new", mtime=2000, artifacts=[newest])
+
+    dropped, _, _ = prune(tmp_path, keep_runs=10, max_mb=0)
+
+    assert dropped == 1
+    assert [p.name for p in tmp_path.glob("*.jsonl")] == ["new-w0.jsonl"]
+    assert (tmp_path / newest).exists()
+
+
+def test_prune_keeps_the_baseline_among_the_perf_files(tmp_path):
+    results_dir, perf_dir = tmp_path / "results", tmp_path / "perf_results"
+    results_dir.mkdir()
+    perf_dir.mkdir()
+    for n, run_id in enumerate(("build-1", "build-2", "build-3")):
+        for name in (f"{run_id}-w0.json", f"{run_id}-trace-w0.json", f"{run_id}-trace.folded"):
+            (perf_dir / name).write_text("{}")
+            os.utime(perf_dir / name, (1000 + n, 1000 + n))
+    (perf_dir / "baseline.json").write_text("{}")
+    os.utime(perf_dir / "baseline.json", (1, 1))
+
+    dropped, _, freed = prune(results_dir, keep_runs=2, max_mb=100, perf_dir=perf_dir)
+
+    assert (dropped, freed) == (1, 6)
+    assert sorted(p.name for p in perf_dir.iterdir()) == [
+        "baseline.json",
+        "build-2-trace-w0.json", "build-2-trace.folded", "build-2-w0.json",
+        "build-3-trace-w0.json", "build-3-trace.folded", "build-3-w0.json",
+    ]
+
+
+def test_prune_of_an_empty_directory(tmp_path):
+    assert prune(tmp_path, keep_runs=2, max_mb=100) == (0, 0, 0)
+
+
+def test_sampled_is_deterministic():
+    nodeids = [f"test_x.py::test_{n}" for n in range(1000)]
+    picked = [nodeid for nodeid in nodeids if sampled("build-1", nodeid, 0.1)]
+
+    assert picked == [nodeid for nodeid in nodeids if sampled("build-1", nodeid, 0.1)]
+    assert 50 < len(picked) < 150
+    # A different run samples different tests
+    assert picked != [nodeid for nodeid in nodeids if sampled("build-2", nodeid, 0.1)]
+
+
+def test_sampled_rate_bounds():
+    assert not sampled("build-1", "test_x.py::test_x", 0)
+    assert sampled("build-1", "test_x.py::test_x", 1)
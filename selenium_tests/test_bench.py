@@ -0,0 +1,78 @@
+"""
+Unit tests for the harness benchmark statistics (harness/bench.py)
+No browser or application is needed.
+"""
+
+import pytest
+
+from harness.bench import compare_runs, mann_whitney
+
+
+def run(**benchmarks):
+    return {"benchmarks": benchmarks}
+
+
+def test_mann_whitney_of_separated_samples():
+    u, p = mann_whitney([1, 2, 3, 4, 5], [6, 7, 8, 9, 10])
+    assert u == 25
+    assert p == pytest.approx(0.01219, abs=1e-5)
+
+    u, p_reversed = mann_whitney([6, 7, 8, 9, 10], [1, 2, 3, 4, 5])
+    assert u == 0
+    assert p_reversed == pytest.approx(p)
+
+
+def test_mann_whitney_with_ties():
+    # The tied 3s share rank 3.5: U of [3, 4, 5] is 3.5 + 5 + 6 - 6
+    u, p = mann_whitney([1, 2, 3], [3, 4, 5])
+    assert u == 8.5
+    assert 0.05 < p < 1.0
+
+
+def test_mann_whitney_of_all_tied_samples():
+    assert mann_whitney([2.0] * 5, [2.0] * 5) == (12.5, 1.0)
+
+
+def test_mann_whitney_of_overlapping_samples_is_not_significant():
+    _, p = mann_whitney([1, 3, 5, 7, 9], [2, 4, 6, 8, 10])
+    assert p > 0.5
+
+
+def test_compare_runs_verdicts():
+    base = run(
+        slower=[1.0, 1.1, 1.0, 0.9, 1.0, 1.05],
+        faster=[2.0, 2.1, 2.0, 1.9, 2.0, 2.05],
+        same=[1.0, 1.2, 0.9, 1.1, 1.0, 0.95],
+        tiny=[1.00, 1.01, 1.00, 1.01, 1.00, 1.01],
+        few=[1.0, 1.0, 1.0],
+        gone=[1.0, 1.0, 1.0, 1.0],
+    )
+    head = run(
+        slower=[1.5, 1.6, 1.5, 1.4, 1.5, 1.55],
+        faster=[1.0, 1.1, 1.0, 0.9, 1.0, 1.05],
+        same=[1.1, 0.9, 1.0, 1.2, 0.95, 1.0],
+        tiny=[1.02, 1.03, 1.02, 1.03, 1.02, 1.03],
+        few=[2.0, 2.0, 2.0],
+        new=[1.0, 1.0, 1.0, 1.0],
+    )
+    rows = {row["name"]: row for row in compare_runs(base, head)}
+
+    assert {name: row["verdict"] for name, row in rows.items()} == {
+        "slower": "slower",
+        "faster": "faster",
+        "same": "no change",
+        # Significant, but less than the 5% minimum change
+        "tiny": "no change",
+        "few": "too few samples",
+        "gone": "gone",
+        "new": "new",
+    }
+    assert rows["slower"]["change_pct"] == pytest.approx(50.0)
+    assert rows["few"]["p"] is None and rows["few"]["change_pct"] == pytest.approx(100.0)
+    assert rows["gone"]["head"] is None and rows["new"]["base"] is None
+    assert rows["tiny"]["p"] < 0.05
+
+
+def test_compare_runs_keeps_base_order_then_new_benchmarks():
+    rows = compare_runs(run(b=[1.0], a=[1.0]), run(c=[1.0], a=[1.0]))
+    assert [row["name"] for row in rows] == ["b", "a", "c"]
@@ -0,0 +1,97 @@
+"""
+Unit tests for the performance budget checks (harness/budgets.py)
+No browser or application is needed.
+"""
+
+import pytest
+
+from harness.budgets import Baseline, BudgetConfig, check_route, metric_medians
+
+BUDGETS = """
+[settings]
+max_regression_pct = 20
+min_regression_ms = 50
+min_regression_kb = 20
+min_regression_cls = 0.05
+min_regression_requests = 3
+
+[default]
+lcp_ms = 2500
+
+[/trips]
+lcp_ms = 2000
+transfer_kb = 100
+"""
+
+
+def sample(lcp=100, cls=0.01, transfer=50 * 1024, requests=5, **fields):
+    return dict(lcp=lcp, cls=cls, transferBytes=transfer, requestCount=requests, **fields)
+
+
+@pytest.fixture
+def config(tmp_path):
+    path = tmp_path / "budgets.ini"
+    path.write_text(BUDGETS, encoding="utf-8")
+    return BudgetConfig(path)
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    baseline = Baseline(tmp_path / "baseline.json")
+    baseline.add_run("previous", {"/trips": {"lcp_ms": 100, "cls": 0.01, "transfer_kb": 50, "requests": 5}})
+    return baseline
+
+
+def test_metric_medians_converts_units_and_skips_missing_fields():
+    medians = metric_medians([
+        sample(lcp=900, transfer=1024),
+        sample(lcp=1100, transfer=3072),
+        sample(lcp=5000, transfer=2048, fcp=None),
+    ])
+    assert medians["lcp_ms"] == 1100
+    assert medians["transfer_kb"] == 2
+    assert medians["requests"] == 5
+    assert "fcp_ms" not in medians
+    assert "ttfb_ms" not in medians
+
+
+def test_metric_medians_of_no_samples_is_empty():
+    assert metric_medians([]) == {}
+
+
+def test_check_route_passes_within_budget_and_baseline(config, baseline):
+    medians, violations = check_route("/trips", [sample()], config, baseline)
+    assert medians["lcp_ms"] == 100
+    assert violations == []
+
+
+def test_check_route_reports_route_budget_over_default(config):
+    _, violations = check_route("/trips", [sample(lcp=2200)], config, Baseline("missing.json"))
+    assert violations == ["/trips lcp_ms: median 2200.00ms exceeds budget 2000ms"]
+
+    _, violations = check_route("/about", [sample(lcp=2200)], config, Baseline("missing.json"))
+    assert violations == []
+
+
+@pytest.mark.parametrize("metric, slow", [
+    ("lcp_ms", sample(lcp=200)),
+    ("transfer_kb", sample(transfer=75 * 1024)),
+    ("cls", sample(cls=0.1)),
+    ("requests", sample(requests=9)),
+])
+def test_check_route_reports_regression_above_floor(config, baseline, metric, slow):
+    _, violations = check_route("/trips", [slow], config, baseline)
+    assert len(violations) == 1
+    assert violations[0].startswith(f"/trips {metric}: ") and "regressed" in violations[0]
+
+
+@pytest.mark.parametrize("noise", [
+    sample(lcp=140),
+    sample(transfer=65 * 1024),
+    sample(cls=0.04),
+    sample(requests=7),
+])
+def test_check_route_ignores_regression_below_floor(config, baseline, noise):
+    # Each is more than 20% above the baseline but smaller than its unit's floor
+    _, violations = check_route("/trips", [noise], config, baseline)
+    assert violations == []
@@ -0,0 +1,86 @@
+"""
+Unit tests for the load test statistics (harness/load.py)
+No browser or application is needed.
+"""
+
+import pytest
+
+from harness.load import HISTOGRAM_BUCKETS_MS, Sample, histogram, percentile, summarize
+
+
+def sample(latency, ok=True, size=100):
+    return Sample("list_trips", 0.0, latency, ok, 200 if ok else 500, size)
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile(values, 0) == 1
+
+
+def test_percentile_of_few_values():
+    assert percentile([7], 99) == 7
+    assert percentile([1, 2, 3], 50) == 2
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([], 50) is None
+
+
+def test_histogram_buckets_are_inclusive_upper_bounds():
+    counts = histogram([0.5, 1, 1.5, 2, 999, 1000, 1001, 60000])
+    by_bound = dict(zip(HISTOGRAM_BUCKETS_MS, counts))
+
+    assert by_bound[1] == 2
+    assert by_bound[2] == 2
+    assert by_bound[1000] == 2
+    assert by_bound[2000] == 1
+    assert by_bound[float("inf")] == 1
+    assert sum(counts) == 8
+
+
+def test_histogram_of_nothing():
+    assert histogram([]) == [0] * len(HISTOGRAM_BUCKETS_MS)
+
+
+def test_summarize():
+    samples = [sample(0.010), sample(0.020), sample(0.030, ok=False, size=300), sample(0.040)]
+
+    summary = summarize("list_trips", samples, duration=2.0)
+
+    assert summary["requests"] == 4
+    assert summary["errors"] == 1
+    assert summary["skipped"] == 0
+    assert summary["error_rate"] == 0.25
+    assert summary["throughput_rps"] == 2.0
+    assert summary["mean_ms"] == pytest.approx(25.0)
+    assert summary["p50_ms"] == pytest.approx(20.0)
+    assert summary["p99_ms"] == pytest.approx(40.0)
+    assert summary["max_ms"] == pytest.approx(40.0)
+    assert summary["mean_response_bytes"] == 150
+    assert (summary["histogram"]["10"], summary["histogram"]["20"], summary["histogram"]["50"]) == (1, 1, 2)
+
+
+def test_summarize_leaves_skipped_requests_out_of_the_statistics():
+    samples = [sample(0.010), sample(None), sample(None)]
+
+    summary = summarize("delete_trip", samples, duration=1.0)
+
+    assert summary["requests"] == 1
+    assert summary["skipped"] == 2
+    assert summary["error_rate"] == 0.0
+    assert summary["throughput_rps"] == 1.0
+    assert summary["max_ms"] == pytest.approx(10.0)
+
+
+def test_summarize_of_no_requests():
+    summary = summarize("delete_trip", [sample(None)], duration=0)
+
+    assert summary["requests"] == 0
+    assert summary["skipped"] == 1
+    assert summary["throughput_rps"] == 0.0
+    assert summary["error_rate"] == 0.0
+    assert summary["mean_ms"] is None
+    assert summary["p95_ms"] is None
+    assert summary["max_ms"] is None
@@ -4,14 +4,31 @@ This module contains automated test cases for testing the web application functi
 All tests use headless Chrome for CI/CD compatibility.
 """
 
-import pytest
 import time
+
+import pytest
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
 import requests
 
+from harness.pages import (
+    AboutPage,
+    BookNowPage,
+    ContactUsPage,
+    HomePage,
+    SignInPage,
+    TripFormPage,
+    TripsPage,
+)
+from harness.profiles import set_offline
+from harness.waits import (
+    element_stable,
+    route_rendered,
+    wait_for,
+    wait_for_network_idle,
+)
+
 
 class TestOpalumpusApplication:
     """Test suite for Opalumpus travel booking application"""
@@ -27,13 +44,11 @@ class TestOpalumpusApplication:
             2. Verify page title is present
             3. Verify page loads without errors
         """
-        driver.get(base_url)
+        page = HomePage(driver, base_url).open()
         assert driver.title != "", "Page title should not be empty"
         
-        # Wait for body element to be present
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
+        # Wait for the navigation bar to be present
+        page.wait_for("nav")
         
         # Verify URL is correct
         assert base_url in driver.current_url, "Current URL should match base URL"
@@ -49,14 +64,11 @@ class TestOpalumpusApplication:
             2. Verify navigation menu exists
             3. Check for key navigation links (Home, Trips, About, Contact)
         """
-        driver.get(base_url)
-        time.sleep(2)  # Allow React to render
+        page = HomePage(driver, base_url).open()
         
         # Look for navigation elements
         try:
-            nav_element = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "nav"))
-            )
+            nav_element = page.wait_for("nav")
             assert nav_element is not None, "Navigation menu should exist"
             print("✓ Test Case 2 Passed: Navigation menu exists")
         except TimeoutException:
@@ -77,14 +89,12 @@ class TestOpalumpusApplication:
             3. Verify URL contains /trips
             4. Verify trips page content loads
         """
-        driver.get(f"{base_url}/trips")
-        time.sleep(2)
+        page = TripsPage(driver, base_url).open()
         
         assert "/trips" in driver.current_url, "URL should contain /trips"
         
         # Verify page loaded
-        body = driver.find_element(By.TAG_NAME, "body")
-        assert body.text != "", "Trips page should have content"
+        assert page.text() != "", "Trips page should have content"
         print("✓ Test Case 3 Passed: Successfully navigated to Trips page")
 
     # Test Case 4: Navigate to About Page
@@ -97,13 +107,11 @@ class TestOpalumpusApplication:
             2. Verify URL is correct
             3. Verify page content exists
         """
-        driver.get(f"{base_url}/about")
-        time.sleep(2)
+        page = AboutPage(driver, base_url).open()
         
         assert "/about" in driver.current_url, "URL should contain /about"
         
-        body = driver.find_element(By.TAG_NAME, "body")
-        assert body.text != "", "About page should have content"
+        assert page.text() != "", "About page should have content"
         print("✓ Test Case 4 Passed: Successfully navigated to About page")
 
     # Test Case 5: Navigate to Contact Page
@@ -116,13 +124,11 @@ class TestOpalumpusApplication:
             2. Verify URL is correct
             3. Verify page content exists
         """
-        driver.get(f"{base_url}/contactus")
-        time.sleep(2)
+        page = ContactUsPage(driver, base_url).open()
         
         assert "/contactus" in driver.current_url, "URL should contain /contactus"
         
-        body = driver.find_element(By.TAG_NAME, "body")
-        assert body.text != "", "Contact page should have content"
+        assert page.text() != "", "Contact page should have content"
         print("✓ Test Case 5 Passed: Successfully navigated to Contact page")
 
     # Test Case 6: Verify Admin Sign-In Page Loads
@@ -135,26 +141,21 @@ class TestOpalumpusApplication:
             2. Verify sign-in form elements exist
             3. Check for username and password fields
         """
-        driver.get(f"{base_url}/admin-signin")
-        time.sleep(2)
+        page = SignInPage(driver, base_url).open()
         
         assert "/admin-signin" in driver.current_url, "URL should contain /admin-signin"
         
         # Look for form elements
-        try:
-            # Try to find username input
-            username_field = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.ID, "username"))
-            )
-            password_field = driver.find_element(By.ID, "password")
-            
-            assert username_field is not None, "Username field should exist"
-            assert password_field is not None, "Password field should exist"
+        mismatches = page.check_dom({
+            "username": {"visible": True},
+            "password": {"visible": True, "attrs": {"type": "password"}},
+        })
+        if not mismatches:
             print("✓ Test Case 6 Passed: Admin sign-in page loaded with form fields")
-        except (TimeoutException, NoSuchElementException):
+        else:
             # Verify at least the page loaded
-            body = driver.find_element(By.TAG_NAME, "body")
-            assert "sign" in body.text.lower() or "login" in body.text.lower(), \
+            text = page.text().lower()
+            assert "sign" in text or "login" in text, \
                 "Page should contain sign-in related content"
             print("✓ Test Case 6 Passed: Admin sign-in page loaded")
 
@@ -167,38 +168,25 @@ class TestOpalumpusApplication:
             1. Navigate to admin sign-in page
             2. Enter invalid credentials
             3. Submit form
-            4. Verify error handling (stay on page or show error)
+            4. Verify the rejection alert is shown and the page stays
         """
-        driver.get(f"{base_url}/admin-signin")
-        time.sleep(2)
+        page = SignInPage(driver, base_url).open()
         
-        try:
-            # Find and fill username
-            username_field = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.ID, "username"))
-            )
-            username_field.send_keys("invaliduser")
-            
-            # Find and fill password
-            password_field = driver.find_element(By.ID, "password")
-            password_field.send_keys("wrongpassword")
-            
-            # Find and click submit button
-            submit_button = driver.find_element(By.CSS_SELECTOR, "button[type='submit']")
-            submit_button.click()
-            
-            time.sleep(3)  # Wait for response
-            
-            # Should still be on signin page or show error
-            current_url = driver.current_url
-            
-            # Either stayed on signin page or alert was shown
-            assert "/admin-signin" in current_url or "/trip-form" not in current_url, \
-                "Should not redirect to trip-form with invalid credentials"
-            
-            print("✓ Test Case 7 Passed: Invalid login properly rejected")
-        except (TimeoutException, NoSuchElementException) as e:
-            print(f"✓ Test Case 7 Passed: Form validation prevented submission or page structure different")
+        # Fill in the credentials and submit
+        page.wait_for("username")
+        page.submit("invaliduser", "wrongpassword")
+        
+        # The app alerts once the API has rejected the login
+        alert = wait_for(driver, EC.alert_is_present(), message="No alert after invalid login")
+        message = alert.text
+        alert.accept()
+        
+        assert "invalid username or password" in message.lower(), \
+            f"Expected the invalid login alert, got: {message}"
+        assert "/admin-signin" in driver.current_url, \
+            "Should not redirect to trip-form with invalid credentials"
+        
+        print("✓ Test Case 7 Passed: Invalid login properly rejected")
 
     # Test Case 8: Verify Booking Page Loads
     @pytest.mark.critical
@@ -210,28 +198,20 @@ class TestOpalumpusApplication:
             2. Verify booking form exists
             3. Check for required form fields
         """
-        driver.get(f"{base_url}/book-now")
-        time.sleep(2)
+        page = BookNowPage(driver, base_url).open()
         
         assert "/book-now" in driver.current_url, "URL should contain /book-now"
         
-        try:
-            # Look for booking form fields
-            name_field = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.ID, "userName"))
-            )
-            email_field = driver.find_element(By.ID, "userEmail")
-            people_field = driver.find_element(By.ID, "numberOfPeople")
-            
-            assert name_field is not None, "Name field should exist"
-            assert email_field is not None, "Email field should exist"
-            assert people_field is not None, "Number of people field should exist"
-            
-            print("✓ Test Case 8 Passed: Booking page loaded with all form fields")
-        except (TimeoutException, NoSuchElementException):
-            body = driver.find_element(By.TAG_NAME, "body")
-            assert "book" in body.text.lower(), "Page should contain booking-related content"
-            print("✓ Test Case 8 Passed: Booking page loaded")
+        # Look for booking form fields
+        page.wait_for("user_name")
+        page.assert_dom({
+            "user_name": {"visible": True, "attrs": {"required": True}},
+            "user_email": {"visible": True, "attrs": {"required": True}},
+            "number_of_people": {"visible": True, "attrs": {"required": True}},
+            "submit_button": {"text": "Book Now"},
+        }, "Booking form fields should be shown")
+        
+        print("✓ Test Case 8 Passed: Booking page loaded with all form fields")
 
     # Test Case 9: Test Booking Form Validation
     @pytest.mark.critical
@@ -243,80 +223,63 @@ class TestOpalumpusApplication:
             2. Try to submit empty form
             3. Verify validation prevents submission
         """
-        driver.get(f"{base_url}/book-now")
-        time.sleep(2)
+        page = BookNowPage(driver, base_url).open()
         
-        try:
-            # Try to find and click submit without filling form
-            submit_button = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "button[type='submit']"))
-            )
-            
-            initial_url = driver.current_url
-            submit_button.click()
-            time.sleep(2)
-            
-            # Should still be on booking page due to HTML5 validation
-            assert driver.current_url == initial_url or "/book-now" in driver.current_url, \
-                "Should stay on booking page when form is invalid"
-            
-            print("✓ Test Case 9 Passed: Form validation is working")
-        except (TimeoutException, NoSuchElementException):
-            print("✓ Test Case 9 Passed: Form validation or structure verified")
+        # Try to find and click submit without filling form
+        page.wait_for("submit_button")
+        
+        initial_url = driver.current_url
+        page.submit()
+        
+        # A blocked submission fires no request; let any that did settle
+        wait_for_network_idle(driver)
+        
+        # Should still be on booking page due to HTML5 validation
+        assert driver.current_url == initial_url or "/book-now" in driver.current_url, \
+            "Should stay on booking page when form is invalid"
+        
+        print("✓ Test Case 9 Passed: Form validation is working")
 
     # Test Case 10: Test Booking Form Submission with Valid Data
     @pytest.mark.critical
-    def test_booking_form_submission_valid_data(self, driver, base_url):
+    def test_booking_form_submission_valid_data(self, driver, base_url, seeded_data):
         """
         Test Case 10: Verify booking form accepts valid data
         Steps:
             1. Navigate to booking page
             2. Fill all required fields with valid data
             3. Submit form
-            4. Verify form processes submission
+            4. Verify the success alert is shown and the form is cleared
+        The booking is tagged with the test's seed namespace; it is removed
+        again after the test with --seed-backend=mongo (as on Jenkins) and
+        stays in the database with the API backend, which cannot delete
+        bookings.
         """
-        driver.get(f"{base_url}/book-now")
-        time.sleep(2)
+        page = BookNowPage(driver, base_url).open()
         
-        try:
-            # Fill out the booking form
-            name_field = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.ID, "userName"))
-            )
-            name_field.clear()
-            name_field.send_keys("John Doe")
-            
-            email_field = driver.find_element(By.ID, "userEmail")
-            email_field.clear()
-            email_field.send_keys("john.doe@example.com")
-            
-            people_field = driver.find_element(By.ID, "numberOfPeople")
-            people_field.clear()
-            people_field.send_keys("2")
-            
-            notes_field = driver.find_element(By.ID, "additionalNotes")
-            notes_field.clear()
-            notes_field.send_keys("Test booking from Selenium")
-            
-            # Submit the form
-            submit_button = driver.find_element(By.CSS_SELECTOR, "button[type='submit']")
-            submit_button.click()
-            
-            time.sleep(3)  # Wait for submission
-            
-            # Check if form was processed (fields cleared or alert shown)
-            # After successful submission, fields should be cleared
-            name_value = name_field.get_attribute("value")
-            
-            # If backend is running, fields should clear; if not, they remain
-            print(f"✓ Test Case 10 Passed: Form submission processed (Name field value: '{name_value}')")
-            
-        except (TimeoutException, NoSuchElementException) as e:
-            print(f"✓ Test Case 10 Passed: Form elements verified")
+        # Fill out the booking form
+        page.wait_for("user_name")
+        page.fill("John Doe", "john.doe@example.com", 2, seeded_data.tagged("Test booking from Selenium"))
+        
+        # Submit the form
+        page.submit()
+        
+        # The app alerts once the booking request has completed
+        alert = wait_for(driver, EC.alert_is_present(), message="No alert after booking")
+        message = alert.text
+        alert.accept()
+        
+        assert "successfully" in message.lower(), f"Expected the booking success alert, got: {message}"
+        
+        # The form is cleared after the alert is closed
+        wait_for(driver, lambda d: not any(page.form().values()),
+                 message="Booking form was not cleared after a successful booking")
+        
+        print("✓ Test Case 10 Passed: Booking submitted and form cleared")
 
     # Test Case 11: API Health Check
     @pytest.mark.smoke
-    def test_api_health_check(self, api_url):
+    def test_api_health_check(self, api_client):
         """
         Test Case 11: Verify API server is running and responding
         Steps:
@@ -325,7 +288,7 @@ class TestOpalumpusApplication:
             3. Verify response contains expected message
         """
         try:
-            response = requests.get(f"{api_url}/", timeout=10)
+            response = api_client.get("/")
             assert response.status_code == 200, f"API should return 200, got {response.status_code}"
             assert "API Working" in response.text or response.status_code == 200, \
                 "API should return success message"
@@ -345,25 +308,10 @@ class TestOpalumpusApplication:
             4. Navigate to Contact page
             5. Verify each navigation works correctly
         """
-        # Start at home
-        driver.get(base_url)
-        time.sleep(1)
-        assert base_url in driver.current_url
-        
-        # Go to trips
-        driver.get(f"{base_url}/trips")
-        time.sleep(1)
-        assert "/trips" in driver.current_url
-        
-        # Go to about
-        driver.get(f"{base_url}/about")
-        time.sleep(1)
-        assert "/about" in driver.current_url
-        
-        # Go to contact
-        driver.get(f"{base_url}/contactus")
-        time.sleep(1)
-        assert "/contactus" in driver.current_url
+        # Start at home, then trips, about and contact
+        for page_class in (HomePage, TripsPage, AboutPage, ContactUsPage):
+            page = page_class(driver, base_url).open()
+            assert page.is_current(), f"Should be on {page.path}"
         
         print("✓ Test Case 12 Passed: Multi-page navigation flow successful")
 
@@ -379,24 +327,21 @@ class TestOpalumpusApplication:
             4. Test with mobile size (375x667)
             5. Verify page adapts without breaking
         """
-        driver.get(base_url)
+        HomePage(driver, base_url).open()
         
         # Desktop size
         driver.set_window_size(1920, 1080)
-        time.sleep(1)
-        body = driver.find_element(By.TAG_NAME, "body")
+        body = wait_for(driver, element_stable((By.TAG_NAME, "body")))
         assert body.is_displayed(), "Page should display at desktop size"
         
         # Tablet size
         driver.set_window_size(768, 1024)
-        time.sleep(1)
-        body = driver.find_element(By.TAG_NAME, "body")
+        body = wait_for(driver, element_stable((By.TAG_NAME, "body")))
         assert body.is_displayed(), "Page should display at tablet size"
         
         # Mobile size
         driver.set_window_size(375, 667)
-        time.sleep(1)
-        body = driver.find_element(By.TAG_NAME, "body")
+        body = wait_for(driver, element_stable((By.TAG_NAME, "body")))
         assert body.is_displayed(), "Page should display at mobile size"
         
         print("✓ Test Case 13 Passed: Page is responsive across different screen sizes")
@@ -412,23 +357,17 @@ class TestOpalumpusApplication:
             3. Check number field has type='number'
             4. Verify proper input validation types
         """
-        driver.get(f"{base_url}/book-now")
-        time.sleep(2)
+        page = BookNowPage(driver, base_url).open()
         
-        try:
-            email_field = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.ID, "userEmail"))
-            )
-            email_type = email_field.get_attribute("type")
-            assert email_type == "email", "Email field should have type='email'"
-            
-            people_field = driver.find_element(By.ID, "numberOfPeople")
-            people_type = people_field.get_attribute("type")
-            assert people_type == "number", "Number of people field should have type='number'"
-            
-            print("✓ Test Case 14 Passed: Form fields have correct input types")
-        except (TimeoutException, NoSuchElementException):
-            print("✓ Test Case 14 Passed: Form structure verified")
+        page.wait_for("user_email")
+        page.assert_dom({
+            "user_name": {"attrs": {"type": "text"}},
+            "user_email": {"attrs": {"type": "email"}},
+            "number_of_people": {"attrs": {"type": "number"}},
+            "additional_notes": {"attrs": {"required": None}},
+        }, "Form fields should have the correct input types")
+        
+        print("✓ Test Case 14 Passed: Form fields have correct input types")
 
     # Test Case 15: Test Back Navigation
     @pytest.mark.regression
@@ -442,23 +381,177 @@ class TestOpalumpusApplication:
             4. Verify returned to homepage
         """
         # Go to home
-        driver.get(base_url)
-        time.sleep(1)
+        home = HomePage(driver, base_url).open()
         
         # Go to trips
-        driver.get(f"{base_url}/trips")
-        time.sleep(1)
+        TripsPage(driver, base_url).open()
         assert "/trips" in driver.current_url
         
         # Go back
         driver.back()
-        time.sleep(1)
+        wait_for(driver, route_rendered(home.path))
         
         # Should be back at home
         assert "/trips" not in driver.current_url, "Should have navigated away from trips page"
         
         print("✓ Test Case 15 Passed: Browser back navigation works correctly")
 
+    # Test Case 16: Trips Page With a Large Catalogue
+    @pytest.mark.regression
+    @pytest.mark.seed(trips=200)
+    def test_trips_page_large_catalogue(self, driver, base_url, seeded_data):
+        """
+        Test Case 16: Verify the trips page lists every trip of a large catalogue
+        Steps:
+            1. Seed 200 synthetic trips
+            2. Navigate to trips page
+            3. Verify every seeded trip is rendered
+        """
+        page = TripsPage(driver, base_url).open()
+        
+        items = wait_for(
+            driver,
+            lambda d: page.trip_count() >= len(seeded_data.trips),
+            message="Seeded trips were not rendered",
+        )
+        assert items, "Trips page should list the seeded trips"
+        
+        rendered = page.trip_titles()
+        missing = {t["destination"] for t in seeded_data.trips} - set(rendered)
+        assert not missing, f"{len(missing)} seeded trips are not listed, e.g. {sorted(missing)[:3]}"
+        
+        print(f"✓ Test Case 16 Passed: All {len(seeded_data.trips)} seeded trips are listed")
+
+    # Test Case 17: Trips Page With a Slow API
+    @pytest.mark.regression
+    @pytest.mark.parametrize("latency_ms", [50, 2000])
+    def test_trips_page_under_api_latency(self, driver, base_url, mock_api, latency_ms, record_property):
+        """
+        Test Case 17: Verify the trips page copes with a fast and a slow API
+        Steps:
+            1. Delay GET /api/trips on the mock API
+            2. Navigate to trips page
+            3. Verify the empty-state message is shown while the request is pending
+            4. Verify every trip is listed once the response arrives
+        """
+        mock_api.inject("GET /api/trips", latency_ms=latency_ms)
+        expected = len(mock_api.trips)
+        page = TripsPage(driver, base_url)
+        
+        started = time.perf_counter()
+        driver.get(page.url)
+        wait_for(driver, route_rendered(page.path))
+        placeholder_shown = "No upcoming events available." in page.text()
+        
+        wait_for(
+            driver,
+            lambda d: page.trip_count() == expected,
+            timeout=latency_ms / 1000 + 10,
+            message="Trips were not listed after the API responded",
+        )
+        listed_ms = (time.perf_counter() - started) * 1000
+        record_property("trips_listed_ms", round(listed_ms))
+        
+        assert mock_api.requests_to("GET /api/trips"), "Trips should be loaded from the mock API"
+        assert listed_ms >= latency_ms, "Trips cannot be listed before the API responded"
+        if latency_ms >= 1000:
+            assert placeholder_shown, "Empty-state message should be shown while trips are loading"
+        
+        print(f"✓ Test Case 17 Passed: {expected} trips listed after {listed_ms:.0f} ms "
+              f"with {latency_ms} ms API latency")
+
+    # Test Case 18: Booking Failure Is Reported
+    @pytest.mark.critical
+    def test_booking_submission_api_error(self, driver, base_url, mock_api):
+        """
+        Test Case 18: Verify a failed booking request is reported to the user
+        Steps:
+            1. Make POST /api/booknow fail on the mock API
+            2. Submit a valid booking
+            3. Verify the error alert is shown and the form keeps its data
+        """
+        mock_api.inject("POST /api/booknow", status=500)
+        page = BookNowPage(driver, base_url).open()
+        
+        page.fill("John Doe", "john.doe@example.com", 2)
+        page.submit()
+        
+        alert = wait_for(driver, EC.alert_is_present(), message="No alert after failed booking")
+        message = alert.text
+        alert.accept()
+        
+        assert "error" in message.lower(), f"Expected an error alert, got: {message}"
+        assert page.values("user_name")["user_name"] == "John Doe", \
+            "Form should keep its data after a failed booking"
+        assert not mock_api.bookings, "No booking should have been stored"
+        
+        print("✓ Test Case 18 Passed: Failed booking is reported and form data is kept")
+
+    # Test Case 19: Booking While Offline
+    @pytest.mark.regression
+    def test_booking_submission_offline(self, driver, base_url):
+        """
+        Test Case 19: Verify a booking submitted without network is reported
+        Steps:
+            1. Load the booking page
+            2. Cut the network (CDP offline emulation)
+            3. Submit a valid booking
+            4. Verify the error alert is shown and the form keeps its data
+        """
+        page = BookNowPage(driver, base_url).open()
+        
+        page.fill("John Doe", "john.doe@example.com", 2)
+        
+        set_offline(driver)
+        page.submit()
+        
+        alert = wait_for(driver, EC.alert_is_present(), message="No alert after offline booking")
+        message = alert.text
+        alert.accept()
+        
+        assert "error" in message.lower(), f"Expected an error alert, got: {message}"
+        assert page.values("user_name")["user_name"] == "John Doe", \
+            "Form should keep its data after a failed booking"
+        
+        print("✓ Test Case 19 Passed: Offline booking is reported and form data is kept")
+
+    # Test Case 20: Admin Panel With the Cached Session
+    @pytest.mark.regression
+    def test_trip_form_with_admin_session(self, driver, base_url, admin_session):
+        """
+        Test Case 20: Verify the admin panel opens for a signed-in admin
+        Steps:
+            1. Restore the worker's cached admin session into the browser
+            2. Navigate to /trip-form
+            3. Verify the page is not redirected and the trip form is shown
+        """
+        page = TripFormPage(driver, base_url).open()
+        
+        assert "/trip-form" in driver.current_url, "Signed-in admin should stay on /trip-form"
+        page.assert_dom({
+            "destination": {"visible": True},
+            "hero_title": {"text": "Admin Panel to handle trips"},
+        }, "Trip form should be shown")
+        
+        print("✓ Test Case 20 Passed: Admin panel opened with the cached session")
+
+    # Test Case 21: Admin Sign-In Through the Form
+    @pytest.mark.critical
+    @pytest.mark.clean_session
+    def test_admin_signin_opens_trip_form(self, driver, base_url, admin_session):
+        """
+        Test Case 21: Verify valid admin credentials open the admin panel
+        Steps:
+            1. Sign in through the /admin-signin form (no cached session)
+            2. Verify the redirect to /trip-form
+            3. Verify the app remembers the admin in localStorage
+        """
+        assert "/trip-form" in driver.current_url, "Valid login should redirect to /trip-form"
+        assert admin_session.local_storage.get("admin") == "true", \
+            "Login should store the admin flag in localStorage"
+        
+        print("✓ Test Case 21 Passed: Admin sign-in opened the admin panel")
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--html=report.html", "--self-contained-html"])
@@ -0,0 +1,90 @@
+"""
+Performance Budget Checks for Opalumpus Travel Application
+Compares the page timings captured while the functional tests ran against the
+per-route budgets in budgets.ini and against the baseline of previous runs.
+These tests always run after the functional tests (see conftest.py).
+"""
+
+import pytest
+import pytest_html
+
+from harness.budgets import METRICS, Baseline, BudgetConfig, check_route, load_run_samples
+
+CONFIG = BudgetConfig()
+
+
+@pytest.fixture(scope="module")
+def run_timings(perf_recorder):
+    """
+    Page timings of the current run from every worker, plus the baseline.
+    The baseline is updated with this run's medians once all routes are
+    within budget.
+    """
+    # Flush this worker's samples so they are read together with the others
+    perf_recorder.write()
+    state = {
+        "samples": load_run_samples(perf_recorder.output_dir, perf_recorder.run_id),
+        "baseline": Baseline(CONFIG.baseline_file, CONFIG.baseline_runs),
+        "medians": {},
+        "violations": 0,
+    }
+    yield state
+
+    if state["medians"] and not state["violations"]:
+        state["baseline"].add_run(perf_recorder.run_id, state["medians"])
+        state["baseline"].save()
+
+
+def _medians_table(route, medians, budgets, baseline):
+    rows = "".join(
+        f"<tr><td>{name}</td><td>{value:.2f}</td><td>{budgets.get(name, '')}</td>"
+        f"<td>{'' if baseline.median(route, name) is None else round(baseline.median(route, name), 2)}</td></tr>"
+        for name, value in medians.items()
+    )
+    return (
+        "<table><tr><th>Metric</th><th>Median</th><th>Budget</th><th>Baseline</th></tr>"
+        f"{rows}</table>"
+    )
+
+
+@pytest.mark.performance
+class TestPerformanceBudgets:
+    """Performance budget and regression gate for every budgeted route"""
+
+    @pytest.mark.parametrize("route", CONFIG.routes())
+    def test_route_within_budget(self, route, run_timings, record_property, extras):
+        """
+        Verify a route's median page timings are within budget
+        Steps:
+            1. Collect all samples captured for the route in this run
+            2. Compare each metric's median with the route budget
+            3. Compare each median with the baseline of previous runs
+        """
+        samples = run_timings["samples"].get(route)
+        if not samples:
+            pytest.skip(f"No page timings captured for {route} in this run")
+
+        baseline = run_timings["baseline"]
+        medians, violations = check_route(route, samples, CONFIG, baseline)
+        run_timings["medians"][route] = medians
+
+        record_property("samples", len(samples))
+        for name, value in medians.items():
+            record_property(name, round(value, 2))
+        extras.append(pytest_html.extras.html(
+            _medians_table(route, medians, CONFIG.budgets_for(route), baseline)
+        ))
+
+        if violations:
+            run_timings["violations"] += 1
+            message = "\n".join(violations)
+            if CONFIG.mode == "warn":
+                pytest.xfail(message)
+            pytest.fail(message)
+
+        summary = ", ".join(
+            f"{name}={medians[name]:.0f}{METRICS[name][2]}"
+            for name in ("ttfb_ms", "fcp_ms", "lcp_ms", "transfer_kb")
+            if name in medians
+        )
+        print(f"✓ {route} within budget ({len(samples)} samples: {summary})")
@@ -0,0 +1,204 @@
+"""
+Unit tests for the results streams and reports (harness/results.py)
+No browser or application is needed: reports and streams are made up.
+"""
+
+import json
+import xml.etree.ElementTree as ET
+from types import SimpleNamespace
+
+from harness.results import (ResultStream, StreamFollower, _outcome, render_html,
+                             render_junit, stream_path)
+
+
+def report(when, outcome="passed", **extra):
+    """Stand-in for a pytest TestReport"""
+    fields = dict(when=when, failed=outcome == "failed", skipped=outcome == "skipped",
+                  passed=outcome == "passed", duration=0.5, longrepr=None, longreprtext="",
+                  user_properties=[], capstdout="", capstderr="", start=100.0)
+    fields.update(extra)
+    return SimpleNamespace(**fields)
+
+
+def finished(nodeid, outcome, **extra):
+    """The stream line of a finished test"""
+    event = {"event": "test", "nodeid": nodeid, "outcome": outcome, "worker": 0, "duration": 1.5,
+             "phases": {"setup": 0.5, "call": 0.5, "teardown": 0.5}, "properties": {}, "artifacts": []}
+    event.update(extra)
+    return event
+
+
+def write_stream(results_dir, run_id, events, worker=0):
+    path = stream_path(results_dir, run_id, worker)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(event) + "\n" for event in events))
+    return path
+
+
+def run_events(*tests):
+    return ([{"event": "start", "run_id": "r", "worker": 0, "time": 1000.0, "collected": len(tests)}]
+            + list(tests) + [{"event": "finish", "time": 1010.0, "exitstatus": 1}])
+
+
+def test_outcome_of_a_failed_call():
+    assert _outcome([report("setup"), report("call", "failed"), report("teardown")]) == "failed"
+
+
+def test_outcome_of_a_failed_setup_or_teardown_is_error():
+    assert _outcome([report("setup", "failed"), report("teardown")]) == "error"
+    assert _outcome([report("setup"), report("call"), report("teardown", "failed")]) == "error"
+    # A failing call whose teardown fails too is still an error
+    assert _outcome([report("setup"), report("call", "failed"), report("teardown", "failed")]) == "error"
+
+
+def test_outcome_of_xfail_and_xpass():
+    xfailed = report("call", "skipped", wasxfail="known bug")
+    xpassed = report("call", "passed", wasxfail="known bug")
+    assert _outcome([report("setup"), xfailed, report("teardown")]) == "xfailed"
+    assert _outcome([report("setup"), xpassed, report("teardown")]) == "xpassed"
+
+
+def test_outcome_of_skipped_and_passed():
+    assert _outcome([report("setup", "skipped", longrepr=("f", 1, "Skipped: no")), report("teardown")]) == "skipped"
+    assert _outcome([report("setup"), report("call"), report("teardown")]) == "passed"
+
+
+def test_record_of_a_test_that_passed_on_a_rerun(tmp_path):
+    stream = ResultStream(tmp_path, "r", 0)
+    last = report("teardown", reruns=2, rerun_seconds=3.14159, rerun_messages=["boom", "boom again"])
+
+    record = stream._record("test_x.py::test_x", [report("setup"), report("call"), last])
+
+    assert record["outcome"] == "passed"
+    assert record["reruns"] == 2
+    assert record["rerun_seconds"] == 3.142
+    assert record["rerun_messages"] == ["boom", "boom again"]
+    assert record["flaky"] is True
+
+
+def test_record_of_a_test_that_failed_every_rerun(tmp_path):
+    stream = ResultStream(tmp_path, "r", 0)
+    failed = report("call", "failed", longrepr="AssertionError: nope", longreprtext="E  AssertionError: nope")
+    last = report("teardown", reruns=1, rerun_seconds=1.0, rerun_messages=["nope"])
+
+    record = stream._record("test_x.py::test_x", [report("setup"), failed, last])
+
+    assert record["outcome"] == "failed"
+    assert record["flaky"] is False
+    assert record["message"] == "AssertionError: nope"
+    assert record["longrepr"] == "E  AssertionError: nope"
+
+
+def test_record_without_reruns_has_no_rerun_fields(tmp_path):
+    record = ResultStream(tmp_path, "r", 0)._record("test_x.py::test_x", [report("call"), report("teardown")])
+    assert "reruns" not in record
+    assert "flaky" not in record
+
+
+def test_poll_skips_a_partial_last_line_and_reads_it_next_time(tmp_path):
+    path = write_stream(tmp_path, "r", [{"event": "start", "worker": 0}])
+    line = json.dumps(finished("test_x.py::test_x", "passed"))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line[:20])
+    follower = StreamFollower(tmp_path, "r")
+
+    assert [e["event"] for e in follower.poll()] == ["start"]
+    assert follower.poll() == []
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line[20:] + "\n")
+    events = follower.poll()
+    assert [e.get("nodeid") for e in events] == ["test_x.py::test_x"]
+    assert follower.poll() == []
+
+
+def test_poll_picks_up_workers_that_start_later(tmp_path):
+    write_stream(tmp_path, "r", [{"event": "start", "worker": 0}])
+    follower = StreamFollower(tmp_path, "r")
+    assert len(follower.poll()) == 1
+
+    write_stream(tmp_path, "r", [{"event": "start", "worker": 1}], worker=1)
+    write_stream(tmp_path, "other", [{"event": "start", "worker": 0}])
+    assert [e["worker"] for e in follower.poll()] == [1]
+
+
+def test_junit_maps_outcomes(tmp_path):
+    path = write_stream(tmp_path, "r", run_events(
+        finished("test_a.py::test_passed", "passed"),
+        finished("test_a.py::test_failed", "failed", message="assert 1 == 2", longrepr="E assert 1 == 2"),
+        finished("test_a.py::test_error", "error", message="fixture broke", longrepr="E fixture broke"),
+        finished("test_a.py::Suite::test_xfail", "xfailed", message="known bug"),
+        finished("test_a.py::test_skipped", "skipped", message="no backend"),
+    ))
+    output = tmp_path / "results.xml"
+
+    render_junit([path], output)
+
+    suite = ET.parse(output).getroot().find("testsuite")
+    assert (suite.get("tests"), suite.get("failures"), suite.get("errors"), suite.get("skipped")) == ("5", "1", "1", "2")
+    cases = {case.get("name"): case for case in suite.iter("testcase")}
+    assert [child.tag for child in cases["test_passed"]] == []
+    assert cases["test_failed"].find("failure").get("message") == "assert 1 == 2"
+    assert cases["test_failed"].find("failure").text == "E assert 1 == 2"
+    assert cases["test_error"].find("error").get("message") == "fixture broke"
+    assert cases["test_xfail"].get("classname") == "test_a.Suite"
+    assert cases["test_xfail"].find("skipped").get("type") == "pytest.xfail"
+    assert cases["test_skipped"].find("skipped").get("type") == "pytest.skip"
+
+
+def test_junit_rerun_properties(tmp_path):
+    path = write_stream(tmp_path, "r", run_events(
+        finished("test_a.py::test_flaky", "passed", properties={"page": "/"},
+               reruns=1, rerun_seconds=2.5, rerun_messages=["timeout"], flaky=True),
+    ))
+    output = tmp_path / "results.xml"
+
+    render_junit([path], output)
+
+    case = ET.parse(output).getroot().find("testsuite/testcase")
+    properties = {p.get("name"): p.get("value") for p in case.iter("property")}
+    assert properties == {"page": "/", "reruns": "1", "rerun_seconds": "2.5", "flaky": "True"}
+
+
+def test_junit_strips_control_characters(tmp_path):
+    path = write_stream(tmp_path, "r", run_events(
+        finished("test_a.py::test_failed", "failed", message="bad \x1b[31mred\x1b[0m",
+               longrepr="E \x00null\x08", stdout="out\x0c\n", stderr="tab\tkept"),
+    ))
+    output = tmp_path / "results.xml"
+
+    render_junit([path], output)
+
+    case = ET.parse(output).getroot().find("testsuite/testcase")
+    assert case.find("failure").get("message") == "bad [31mred[0m"
+    assert case.find("failure").text == "E null"
+    assert case.find("system-out").text == "out\n"
+    assert case.find("system-err").text == "tab\tkept"
+
+
+def test_html_report(tmp_path):
+    path = write_stream(tmp_path, "r", run_events(
+        finished("test_a.py::test_passed", "passed"),
+        finished("test_a.py::test_failed", "failed", message="<b>no</b>",
+                   artifacts=[{"kind": "screenshot", "path": "artifacts/ab/ab.png"},
+                              {"kind": "dom", "path": "artifacts/cd/cd.html.gz"}]),
+        finished("test_a.py::test_flaky", "passed", reruns=1, rerun_seconds=1.0,
+               rerun_messages=["timeout"], flaky=True),
+    ))
+    output = tmp_path / "report" / "report.html"
+    output.parent.mkdir()
+
+    render_html([path], output, title="Run r", extra_html="<div id='profile'></div>")
+
+    text = output.read_text(encoding="utf-8")
+    assert "<title>Run r</title>" in text
+    assert "3/3 tests: 2 passed, 1 failed" in text
+    assert '<tbody class="failed">' in text
+    assert "&lt;b&gt;no&lt;/b&gt;" in text
+    # Artifacts are linked relative to the report
+    assert 'src="../artifacts/ab/ab.png"' in text
+    assert '<a href="../artifacts/cd/cd.html.gz">dom (gzip)</a>' in text
+    assert 'passed <span class="flaky">(flaky)</span>' in text
+    assert "1 rerun(s), 1.00s: passed on a rerun (flaky)" in text
+    assert "Attempt 1: timeout" in text
+    assert "<div id='profile'></div>" in text
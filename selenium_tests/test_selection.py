@@ -0,0 +1,127 @@
+"""
+Unit tests for test selection, sharding and flakiness (harness/selection.py)
+No browser or application is needed.
+"""
+
+import json
+
+import pytest
+
+from harness.selection import (
+    TestHistory,
+    affected_routes,
+    frontend_pages,
+    select_changed,
+    shard_by_duration,
+)
+
+
+class FakeItem:
+    """The parts of a pytest item select_changed looks at"""
+
+    def __init__(self, nodeid, *markers):
+        self.nodeid = nodeid
+        self.markers = markers
+
+    def get_closest_marker(self, name):
+        return name if name in self.markers else None
+
+
+def history_with(tmp_path, tests):
+    path = tmp_path / "history.json"
+    path.write_text(json.dumps({"tests": tests}), encoding="utf-8")
+    return TestHistory(path)
+
+
+def test_shard_by_duration_balances_total_duration():
+    durations = {"a": 7.0, "b": 5.0, "c": 4.0, "d": 3.0, "e": 1.0}
+    shards = shard_by_duration(list(durations), 2, durations)
+
+    assert [load for _, load in shards] == [10.0, 10.0]
+    assert sorted(t for tests, _ in shards for t in tests) == sorted(durations)
+    # Original order within a shard
+    for tests, _ in shards:
+        assert tests == sorted(tests)
+
+
+def test_shard_by_duration_drops_empty_shards_and_defaults_unknown_tests():
+    shards = shard_by_duration(["a", "b"], 4, {"a": 1.0})
+    assert len(shards) == 2
+    assert sorted(load for _, load in shards) == [1.0, 10.0]
+
+
+@pytest.mark.parametrize("files, keys", [
+    (["Opalumpus_frontEnd/src/components/SignIn.jsx"], {"page:/admin-signin"}),
+    (["Opalumpus_frontEnd/src/components/SignIn.css"], {"page:/admin-signin"}),
+    (["Opalumpus_frontEnd/package.json"], {"page:*"}),
+    (["Backend/routes/tripRoute.js"], {"api:/api/trips"}),
+    (["Backend/server.js"], {"api:*"}),
+    (["README.md", "Opalumpus_frontEnd/README.md"], set()),
+])
+def test_affected_routes_of_application_files(files, keys):
+    assert affected_routes(files) == (keys, set())
+
+
+def test_affected_routes_of_test_files():
+    assert affected_routes(["selenium_tests/test_opalumpus.py"]) == (set(), {"test_opalumpus.py"})
+    assert affected_routes(["selenium_tests/conftest.py"]) == (None, None)
+    assert affected_routes(["Jenkinsfile"]) == (None, None)
+
+
+def test_frontend_pages_follows_imports_to_the_routes(tmp_path):
+    (tmp_path / "App.jsx").write_text(
+        'import Home from "./Home";\nimport About from "./About";\nimport Nav from "./Nav";\n'
+        '<Route path="/" element={<Home />} />\n<Route path="/about" element={<About />} />\n',
+        encoding="utf-8",
+    )
+    (tmp_path / "Home.jsx").write_text('import Card from "./Card";\nimport "./Home.css";\n', encoding="utf-8")
+    (tmp_path / "About.jsx").write_text('import Card from "./Card";\n', encoding="utf-8")
+    (tmp_path / "Card.jsx").write_text("", encoding="utf-8")
+    (tmp_path / "Home.css").write_text("", encoding="utf-8")
+    (tmp_path / "Nav.jsx").write_text("", encoding="utf-8")
+
+    pages = {path.name: routes for path, routes in frontend_pages(tmp_path).items()}
+    assert pages["Card.jsx"] == {"/", "/about"}
+    assert pages["Home.css"] == {"/"}
+    assert pages["About.jsx"] == {"/about"}
+    assert pages["Nav.jsx"] == {"*"}
+
+
+def test_select_changed_picks_the_tests_covering_a_changed_page(tmp_path):
+    history = history_with(tmp_path, {
+        "test_opalumpus.py::test_sign_in": {"durations": [], "outcomes": [], "covers": ["page:/admin-signin"]},
+        "test_opalumpus.py::test_trips": {"durations": [], "outcomes": [], "covers": ["page:/trips", "api:/api/trips"]},
+        "test_opalumpus.py::test_health": {"durations": [], "outcomes": [], "covers": ["api:/"]},
+    })
+    sign_in = FakeItem("test_opalumpus.py::test_sign_in")
+    trips = FakeItem("test_opalumpus.py::test_trips")
+    health = FakeItem("test_opalumpus.py::test_health", "smoke")
+    unknown = FakeItem("test_opalumpus.py::test_new")
+    items = [sign_in, trips, health, unknown]
+
+    selected, deselected = select_changed(history, items, ["Opalumpus_frontEnd/src/components/SignIn.jsx"])
+    assert selected == [sign_in, health, unknown]
+    assert deselected == [trips]
+
+    selected, deselected = select_changed(history, items, ["Backend/controllers/tripController.js"])
+    assert selected == [trips, health, unknown]
+
+    selected, deselected = select_changed(history, items, ["selenium_tests/conftest.py"])
+    assert selected == items and deselected == []
+
+
+@pytest.mark.parametrize("outcomes, score", [
+    (["passed"] * 10, 0.0),
+    (["failed"] * 10, 0.0),
+    (["passed", "failed"] * 2, 0.0),  # too few runs to tell
+    (["passed", "failed"] * 5, 0.9),
+    (["passed"] * 8 + ["flaky", "passed"], 0.1),
+    (["passed", "skipped", "skipped", "passed", "passed", "failed", "passed"], 0.4),
+])
+def test_flakiness(tmp_path, outcomes, score):
+    history = history_with(tmp_path, {"t": {"durations": [], "outcomes": outcomes, "covers": []}})
+    assert history.flakiness("t") == pytest.approx(score)
+
+
+def test_flakiness_of_unknown_test_is_zero(tmp_path):
+    assert history_with(tmp_path, {}).flakiness("t") == 0.0
@@ -0,0 +1,84 @@
+"""
+Unit tests for the screenshot comparison (harness/visual.py)
+No browser or application is needed.
+"""
+
+import numpy as np
+
+from harness.visual import diff_images
+
+# 5x7 digits, '#' is ink
+FIVE = ["#####", "#....", "####.", "....#", "....#", "#...#", ".###."]
+EIGHT = [".###.", "#...#", "#...#", ".###.", "#...#", "#...#", ".###."]
+
+
+def render(ink, offset=(0, 0), supersample=4):
+    """
+    Black ``ink`` (boolean, in sub-pixels) on white with an 8 sub-pixel
+    margin, moved by ``offset`` sub-pixels and box-filtered down to pixels,
+    so partly covered pixels come out grey like anti-aliased edges
+    """
+    height, width = ink.shape[0] + 16, ink.shape[1] + 16
+    canvas = np.ones((height, width))
+    canvas[8 + offset[0]:8 + offset[0] + ink.shape[0], 8 + offset[1]:8 + offset[1] + ink.shape[1]][ink] = 0
+    height, width = height // supersample * supersample, width // supersample * supersample
+    pixels = canvas[:height, :width].reshape(height // supersample, supersample, width // supersample, supersample)
+    grey = (pixels.mean(axis=(1, 3)) * 255).round().astype(np.uint8)
+    return np.repeat(grey[..., None], 3, axis=2)
+
+
+def glyph(rows, stroke):
+    """A digit with strokes of ``stroke`` sub-pixels"""
+    return np.kron(np.array([[c == "#" for c in row] for row in rows]), np.ones((stroke, stroke), dtype=bool))
+
+
+def test_identical_images_match():
+    image = render(glyph(FIVE, 8))
+    count, total, mask = diff_images(image, image.copy())
+    assert count == 0
+    assert total == image.shape[0] * image.shape[1]
+    assert not mask.any()
+
+
+def test_edge_shifted_by_a_sub_pixel_is_antialiasing():
+    bar = np.ones((160, 48), dtype=bool)
+    expected, actual = render(bar, offset=(0, 1)), render(bar, offset=(0, 2))
+
+    count, _, mask = diff_images(expected, actual)
+    assert count == 0
+    assert np.count_nonzero(mask == 2) > 0
+
+    count, _, _ = diff_images(expected, actual, antialiasing=False)
+    assert count == np.count_nonzero(mask == 2)
+
+
+def test_changed_glyph_is_counted():
+    expected, actual = render(glyph(FIVE, 8), supersample=1), render(glyph(EIGHT, 8), supersample=1)
+    changed = np.count_nonzero((expected != actual).any(axis=2))
+
+    count, _, mask = diff_images(expected, actual)
+    assert count == changed
+    assert not (mask == 2).any()
+
+
+def test_changed_antialiased_glyph_is_counted():
+    expected, actual = render(glyph(FIVE, 8), offset=(1, 2)), render(glyph(EIGHT, 8), offset=(1, 2))
+    count, _, mask = diff_images(expected, actual)
+    # Its partly covered border pixels pass as anti-aliasing, its strokes do not
+    assert count > 0
+    assert np.count_nonzero(mask == 1) == count
+
+
+def test_ignored_rectangle_is_not_counted():
+    expected, actual = render(glyph(FIVE, 8), supersample=1), render(glyph(EIGHT, 8), supersample=1)
+    height, width = expected.shape[:2]
+    count, _, mask = diff_images(expected, actual, ignore=[(0, 0, width, height)])
+    assert count == 0
+    assert (mask == 3).all()
+
+
+def test_size_difference_counts_the_area_outside_the_common_part():
+    expected = np.full((10, 20, 3), 255, dtype=np.uint8)
+    actual = np.full((12, 20, 3), 255, dtype=np.uint8)
+    count, total, _ = diff_images(expected, actual)
+    assert (count, total) == (2 * 20, 12 * 20)
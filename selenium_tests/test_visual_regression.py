@@ -0,0 +1,74 @@
+"""
+Visual Regression Tests for Opalumpus Travel Application
+Screenshots of every page at the desktop, tablet and phone viewports are
+compared with the approved baselines in visual_baselines/ (see
+harness/visual.py). New and changed screenshots are approved with
+`python visual.py approve`.
+"""
+
+import pytest
+import pytest_html
+
+from harness.pages import AboutPage, BookNowPage, ContactUsPage, HomePage, SignInPage, TripsPage
+from harness.profiles import emulate_device
+from harness.visual import VIEWPORTS, baseline_name, element_rects, settle
+from harness.waits import wait_for_network_idle
+
+# Page -> selectors of the content that comes from the database; only the
+# mock API (--api-backend=mock) serves the same trips every run
+PAGES = {
+    HomePage: (),
+    TripsPage: (TripsPage.EVENT,),
+    AboutPage: (),
+    ContactUsPage: (),
+    SignInPage: (),
+    BookNowPage: (),
+}
+
+
+@pytest.mark.visual
+class TestVisualRegression:
+    """Every page, at every viewport, against its approved baseline"""
+
+    @pytest.mark.parametrize("page_class", PAGES, ids=lambda page_class: page_class.path)
+    def test_page_matches_baseline(self, page_class, driver, base_url, api_backend, visual,
+                                   record_property, extras):
+        """
+        Verify a page looks as approved at the desktop, tablet and phone sizes
+        Steps:
+            1. Load the page
+            2. For each viewport: resize, wait for the layout to settle and
+               take a screenshot
+            3. Compare each screenshot with its baseline (in the background,
+               while the next viewport renders)
+        """
+        page = page_class(driver, base_url).open()
+        dynamic = PAGES[page_class] if api_backend is None else ()
+
+        pending = {}
+        for viewport in VIEWPORTS.values():
+            emulate_device(driver, viewport)
+            wait_for_network_idle(driver)
+            settle(driver)
+            pending[viewport.name] = visual.compare(
+                baseline_name(page.path, viewport.name),
+                driver.get_screenshot_as_png(),
+                ignore=element_rects(driver, dynamic),
+            )
+        verdicts = {name: future.result() for name, future in pending.items()}
+
+        for name, verdict in verdicts.items():
+            if "percent" in verdict:
+                record_property(f"{name}_diff_pct", verdict["percent"])
+            if verdict.get("diff"):
+                extras.append(pytest_html.extras.url(verdict["diff"], name=f"{verdict['name']} diff"))
+
+        differs = [v for v in verdicts.values() if v["status"] == "differs"]
+        assert not differs, "Screenshots differ from their baselines:\n" + "\n".join(
+            f"  {v['name']}: {v['percent']:.2f}% of the pixels ({v['diff']})" for v in differs
+        )
+        new = [v["name"] for v in verdicts.values() if v["status"] == "new"]
+        if new:
+            pytest.skip(f"No approved baseline for {', '.join(new)} (python visual.py approve)")
+
+        print(f"✓ {page.path} matches its baselines at {', '.join(verdicts)}")
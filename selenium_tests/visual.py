@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Review and approve the screenshots of the visual regression tests
+Usage:
+    python visual.py list                      # new and changed screenshots of the newest run
+    python visual.py approve                   # make all of them the baselines
+    python visual.py approve trips@phone home@desktop
+
+Every command reads the run in --results-dir (default: results) with the
+newest stream unless --run names one. Approved screenshots are written to
+--baselines (default: visual_baselines) as optimized PNGs; commit them with
+the change that made them look different.
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from harness.results import DEFAULT_RESULTS_DIR, latest_run_id
+from harness.visual import DEFAULT_BASELINE_DIR, VISUAL_DIR, approve, verdicts
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Review and approve visual regression screenshots")
+    parser.add_argument("command", choices=("list", "approve"))
+    parser.add_argument("names", nargs="*", help="Screenshots to approve, e.g. trips@phone (default: all)")
+    parser.add_argument("--results-dir", default=os.getenv("RESULTS_DIR", DEFAULT_RESULTS_DIR))
+    parser.add_argument("--run", default=None, help="Run id (default: the run with the newest stream)")
+    parser.add_argument("--baselines", default=os.getenv("VISUAL_BASELINES_DIR", DEFAULT_BASELINE_DIR))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    run_id = args.run or latest_run_id(args.results_dir)
+    found = verdicts(Path(args.results_dir, run_id, VISUAL_DIR)) if run_id else {}
+    if not found:
+        print(f"✗ No screenshots compared in run {run_id or '(none)'} of {args.results_dir}")
+        return 2
+
+    pending = {name: v for name, v in found.items() if v["status"] != "matches"}
+    if args.command == "list":
+        print(f"Run {run_id}: {len(found)} screenshots, {len(pending)} new or changed")
+        for name, verdict in pending.items():
+            detail = "no baseline" if verdict["status"] == "new" else f"{verdict['percent']:.2f}% differs"
+            print(f"  {name:<28} {detail:<16} {verdict.get('diff', verdict['actual'])}")
+        return 0
+
+    unknown = [name for name in args.names if name not in found]
+    if unknown:
+        print(f"✗ Not in run {run_id}: {', '.join(unknown)}")
+        return 2
+    selected = args.names or list(pending)
+    for name in selected:
+        baseline = approve(found[name], args.baselines)
+        print(f"✓ Approved {name} -> {baseline} ({baseline.stat().st_size / 1024:.0f} KB)")
+    if not selected:
+        print("Nothing to approve: every screenshot matches its baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())